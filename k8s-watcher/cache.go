@@ -7,6 +7,7 @@ import (
 	"fmt"
 	"log"
 	"path/filepath"
+	"sync"
 	"time"
 
 	metav1 "k8s.io/apimachinery/pkg/apis/meta/v1"
@@ -28,6 +29,39 @@ type Cache struct {
 	informer    k8sCache.SharedInformer
 	namespace   string
 	userIDLabel string
+	// changed is closed and replaced every time a resource is added or updated in the cache.
+	changed     chan struct{}
+	changedLock sync.Mutex
+}
+
+// newCache wraps an informer and signals the waiters of the cache whenever the informer
+// adds or updates a resource.
+func newCache(informer k8sCache.SharedInformer, lister k8sCache.GenericLister, namespace string, userIDLabel string) (*Cache, error) {
+	cache := &Cache{informer: informer, lister: lister, namespace: namespace, userIDLabel: userIDLabel, changed: make(chan struct{})}
+	_, err := informer.AddEventHandler(k8sCache.ResourceEventHandlerFuncs{
+		AddFunc:    func(obj interface{}) { cache.notifyChanged() },
+		UpdateFunc: func(oldObj, newObj interface{}) { cache.notifyChanged() },
+	})
+	if err != nil {
+		return nil, fmt.Errorf("cannot watch the changes of the cache for namespace %s: %w", namespace, err)
+	}
+	return cache, nil
+}
+
+// changes returns a channel that is closed the next time a resource is added or updated in the cache.
+// Get the channel before reading the cache so that no change is missed in between.
+func (c *Cache) changes() <-chan struct{} {
+	c.changedLock.Lock()
+	defer c.changedLock.Unlock()
+	return c.changed
+}
+
+// notifyChanged wakes up everyone waiting for changes of the cache.
+func (c *Cache) notifyChanged() {
+	c.changedLock.Lock()
+	defer c.changedLock.Unlock()
+	close(c.changed)
+	c.changed = make(chan struct{})
 }
 
 // GenericKubernetesResource allows unmarshalling the metadata of dynamic resources without
@@ -143,8 +177,7 @@ func NewJupyterServerCacheFromConfig(ctx context.Context, config Config, namespa
 	factory := dynamicinformer.NewFilteredDynamicSharedInformerFactory(k8sDynamicClient, time.Minute, namespace, nil)
 	informer := factory.ForResource(resource).Informer()
 	lister := factory.ForResource(resource).Lister()
-	res = &Cache{informer: informer, lister: lister, namespace: namespace, userIDLabel: config.JupyterServerUserIDLabel}
-	return
+	return newCache(informer, lister, namespace, config.JupyterServerUserIDLabel)
 }
 
 // NewAmaltheaSessionCacheFromConfig generates a new session cache from a configuration and a specfic k8s namespace.
@@ -157,8 +190,7 @@ func NewAmaltheaSessionCacheFromConfig(ctx context.Context, config Config, names
 	factory := dynamicinformer.NewFilteredDynamicSharedInformerFactory(k8sDynamicClient, time.Minute, namespace, nil)
 	informer := factory.ForResource(resource).Informer()
 	lister := factory.ForResource(resource).Lister()
-	res = &Cache{informer: informer, lister: lister, namespace: namespace, userIDLabel: config.AmaltheaSessionUserIDLabel}
-	return
+	return newCache(informer, lister, namespace, config.AmaltheaSessionUserIDLabel)
 }
 
 // NewShipwrightBuildRunCacheFromConfig generates a new buildrun cache from a configuration and a specfic k8s namespace.
@@ -171,8 +203,7 @@ func NewShipwrightBuildRunCacheFromConfig(ctx context.Context, config Config, na
 	factory := dynamicinformer.NewFilteredDynamicSharedInformerFactory(k8sDynamicClient, time.Minute, namespace, nil)
 	informer := factory.ForResource(resource).Informer()
 	lister := factory.ForResource(resource).Lister()
-	res = &Cache{informer: informer, lister: lister, namespace: namespace, userIDLabel: config.UserIDLabel}
-	return
+	return newCache(informer, lister, namespace, config.UserIDLabel)
 }
 
 // NewTektonTaskRunCacheFromConfig generates a new taskrun cache from a configuration and a specfic k8s namespace.
@@ -185,6 +216,5 @@ func NewTektonTaskRunCacheFromConfig(ctx context.Context, config Config, namespa
 	factory := dynamicinformer.NewFilteredDynamicSharedInformerFactory(k8sDynamicClient, time.Minute, namespace, nil)
 	informer := factory.ForResource(resource).Informer()
 	lister := factory.ForResource(resource).Lister()
-	res = &Cache{informer: informer, lister: lister, namespace: namespace, userIDLabel: config.UserIDLabel}
-	return
+	return newCache(informer, lister, namespace, config.UserIDLabel)
 }
@@ -3,9 +3,12 @@ package main
 import (
 	"context"
 	"log"
+	"strconv"
+	"sync"
 	"time"
 
 	k8sErrors "k8s.io/apimachinery/pkg/api/errors"
+	"k8s.io/apimachinery/pkg/api/meta"
 	"k8s.io/apimachinery/pkg/runtime"
 )
 
@@ -135,6 +138,66 @@ func (c CacheCollection) getByName(name string) (res []runtime.Object, err error
 	return res, nil
 }
 
+// waitForName looks for a specific resource by its name like getByName but if the resource is not in
+// the cache yet, or its resource version is lower than minResourceVersion, it waits for the cache to
+// catch up. The cache is checked again every time the informers add or update a resource. Whatever is
+// in the cache is returned when the timeout expires. Since this only checks the local informer cache it
+// does not put any load on the k8s API.
+func (c CacheCollection) waitForName(ctx context.Context, name string, minResourceVersion uint64, timeout time.Duration) (res []runtime.Object, err error) {
+	ctx, cancel := context.WithTimeout(ctx, timeout)
+	defer cancel()
+	for {
+		changesCtx, stopChanges := context.WithCancel(ctx)
+		changed := c.changes(changesCtx)
+		res, err = c.getByName(name)
+		if err != nil || (len(res) > 0 && hasResourceVersionAtLeast(res[0], minResourceVersion)) {
+			stopChanges()
+			return
+		}
+		select {
+		case <-ctx.Done():
+			stopChanges()
+			return res, nil
+		case <-changed:
+			stopChanges()
+		}
+	}
+}
+
+// changes returns a channel that is closed the next time a resource is added or updated in any
+// of the caches. The goroutines that watch the caches stop when the context is done.
+func (c CacheCollection) changes(ctx context.Context) <-chan struct{} {
+	changed := make(chan struct{})
+	var once sync.Once
+	for _, cache := range c {
+		go func(cacheChanged <-chan struct{}) {
+			select {
+			case <-cacheChanged:
+				once.Do(func() { close(changed) })
+			case <-ctx.Done():
+			}
+		}(cache.changes())
+	}
+	return changed
+}
+
+// hasResourceVersionAtLeast checks if the resource version of an object is at least the
+// provided value. The k8s API generates resource versions as integers.
+func hasResourceVersionAtLeast(obj runtime.Object, minResourceVersion uint64) bool {
+	if minResourceVersion == 0 {
+		return true
+	}
+	accessor, err := meta.Accessor(obj)
+	if err != nil {
+		return true
+	}
+	resourceVersion, err := strconv.ParseUint(accessor.GetResourceVersion(), 10, 64)
+	if err != nil {
+		return true
+	}
+	return resourceVersion >= minResourceVersion
+}
+
 // NewJupyterServerCacheCollectionFromConfigOrDie generates a new cache map from a configuration. If it cannot
 // do this successfully it will terminate the program because the server cannot run at all if this
 // step fails in any way and the program cannot recover from errors that occur here.
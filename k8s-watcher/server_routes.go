@@ -1,11 +1,18 @@
 package main
 
 import (
+	"fmt"
 	"net/http"
+	"strconv"
+	"time"
 
 	"github.com/julienschmidt/httprouter"
+	"k8s.io/apimachinery/pkg/runtime"
 )
 
+// maxWaitDuration is the longest time a request can ask the server to wait for a resource.
+const maxWaitDuration = 30 * time.Second
+
 // routers registers the handlers for all http endpoints the server supports.
 func (s *Server) registerRoutes() {
 	s.router.HandlerFunc("GET", "/health", s.handleHealthCheck)
@@ -38,10 +45,44 @@ func (s *Server) jsGetAll(w http.ResponseWriter, req *http.Request) {
 
 func (s *Server) jsGetOne(w http.ResponseWriter, req *http.Request) {
 	params := httprouter.ParamsFromContext(req.Context())
-	output, err := s.cachesJS.getByName(params.ByName("serverID"))
+	wait, minResourceVersion, err := parseWaitParams(req)
+	if err != nil {
+		http.Error(w, fmt.Sprintf("invalid query parameters: %v", err), http.StatusBadRequest)
+		return
+	}
+	var output []runtime.Object
+	if wait > 0 {
+		output, err = s.cachesJS.waitForName(req.Context(), params.ByName("serverID"), minResourceVersion, wait)
+	} else {
+		output, err = s.cachesJS.getByName(params.ByName("serverID"))
+	}
 	s.respond(w, req, output, err)
 }
 
+// parseWaitParams reads the optional waitSeconds and minResourceVersion query parameters
+// which let a client wait for a resource to show up in the cache.
+func parseWaitParams(req *http.Request) (wait time.Duration, minResourceVersion uint64, err error) {
+	query := req.URL.Query()
+	if waitSeconds := query.Get("waitSeconds"); waitSeconds != "" {
+		var seconds float64
+		seconds, err = strconv.ParseFloat(waitSeconds, 64)
+		if err != nil || seconds < 0 {
+			return 0, 0, fmt.Errorf("waitSeconds has to be a positive number, got %s", waitSeconds)
+		}
+		wait = time.Duration(seconds * float64(time.Second))
+		if wait > maxWaitDuration {
+			wait = maxWaitDuration
+		}
+	}
+	if resourceVersion := query.Get("minResourceVersion"); resourceVersion != "" {
+		minResourceVersion, err = strconv.ParseUint(resourceVersion, 10, 64)
+		if err != nil {
+			return 0, 0, fmt.Errorf("minResourceVersion has to be an integer, got %s", resourceVersion)
+		}
+	}
+	return wait, minResourceVersion, nil
+}
+
 func (s *Server) jsUserID(w http.ResponseWriter, req *http.Request) {
 	params := httprouter.ParamsFromContext(req.Context())
 	output, err := s.cachesJS.getByUserID(params.ByName("userID"))
@@ -30,6 +30,7 @@ from flask import Blueprint, Flask, jsonify
 from .api.notebooks import (
     check_docker_image,
     launch_notebook,
+    launch_operation,
     patch_server,
     server_logs,
     server_options,
@@ -39,6 +40,7 @@ from .api.notebooks import (
 )
 from .api.schemas.config_server_options import ServerOptionsEndpointResponse
 from .api.schemas.errors import ErrorResponse
+from .api.schemas.launch_operations import LaunchOperationResponse
 from .api.schemas.logs import ServerLogs
 from .api.schemas.servers_get import NotebookResponse, ServersGetRequest, ServersGetResponse
 from .api.schemas.servers_patch import PatchServerRequest
@@ -142,11 +144,13 @@ def register_swagger(app):
     spec.components.schema("ServerOptionsEndpointResponse", schema=ServerOptionsEndpointResponse)
     spec.components.schema("VersionResponse", schema=VersionResponse)
     spec.components.schema("ErrorResponse", schema=ErrorResponse)
+    spec.components.schema("LaunchOperationResponse", schema=LaunchOperationResponse)
     # Register endpoints
     with app.test_request_context():
         spec.path(view=user_server)
         spec.path(view=user_servers)
         spec.path(view=launch_notebook)
+        spec.path(view=launch_operation)
         spec.path(view=patch_server)
         spec.path(view=stop_server)
         spec.path(view=server_options)
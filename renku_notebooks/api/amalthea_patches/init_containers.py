@@ -7,7 +7,7 @@ from typing import TYPE_CHECKING
 from kubernetes import client
 
 from ...config import config
-from .utils import get_certificates_volume_mounts
+from .utils import get_certificates_volume_mounts, sanitize_for_serialization, static_patches
 
 if TYPE_CHECKING:
     from renku_notebooks.api.classes.server import UserServer
@@ -136,6 +136,7 @@ def git_clone(server: "UserServer"):
     ]
 
 
+@static_patches
 def certificates():
     init_container = client.V1Container(
         name="init-certificates",
@@ -164,7 +165,6 @@ def certificates():
             ],
         ),
     )
-    api_client = client.ApiClient()
     patches = [
         {
             "type": "application/json-patch+json",
@@ -172,7 +172,7 @@ def certificates():
                 {
                     "op": "add",
                     "path": "/statefulset/spec/template/spec/initContainers/-",
-                    "value": api_client.sanitize_for_serialization(init_container),
+                    "value": sanitize_for_serialization(init_container),
                 },
             ],
         },
@@ -182,7 +182,7 @@ def certificates():
                 {
                     "op": "add",
                     "path": "/statefulset/spec/template/spec/volumes/-",
-                    "value": api_client.sanitize_for_serialization(volume_etc_certs),
+                    "value": sanitize_for_serialization(volume_etc_certs),
                 },
             ],
         },
@@ -192,7 +192,7 @@ def certificates():
                 {
                     "op": "add",
                     "path": "/statefulset/spec/template/spec/volumes/-",
-                    "value": api_client.sanitize_for_serialization(volume_custom_certs),
+                    "value": sanitize_for_serialization(volume_custom_certs),
                 },
             ],
         },
@@ -201,19 +201,6 @@ def certificates():
 
 
 def download_image(server: "UserServer"):
-    container = client.V1Container(
-        name="download-image",
-        image=server.image,
-        command=["sh", "-c"],
-        args=["exit", "0"],
-        resources={
-            "requests": {
-                "cpu": "50m",
-                "memory": "50Mi",
-            }
-        },
-    )
-    api_client = client.ApiClient()
     return [
         {
             "type": "application/json-patch+json",
@@ -221,7 +208,18 @@ def download_image(server: "UserServer"):
                 {
                     "op": "add",
                     "path": "/statefulset/spec/template/spec/initContainers/-",
-                    "value": api_client.sanitize_for_serialization(container),
+                    "value": {
+                        "name": "download-image",
+                        "image": server.image,
+                        "command": ["sh", "-c"],
+                        "args": ["exit", "0"],
+                        "resources": {
+                            "requests": {
+                                "cpu": "50m",
+                                "memory": "50Mi",
+                            }
+                        },
+                    },
                 },
             ],
         },
@@ -8,6 +8,8 @@ from kubernetes import client
 from renku_notebooks.config import config
 from renku_notebooks.errors.user import OverriddenEnvironmentVariableError
 
+from .utils import sanitize_for_serialization, static_patches
+
 if TYPE_CHECKING:
     from renku_notebooks.api.classes.server import UserServer
 
@@ -85,6 +87,7 @@ def env(server: "UserServer"):
     return patches
 
 
+@static_patches
 def args():
     patches = []
     patches.append(
@@ -153,6 +156,7 @@ def image_pull_secret(server: "UserServer"):
     return patches
 
 
+@static_patches
 def disable_service_links():
     return [
         {
@@ -264,8 +268,6 @@ def user_secrets(server: "UserServer") -> list[dict[str, Any]]:
         },
     )
 
-    api_client = client.ApiClient()
-
     # Add init container
     patch_list.append(
         {
@@ -274,7 +276,7 @@ def user_secrets(server: "UserServer") -> list[dict[str, Any]]:
                 {
                     "op": "add",
                     "path": "/statefulset/spec/template/spec/initContainers/-",
-                    "value": api_client.sanitize_for_serialization(init_container),
+                    "value": sanitize_for_serialization(init_container),
                 },
             ],
         }
@@ -288,12 +290,12 @@ def user_secrets(server: "UserServer") -> list[dict[str, Any]]:
                 {
                     "op": "add",
                     "path": "/statefulset/spec/template/spec/volumes/-",
-                    "value": api_client.sanitize_for_serialization(volume_decrypted_secrets),
+                    "value": sanitize_for_serialization(volume_decrypted_secrets),
                 },
                 {
                     "op": "add",
                     "path": "/statefulset/spec/template/spec/volumes/-",
-                    "value": api_client.sanitize_for_serialization(volume_k8s_secret),
+                    "value": sanitize_for_serialization(volume_k8s_secret),
                 },
             ],
         }
@@ -308,7 +310,7 @@ def user_secrets(server: "UserServer") -> list[dict[str, Any]]:
                 {
                     "op": "add",
                     "path": "/statefulset/spec/template/spec/containers/0/volumeMounts/-",
-                    "value": api_client.sanitize_for_serialization(decrypted_volume_mount),
+                    "value": sanitize_for_serialization(decrypted_volume_mount),
                 },
             ],
         }
@@ -1,8 +1,10 @@
 from typing import Any
 
 from ...config import config
+from .utils import static_patches
 
 
+@static_patches
 def main() -> list[dict[str, Any]]:
     if not config.sessions.ssh.enabled:
         return []
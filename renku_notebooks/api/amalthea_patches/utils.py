@@ -1,8 +1,54 @@
+from collections.abc import Callable
+from functools import cache, wraps
+from typing import Any, TypeVar
+
 from kubernetes import client
 
 from ...config import config
 
+T = TypeVar("T")
+
+
+@cache
+def _get_api_client() -> client.ApiClient:
+    return client.ApiClient()
+
+
+def sanitize_for_serialization(obj: Any) -> Any:
+    """Convert kubernetes models to plain dictionaries and lists.
+
+    Creating an ApiClient sets up a configuration and a connection pool, so one client is shared
+    instead of creating a new one just to serialize the models of a patch.
+    """
+    return _get_api_client().sanitize_for_serialization(obj)
+
+
+def _copy(value: Any) -> Any:
+    """A copy of JSON like data that is much cheaper than copy.deepcopy."""
+    if isinstance(value, dict):
+        return {key: _copy(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy(item) for item in value]
+    return value
+
+
+def static_patches(func: Callable[..., T]) -> Callable[..., T]:
+    """Build patches that only depend on the configuration once and return a copy on every call.
+
+    The built patches are never handed out, so callers can change the returned patches without
+    affecting other sessions. Use cache_clear on the decorated function to build them again.
+    """
+    cached_func = cache(func)
+
+    @wraps(func)
+    def _wrapper(*args, **kwargs) -> T:
+        return _copy(cached_func(*args, **kwargs))
+
+    _wrapper.cache_clear = cached_func.cache_clear  # type: ignore[attr-defined]
+    return _wrapper
+
 
+@static_patches
 def get_certificates_volume_mounts(
     etc_certs: bool = True,
     custom_certs: bool = True,
@@ -23,4 +69,4 @@ def get_certificates_volume_mounts(
         volume_mounts.append(etc_ssl_certs)
     if custom_certs:
         volume_mounts.append(custom_ca_certs)
-    return client.ApiClient().sanitize_for_serialization(volume_mounts)
+    return sanitize_for_serialization(volume_mounts)
@@ -1,4 +1,7 @@
+import hashlib
+import json
 from dataclasses import dataclass, field
+from functools import partial
 from typing import Any, NamedTuple, Optional
 from urllib.parse import urljoin, urlparse
 
@@ -14,6 +17,9 @@ from renku_notebooks.errors.user import (
     MissingResourceError,
 )
 
+from ...util.caching import TTLCache
+from ...util.concurrency import run_concurrently
+from ...util.http import TimeoutSession, pooled_session
 from ..schemas.server_options import ServerOptions
 from .repository import INTERNAL_GITLAB_PROVIDER, GitProvider, OAuth2Connection, OAuth2Provider
 from .user import User
@@ -30,10 +36,21 @@ class CloudStorageConfig(NamedTuple):
 
 @dataclass
 class StorageValidator:
+    """Calls to the data service to load and validate cloud storage.
+
+    Successful validations are cached for validation_cache_seconds by a hash of the configuration.
+    """
+
     data_service_url: str
+    validation_cache_seconds: float = 600
+    pool_size: int = 10
+    _session: TimeoutSession = field(init=False, repr=False)
+    _validation_cache: TTLCache[str, bool] = field(init=False, repr=False)
 
     def __post_init__(self):
         self.data_service_url = self.data_service_url.rstrip("/")
+        self._session = pooled_session(pool_size=self.pool_size)
+        self._validation_cache = TTLCache(ttl_seconds=self.validation_cache_seconds)
 
     def get_storage_by_id(self, user: User, endpoint: str, storage_id: str) -> CloudStorageConfig:
         headers = None
@@ -47,7 +64,7 @@ class StorageValidator:
         if endpoint == "data_connectors":
             return self._get_data_connector_by_id(user, storage_id, request_url, headers)
         current_app.logger.info(f"getting storage info by id: {request_url}")
-        res = requests.get(request_url, headers=headers)
+        res = self._session.get(request_url, headers=headers)
         if res.status_code == 404:
             raise MissingResourceError(message=f"Couldn't find cloud storage with id {storage_id}")
         if res.status_code == 401:
@@ -73,22 +90,22 @@ class StorageValidator:
     ) -> CloudStorageConfig:
         """Returns the storage configuration for a data connector."""
         current_app.logger.info(f"getting data connector info by id: {request_url}")
-        res = requests.get(request_url, headers=headers)
-        if res.status_code == 404:
-            raise MissingResourceError(message=f"Couldn't find data connector with id {data_connector_id}")
-        if res.status_code == 401 or res.status_code == 403:
-            raise AuthenticationError("User is not authorized to access this data connector.")
-        if res.status_code != 200:
-            raise IntermittentError(
-                message="The data service sent an unexpected response, please try again later",
-            )
-        data_connector = res.json()
-        storage = data_connector["storage"]
-        secrets = {}
-        # Get secrets only for authenticated users
-        if user is not None and headers is not None:
+
+        def _get_data_connector() -> dict[str, Any]:
+            res = self._session.get(request_url, headers=headers)
+            if res.status_code == 404:
+                raise MissingResourceError(message=f"Couldn't find data connector with id {data_connector_id}")
+            if res.status_code == 401 or res.status_code == 403:
+                raise AuthenticationError("User is not authorized to access this data connector.")
+            if res.status_code != 200:
+                raise IntermittentError(
+                    message="The data service sent an unexpected response, please try again later",
+                )
+            return res.json()
+
+        def _get_secrets() -> dict[str, str]:
             request_url_secrets = request_url + "/secrets"
-            res = requests.get(request_url_secrets, headers=headers)
+            res = self._session.get(request_url_secrets, headers=headers)
             if res.status_code == 404:
                 raise MissingResourceError(
                     message=f"Couldn't find secrets for data connector with id {data_connector_id}"
@@ -100,7 +117,14 @@ class StorageValidator:
                     message="The data service sent an unexpected response, please try again later",
                 )
             response = res.json()
-            secrets = {s["secret_id"]: s["name"] for s in response}
+            return {s["secret_id"]: s["name"] for s in response}
+
+        # Get secrets only for authenticated users
+        if user is not None and headers is not None:
+            data_connector, secrets = run_concurrently(_get_data_connector, _get_secrets)
+        else:
+            data_connector, secrets = _get_data_connector(), {}
+        storage = data_connector["storage"]
         return CloudStorageConfig(
             config=storage["configuration"],
             source_path=storage["source_path"],
@@ -111,7 +135,10 @@ class StorageValidator:
         )
 
     def validate_storage_configuration(self, configuration: dict[str, Any], source_path: str) -> None:
-        res = requests.post(self.data_service_url + "/storage_schema/validate", json=configuration)
+        cache_key = hashlib.sha256(json.dumps(configuration, sort_keys=True, default=str).encode()).hexdigest()
+        if self._validation_cache.get(cache_key, False):
+            return
+        res = self._session.post(self.data_service_url + "/storage_schema/validate", json=configuration)
         if res.status_code == 422:
             raise InvalidCloudStorageConfiguration(
                 message=f"The provided cloud storage configuration isn't valid: {res.json()}",
@@ -120,10 +147,11 @@ class StorageValidator:
             raise IntermittentError(
                 message="The data service sent an unexpected response, please try again later",
             )
+        self._validation_cache.set(cache_key, True)
 
     def obscure_password_fields_for_storage(self, configuration: dict[str, Any]) -> dict[str, Any]:
         """Obscures password fields for use with rclone."""
-        res = requests.post(self.data_service_url + "/storage_schema/obscure", json=configuration)
+        res = self._session.post(self.data_service_url + "/storage_schema/obscure", json=configuration)
 
         if res.status_code != 200:
             raise InvalidCloudStorageConfiguration(
@@ -142,14 +170,59 @@ class DummyStorageValidator:
         raise NotImplementedError()
 
 
+RESOURCE_POOLS_CACHE_SIZE = 1024
+
+
+@dataclass
+class _ResourcePools:
+    """The resource pools available to a user with their classes indexed by ID."""
+
+    pools: list[dict[str, Any]]
+    classes_by_id: dict[int, tuple[dict[str, Any], dict[str, Any]]]
+    default_class: Optional[dict[str, Any]]
+    # NOTE: The cpu, memory, gpu and storage (in bytes) of the matching classes followed by their
+    # pool and class, in the order in which they are returned by the data service
+    matching_class_sizes: list[tuple[float, int, int, int, dict[str, Any], dict[str, Any]]]
+
+    @classmethod
+    def from_response(cls, pools: list[dict[str, Any]]) -> "_ResourcePools":
+        classes_by_id: dict[int, tuple[dict[str, Any], dict[str, Any]]] = {}
+        matching_class_sizes = []
+        for pool in pools:
+            for res_class in pool.get("classes", []):
+                classes_by_id.setdefault(res_class["id"], (pool, res_class))
+                if res_class.get("matching"):
+                    matching_class_sizes.append(
+                        (
+                            res_class["cpu"],
+                            res_class["memory"] * 1_000_000_000,
+                            res_class["gpu"],
+                            res_class["default_storage"] * 1_000_000_000,
+                            pool,
+                            res_class,
+                        )
+                    )
+        default_pool = next((p for p in pools if p.get("default", False)), None)
+        default_class = None
+        if default_pool is not None:
+            default_class = next((c for c in default_pool.get("classes", []) if c.get("default", False)), None)
+        return cls(pools, classes_by_id, default_class, matching_class_sizes)
+
+
 @dataclass
 class CRCValidator:
-    """Calls to the CRC service to validate resource requests."""
+    """Calls to the CRC service to validate resource requests.
+
+    The resource pools are cached for pools_cache_seconds for each user and kind of request.
+    """
 
     crc_url: str
+    pools_cache_seconds: float = 30
+    _pools_cache: TTLCache[tuple[Any, ...], _ResourcePools] = field(init=False, repr=False)
 
     def __post_init__(self):
         self.crc_url = self.crc_url.rstrip("/")
+        self._pools_cache = TTLCache(maxsize=RESOURCE_POOLS_CACHE_SIZE, ttl_seconds=self.pools_cache_seconds)
 
     def validate_class_storage(
         self,
@@ -161,17 +234,14 @@ class CRCValidator:
 
         Storage in memory are assumed to be in gigabytes.
         """
-        resource_pools = self._get_resource_pools(user=user)
-        pool = None
-        res_class = None
-        for rp in resource_pools:
-            for cls in rp["classes"]:
-                if cls["id"] == class_id:
-                    res_class = cls
-                    pool = rp
-                    break
-        if res_class is None:
+        match = self._get_indexed_resource_pools(user=user).classes_by_id.get(class_id)
+        if match is None:
+            # NOTE: The class could have been created after the resource pools were cached
+            self._invalidate_resource_pools(user=user)
+            match = self._get_indexed_resource_pools(user=user).classes_by_id.get(class_id)
+        if match is None:
             raise InvalidComputeResourceError(message=f"The resource class ID {class_id} does not exist.")
+        pool, res_class = match
         if storage is None:
             storage = res_class.get("default_storage", 1)
         if storage < 1:
@@ -188,48 +258,54 @@ class CRCValidator:
         return options
 
     def get_default_class(self) -> dict[str, Any]:
-        pools = self._get_resource_pools()
-        default_pools = [p for p in pools if p.get("default", False)]
-        if len(default_pools) < 1:
-            raise ConfigurationError("Cannot find the default resource pool.")
-        default_pool = default_pools[0]
-        default_classes = [cls for cls in default_pool.get("classes", []) if cls.get("default", False)]
-        if len(default_classes) < 1:
+        resource_pools = self._get_indexed_resource_pools()
+        if resource_pools.default_class is None:
+            # NOTE: The default class could have been set after the resource pools were cached
+            self._invalidate_resource_pools()
+            resource_pools = self._get_indexed_resource_pools()
+        if resource_pools.default_class is None:
+            if not any(p.get("default", False) for p in resource_pools.pools):
+                raise ConfigurationError("Cannot find the default resource pool.")
             raise ConfigurationError("Cannot find the default resource class.")
-        return default_classes[0]
+        return resource_pools.default_class
 
     def find_acceptable_class(self, user: User, requested_server_options: ServerOptions) -> Optional[ServerOptions]:
         """Find a resource class greater than or equal to the old-style server options being requested.
 
         Only classes available to the user are considered.
         """
-        resource_pools = self._get_resource_pools(user=user, server_options=requested_server_options)
-        # Difference and best candidate in the case that the resource class will be
-        # greater than or equal to the request
-        best_larger_or_equal_diff = None
-        best_larger_or_equal_class = None
-        zero_diff = ServerOptions(cpu=0, memory=0, gpu=0, storage=0, priority_class=resource_pools)
-        for resource_pool in resource_pools:
-            quota = resource_pool.get("quota")
-            for resource_class in resource_pool["classes"]:
-                resource_class_mdl = ServerOptions.from_resource_class(resource_class)
-                if quota is not None and isinstance(quota, dict):
-                    resource_class_mdl.priority_class = quota.get("id")
-                diff = resource_class_mdl - requested_server_options
-                if (
-                    diff >= zero_diff
-                    and (best_larger_or_equal_diff is None or diff < best_larger_or_equal_diff)
-                    and resource_class["matching"]
-                ):
-                    best_larger_or_equal_diff = diff
-                    best_larger_or_equal_class = resource_class_mdl
-        return best_larger_or_equal_class
-
-    def _get_resource_pools(
+        resource_pools = self._get_indexed_resource_pools(user=user, server_options=requested_server_options)
+        cpu = requested_server_options.cpu
+        memory = requested_server_options.memory
+        gpu = requested_server_options.gpu
+        storage = requested_server_options.storage or 0
+        # NOTE: A class replaces the best candidate only if it is smaller in every dimension,
+        # so the candidates are checked in the order in which the data service returned them
+        best = None
+        for candidate in resource_pools.matching_class_sizes:
+            class_cpu, class_memory, class_gpu, class_storage, _, _ = candidate
+            is_larger_or_equal = (
+                class_cpu >= cpu and class_memory >= memory and class_gpu >= gpu and class_storage >= storage
+            )
+            if is_larger_or_equal and (
+                best is None
+                or (class_cpu < best[0] and class_memory < best[1] and class_gpu < best[2] and class_storage < best[3])
+            ):
+                best = candidate
+        if best is None:
+            return None
+        *_, pool, resource_class = best
+        options = ServerOptions.from_resource_class(resource_class)
+        quota = pool.get("quota")
+        if quota is not None and isinstance(quota, dict):
+            options.priority_class = quota.get("id")
+        return options
+
+    def _get_indexed_resource_pools(
         self,
         user: Optional[User] = None,
         server_options: Optional[ServerOptions] = None,
-    ) -> list[dict[str, Any]]:
+    ) -> _ResourcePools:
         headers = None
         params = None
         if user is not None and user.access_token is not None:
@@ -247,13 +323,28 @@ class CRCValidator:
                     else round(server_options.storage / 1_000_000_000)
                 ),
             }
-        res = requests.get(self.crc_url + "/resource_pools", headers=headers, params=params)
-        if res.status_code != 200:
-            raise IntermittentError(
-                message="The compute resource access control service sent "
-                "an unexpected response, please try again later",
-            )
-        return res.json()
+
+        def _load() -> _ResourcePools:
+            res = requests.get(self.crc_url + "/resource_pools", headers=headers, params=params)
+            if res.status_code != 200:
+                raise IntermittentError(
+                    message="The compute resource access control service sent "
+                    "an unexpected response, please try again later",
+                )
+            return _ResourcePools.from_response(res.json())
+
+        return self._pools_cache.get_or_load(self._pools_cache_key(user, params), _load)
+
+    def _invalidate_resource_pools(self, user: Optional[User] = None):
+        self._pools_cache.pop(self._pools_cache_key(user, None))
+
+    @staticmethod
+    def _pools_cache_key(user: Optional[User], params: Optional[dict[str, Any]]) -> tuple[Any, ...]:
+        # NOTE: The pools and the classes that match a request depend on the access of the user
+        token_hash = None
+        if user is not None and user.access_token is not None:
+            token_hash = hashlib.sha256(user.access_token.encode()).hexdigest()
+        return (token_hash, tuple(sorted(params.items())) if params is not None else None)
 
 
 @dataclass
@@ -281,37 +372,50 @@ class DummyCRCValidator:
 
 @dataclass
 class GitProviderHelper:
-    """Calls to the data service to configure git providers."""
+    """Calls to the data service to configure git providers.
+
+    The OAuth2 providers are the same for all users and they are cached for providers_cache_seconds.
+    The connections of each user are cached for connections_cache_seconds.
+    """
 
     service_url: str
     renku_url: str
     internal_gitlab_url: str
+    providers_cache_seconds: float = 300
+    connections_cache_seconds: float = 10
+    _providers_cache: TTLCache[str, OAuth2Provider] = field(init=False, repr=False)
+    _connections_cache: TTLCache[str, list[OAuth2Connection]] = field(init=False, repr=False)
 
     def __post_init__(self):
         self.service_url = self.service_url.rstrip("/")
         self.renku_url = self.renku_url.rstrip("/")
+        self._providers_cache = TTLCache(ttl_seconds=self.providers_cache_seconds)
+        self._connections_cache = TTLCache(ttl_seconds=self.connections_cache_seconds)
 
     def get_providers(self, user: User) -> list[GitProvider]:
         if user is None or user.access_token is None:
             return []
-        connections = self.get_oauth2_connections(user=user)
-        providers: dict[str, GitProvider] = dict()
-        for c in connections:
-            if c.provider_id in providers:
-                continue
-            provider = self.get_oauth2_provider(c.provider_id)
+        connections: dict[str, OAuth2Connection] = dict()
+        for c in self.get_oauth2_connections(user=user):
+            connections.setdefault(c.provider_id, c)
+        oauth2_providers = run_concurrently(
+            *[partial(self.get_oauth2_provider, provider_id) for provider_id in connections]
+        )
+        providers_list: list[GitProvider] = []
+        for c, provider in zip(connections.values(), oauth2_providers):
             access_token_url = urljoin(
                 self.renku_url,
                 urlparse(f"{self.service_url}/oauth2/connections/{c.id}/token").path,
             )
-            providers[c.provider_id] = GitProvider(
-                id=c.provider_id,
-                url=provider.url,
-                connection_id=c.id,
-                access_token_url=access_token_url,
+            providers_list.append(
+                GitProvider(
+                    id=c.provider_id,
+                    url=provider.url,
+                    connection_id=c.id,
+                    access_token_url=access_token_url,
+                )
             )
 
-        providers_list = list(providers.values())
         # Insert the internal GitLab as the first provider
         internal_gitlab_access_token_url = urljoin(self.renku_url, "/api/auth/gitlab/exchange")
         providers_list.insert(
@@ -328,22 +432,30 @@ class GitProviderHelper:
     def get_oauth2_connections(self, user: User | None = None) -> list[OAuth2Connection]:
         if user is None or user.access_token is None:
             return []
-        request_url = f"{self.service_url}/oauth2/connections"
-        headers = {"Authorization": f"bearer {user.access_token}"}
-        res = requests.get(request_url, headers=headers)
-        if res.status_code != 200:
-            raise IntermittentError(message="The data service sent an unexpected response, please try again later")
-        connections = res.json()
-        connections = [OAuth2Connection.from_dict(c) for c in connections if c["status"] == "connected"]
-        return connections
+        access_token = user.access_token
+
+        def _load() -> list[OAuth2Connection]:
+            request_url = f"{self.service_url}/oauth2/connections"
+            headers = {"Authorization": f"bearer {access_token}"}
+            res = requests.get(request_url, headers=headers)
+            if res.status_code != 200:
+                raise IntermittentError(message="The data service sent an unexpected response, please try again later")
+            connections = res.json()
+            return [OAuth2Connection.from_dict(c) for c in connections if c["status"] == "connected"]
+
+        cache_key = hashlib.sha256(access_token.encode()).hexdigest()
+        return list(self._connections_cache.get_or_load(cache_key, _load))
 
     def get_oauth2_provider(self, provider_id: str) -> OAuth2Provider:
-        request_url = f"{self.service_url}/oauth2/providers/{provider_id}"
-        res = requests.get(request_url)
-        if res.status_code != 200:
-            raise IntermittentError(message="The data service sent an unexpected response, please try again later")
-        provider = res.json()
-        return OAuth2Provider.from_dict(provider)
+        def _load() -> OAuth2Provider:
+            request_url = f"{self.service_url}/oauth2/providers/{provider_id}"
+            res = requests.get(request_url)
+            if res.status_code != 200:
+                raise IntermittentError(message="The data service sent an unexpected response, please try again later")
+            provider = res.json()
+            return OAuth2Provider.from_dict(provider)
+
+        return self._providers_cache.get_or_load(provider_id, _load)
 
 
 @dataclass
@@ -1,9 +1,11 @@
 """Used to get information about docker images used in jupyter servers."""
 
 import base64
+import hashlib
 import re
 from dataclasses import dataclass, field
 from enum import Enum
+from functools import partial
 from pathlib import Path
 from typing import Any, Optional, Self, cast
 
@@ -11,6 +13,7 @@ import requests
 from werkzeug.datastructures import WWWAuthenticate
 
 from ...errors.user import ImageParseError
+from ...util.caching import TTLCache
 
 
 class ManifestTypes(Enum):
@@ -22,9 +25,40 @@ class ManifestTypes(Enum):
     oci_v1_index: str = "application/vnd.oci.image.index.v1+json"
 
 
+MANIFEST_TYPES = [ManifestTypes.docker_v2.value, ManifestTypes.oci_v1_manifest.value]
+INDEX_TYPES = [ManifestTypes.docker_v2_list.value, ManifestTypes.oci_v1_index.value]
+MANIFEST_ACCEPT = ", ".join(MANIFEST_TYPES)
+# NOTE: Single platform manifests are preferred because they need no second request
+MANIFEST_OR_INDEX_ACCEPT = ", ".join(MANIFEST_TYPES + [f"{media_type};q=0.9" for media_type in INDEX_TYPES])
+
 DEFAULT_PLATFORM_ARCHITECTURE = "amd64"
 DEFAULT_PLATFORM_OS = "linux"
 
+IMAGE_CACHE_SIZE = 1024
+MUTABLE_TAG_TTL_SECONDS = 300
+DIGEST_TTL_SECONDS = 24 * 60 * 60
+NOT_FOUND_TTL_SECONDS = 30
+CHALLENGE_TTL_SECONDS = 60 * 60
+TOKEN_EXPIRY_MARGIN_SECONDS = 10
+
+# NOTE: Manifests and configs are shared by all requests in the process and must not be modified
+_image_cache: TTLCache[tuple[Optional[str], ...], Any] = TTLCache(maxsize=IMAGE_CACHE_SIZE)
+_auth_cache: TTLCache[tuple[Optional[str], ...], Any] = TTLCache(maxsize=IMAGE_CACHE_SIZE)
+# NOTE: The result of a registry request that failed for another reason than a missing image, for
+# example an expired token or an unavailable registry. It is treated as missing but not cached.
+_UNAVAILABLE = object()
+
+
+def _image_cache_ttl(reference: str, value: Any) -> float:
+    """How long to cache a manifest or config, content referenced by a digest never changes."""
+    if value is _UNAVAILABLE:
+        return 0
+    if value is None or value is False:
+        return NOT_FOUND_TTL_SECONDS
+    if reference.startswith("sha256:"):
+        return DIGEST_TTL_SECONDS
+    return MUTABLE_TAG_TTL_SECONDS
+
 
 @dataclass
 class ImageRepoDockerAPI:
@@ -36,11 +70,44 @@ class ImageRepoDockerAPI:
     hostname: str
     oauth2_token: Optional[str] = field(default=None, repr=False)
 
+    @property
+    def _auth_scope(self) -> Optional[str]:
+        """Identifies the credentials used for the registry without keeping the token itself."""
+        if not self.oauth2_token:
+            return None
+        return hashlib.sha256(self.oauth2_token.encode()).hexdigest()
+
     def _get_docker_token(self, image: "Image") -> Optional[str]:
         """Get an authorization token from the docker v2 API.
 
         This will return the token provided by the API (or None if no token was found).
+        The challenge of the registry and the tokens are cached so that the authentication
+        requests are only repeated when the token expires. A missing challenge is not cached since
+        it can be caused by a failed request or by a repository that allows anonymous pulls while
+        other repositories on the same registry require a token.
         """
+        challenge = _auth_cache.get_or_load(
+            ("challenge", self.hostname),
+            partial(self._get_auth_challenge, image),
+            ttl_seconds=lambda challenge: CHALLENGE_TTL_SECONDS if challenge else 0,
+        )
+        if not challenge:
+            return None
+        params = {**challenge}
+        realm = params.pop("realm")
+        if "scope" in params:
+            # NOTE: The challenge is cached per registry but the scope is specific to the repository
+            params["scope"] = f"repository:{image.name}:pull"
+        key = ("token", realm, params.get("service"), params.get("scope"), self._auth_scope)
+        token, _ = _auth_cache.get_or_load(
+            key,
+            partial(self._request_docker_token, realm, params),
+            ttl_seconds=lambda result: result[1],
+        )
+        return token
+
+    def _get_auth_challenge(self, image: "Image") -> Optional[dict[str, str]]:
+        """Get the parameters of the bearer authentication challenge of the registry, if there is one."""
         image_digest_url = f"https://{self.hostname}/v2/{image.name}/manifests/{image.tag}"
         try:
             auth_req = requests.get(image_digest_url)
@@ -53,24 +120,32 @@ class ImageRepoDockerAPI:
         if not www_auth:
             return None
         params = {**www_auth.parameters}
-        realm = params.pop("realm")
-        if not realm:
+        if not params.get("realm"):
             return None
+        return params
+
+    def _request_docker_token(self, realm: str, params: dict[str, str]) -> tuple[Optional[str], float]:
+        """Request a token and return it with the number of seconds it can be cached for."""
         headers = {"Accept": "application/json"}
         if self.oauth2_token:
             creds = base64.urlsafe_b64encode(f"oauth2:{self.oauth2_token}".encode()).decode()
             headers["Authorization"] = f"Basic {creds}"
         token_req = requests.get(realm, params=params, headers=headers)
         if token_req.status_code != 200:
-            return None
+            return None, 0
         try:
             res_dict = token_req.json()
         except requests.JSONDecodeError:
-            return None
+            return None, 0
         token = res_dict.get("token")
         if not token:
-            return None
-        return str(token)
+            return None, 0
+        # NOTE: Registries that do not specify the expiry issue tokens that are valid for 60 seconds
+        try:
+            expires_in = float(res_dict.get("expires_in", 60))
+        except (TypeError, ValueError):
+            expires_in = 60
+        return str(token), max(expires_in - TOKEN_EXPIRY_MARGIN_SECONDS, 0)
 
     def get_image_manifest(
         self,
@@ -78,28 +153,58 @@ class ImageRepoDockerAPI:
         platform_architecture: str = DEFAULT_PLATFORM_ARCHITECTURE,
         platform_os: str = DEFAULT_PLATFORM_OS,
     ) -> Optional[dict[str, Any]]:
-        """Query the docker API to get the manifest of an image."""
+        """Query the docker API to get the manifest of an image.
+
+        The results, including missing images, are cached for a while.
+        """
+        result = self._get_manifest_with_digest(image, platform_architecture, platform_os)
+        return result[0] if result is not None else None
+
+    def _get_manifest_with_digest(
+        self,
+        image: "Image",
+        platform_architecture: str = DEFAULT_PLATFORM_ARCHITECTURE,
+        platform_os: str = DEFAULT_PLATFORM_OS,
+    ) -> Optional[tuple[dict[str, Any], str]]:
+        """Get the manifest of an image for a platform and its digest, using the cache if possible."""
+        result = self._load_manifest_with_digest(image, platform_architecture, platform_os)
+        return None if result is _UNAVAILABLE else result
+
+    def _load_manifest_with_digest(
+        self,
+        image: "Image",
+        platform_architecture: str = DEFAULT_PLATFORM_ARCHITECTURE,
+        platform_os: str = DEFAULT_PLATFORM_OS,
+    ) -> Any:
+        """Like _get_manifest_with_digest but failed requests that were not cached are _UNAVAILABLE."""
         if image.hostname != self.hostname:
             raise ImageParseError(
                 f"The image hostname {image.hostname} does not match " f"the image repository {self.hostname}"
             )
+        key = ("manifest", self.hostname, image.name, image.tag, platform_architecture, platform_os, self._auth_scope)
+        return _image_cache.get_or_load(
+            key,
+            partial(self._get_image_manifest, image, platform_architecture, platform_os),
+            ttl_seconds=partial(_image_cache_ttl, image.tag),
+        )
+
+    def _get_image_manifest(
+        self,
+        image: "Image",
+        platform_architecture: str,
+        platform_os: str,
+    ) -> Any:
         token = self._get_docker_token(image)
         image_digest_url = f"https://{image.hostname}/v2/{image.name}/manifests/{image.tag}"
-        headers = {"Accept": ManifestTypes.docker_v2.value}
+        # NOTE: All the supported types are accepted at once and the response is handled based on its type
+        headers = {"Accept": MANIFEST_OR_INDEX_ACCEPT}
         if token:
             headers["Authorization"] = f"Bearer {token}"
         res = requests.get(image_digest_url, headers=headers)
         if res.status_code != 200:
-            headers["Accept"] = ManifestTypes.oci_v1_manifest.value
-            res = requests.get(image_digest_url, headers=headers)
-        if res.status_code != 200:
-            headers["Accept"] = ManifestTypes.oci_v1_index.value
-            res = requests.get(image_digest_url, headers=headers)
-        if res.status_code != 200:
-            return None
+            return _missing_or_unavailable(res)
 
-        content_type = res.headers.get("Content-Type")
-        if content_type in [ManifestTypes.docker_v2_list.value, ManifestTypes.oci_v1_index.value]:
+        if _media_type(res) in INDEX_TYPES:
             index_parsed = res.json()
 
             def platform_matches(manifest: dict[str, Any]) -> bool:
@@ -112,30 +217,46 @@ class ImageRepoDockerAPI:
                 return None
             image_digest_url = f"https://{image.hostname}/v2/{image.name}/manifests/{image_digest}"
             media_type = manifest.get("mediaType")
-            headers["Accept"] = ManifestTypes.docker_v2.value
-            if media_type in [
-                ManifestTypes.docker_v2.value,
-                ManifestTypes.oci_v1_manifest.value,
-            ]:
-                headers["Accept"] = media_type
+            headers["Accept"] = media_type if media_type in MANIFEST_TYPES else MANIFEST_ACCEPT
             res = requests.get(image_digest_url, headers=headers)
             if res.status_code != 200:
-                headers["Accept"] = ManifestTypes.oci_v1_manifest.value
-                res = requests.get(image_digest_url, headers=headers)
-            if res.status_code != 200:
-                return None
+                return _missing_or_unavailable(res)
 
-        if res.headers.get("Content-Type") not in [
-            ManifestTypes.docker_v2.value,
-            ManifestTypes.oci_v1_manifest.value,
-        ]:
+        if _media_type(res) not in MANIFEST_TYPES:
             return None
 
-        return cast(dict[str, Any], res.json())
+        digest = res.headers.get("Docker-Content-Digest") or f"sha256:{hashlib.sha256(res.content).hexdigest()}"
+        return cast(dict[str, Any], res.json()), digest
 
     def image_exists(self, image: "Image") -> bool:
-        """Check the docker repo API if the image exists."""
-        return self.get_image_manifest(image) is not None
+        """Check the docker repo API if the image exists.
+
+        A HEAD request is enough unless the image is a multi-platform index, then the manifest
+        for the platform has to be read.
+        """
+        if image.hostname != self.hostname:
+            raise ImageParseError(
+                f"The image hostname {image.hostname} does not match " f"the image repository {self.hostname}"
+            )
+        key = ("exists", self.hostname, image.name, image.tag, self._auth_scope)
+        exists = _image_cache.get_or_load(
+            key, partial(self._image_exists, image), ttl_seconds=partial(_image_cache_ttl, image.tag)
+        )
+        return exists is True
+
+    def _image_exists(self, image: "Image") -> Any:
+        token = self._get_docker_token(image)
+        headers = {"Accept": MANIFEST_OR_INDEX_ACCEPT}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        res = requests.head(f"https://{image.hostname}/v2/{image.name}/manifests/{image.tag}", headers=headers)
+        if res.status_code == 200 and _media_type(res) in MANIFEST_TYPES:
+            return True
+        if res.status_code in [200, 405]:
+            # NOTE: The index has to be read, some registries also do not support HEAD requests
+            result = self._load_manifest_with_digest(image)
+            return _UNAVAILABLE if result is _UNAVAILABLE else result is not None
+        return False if _missing_or_unavailable(res) is None else _UNAVAILABLE
 
     def get_image_config(self, image: "Image") -> Optional[dict[str, Any]]:
         """Query the docker API to get the configuration of an image."""
@@ -145,6 +266,18 @@ class ImageRepoDockerAPI:
         config_digest = manifest.get("config", {}).get("digest")
         if config_digest is None:
             return None
+        return self._get_cached_image_config(image, config_digest)
+
+    def _get_cached_image_config(self, image: "Image", config_digest: str) -> Optional[dict[str, Any]]:
+        key = ("config", self.hostname, image.name, config_digest, self._auth_scope)
+        config = _image_cache.get_or_load(
+            key,
+            partial(self._get_image_config, image, config_digest),
+            ttl_seconds=partial(_image_cache_ttl, config_digest),
+        )
+        return None if config is _UNAVAILABLE else config
+
+    def _get_image_config(self, image: "Image", config_digest: str) -> Any:
         token = self._get_docker_token(image)
         res = requests.get(
             f"https://{image.hostname}/v2/{image.name}/blobs/{config_digest}",
@@ -154,21 +287,38 @@ class ImageRepoDockerAPI:
             },
         )
         if res.status_code != 200:
-            return None
+            return _missing_or_unavailable(res)
         return cast(dict[str, Any], res.json())
 
     def image_workdir(self, image: "Image") -> Optional[Path]:
         """Query the docker API to get the workdir of an image."""
-        config = self.get_image_config(image)
-        if config is None:
-            return None
-        nested_config = config.get("config", {})
-        if nested_config is None:
-            return None
-        workdir = nested_config.get("WorkingDir", "/")
-        if workdir == "":
-            workdir = "/"
-        return Path(workdir)
+        return _workdir_from_config(self.get_image_config(image))
+
+    def inspect(
+        self,
+        image: "Image",
+        platform_architecture: str = DEFAULT_PLATFORM_ARCHITECTURE,
+        platform_os: str = DEFAULT_PLATFORM_OS,
+    ) -> "ImageInspection":
+        """Get everything needed to launch a session from an image in one pass.
+
+        The manifest for the platform is read only once and then used to get the config of the image.
+        """
+        is_private = self.oauth2_token is not None
+        result = self._get_manifest_with_digest(image, platform_architecture, platform_os)
+        if result is None:
+            return ImageInspection(image=image, exists=False, is_private=is_private)
+        manifest, digest = result
+        config_digest = manifest.get("config", {}).get("digest")
+        config = self._get_cached_image_config(image, config_digest) if config_digest is not None else None
+        return ImageInspection(
+            image=image,
+            exists=True,
+            is_private=is_private,
+            digest=digest,
+            manifest=manifest,
+            workdir=_workdir_from_config(config),
+        )
 
     def with_oauth2_token(self, oauth2_token: str) -> "ImageRepoDockerAPI":
         """Return a docker API instance with the token as authentication."""
@@ -267,3 +417,58 @@ class Image:
     def repo_api(self) -> ImageRepoDockerAPI:
         """Get the docker API from the image."""
         return ImageRepoDockerAPI(self.hostname)
+
+
+@dataclass
+class ImageInspection:
+    """The result of inspecting an image in a registry."""
+
+    image: Image
+    exists: bool
+    is_private: bool = False
+    """Whether credentials were needed to find the image."""
+    digest: Optional[str] = None
+    manifest: Optional[dict[str, Any]] = field(default=None, repr=False)
+    """The manifest for the requested platform."""
+    workdir: Optional[Path] = None
+
+
+def inspect_image(image: Image, oauth2_token: Optional[str] = None) -> ImageInspection:
+    """Inspect an image anonymously and with the token if the image cannot be found anonymously."""
+    inspection = image.repo_api().inspect(image)
+    if inspection.exists or not oauth2_token:
+        return inspection
+    return image.repo_api().with_oauth2_token(oauth2_token).inspect(image)
+
+
+def _workdir_from_config(config: Optional[dict[str, Any]]) -> Optional[Path]:
+    if config is None:
+        return None
+    nested_config = config.get("config", {})
+    if nested_config is None:
+        return None
+    workdir = nested_config.get("WorkingDir", "/")
+    if workdir == "":
+        workdir = "/"
+    return Path(workdir)
+
+
+def _missing_or_unavailable(res: requests.Response) -> Any:
+    """None if the registry says that the image does not exist, otherwise _UNAVAILABLE."""
+    if res.status_code == 404:
+        return None
+    try:
+        errors = res.json().get("errors", [])
+    except (requests.JSONDecodeError, AttributeError):
+        return _UNAVAILABLE
+    if any(isinstance(error, dict) and error.get("code") == "MANIFEST_UNKNOWN" for error in errors):
+        return None
+    return _UNAVAILABLE
+
+
+def _media_type(res: requests.Response) -> Optional[str]:
+    """The media type of a response without parameters such as the charset."""
+    content_type = res.headers.get("Content-Type")
+    if content_type is None:
+        return None
+    return content_type.split(";")[0].strip()
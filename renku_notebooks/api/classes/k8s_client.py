@@ -3,11 +3,20 @@
 import base64
 import json
 import logging
-from typing import Any, Optional
+import threading
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future
+from datetime import UTC, datetime
+from functools import partial
+from itertools import chain
+from time import monotonic
+from typing import Any, Optional, Protocol, TypeVar
 from urllib.parse import urljoin
 
+import jwt
 import requests
-from kubernetes import client
+from flask import g, has_app_context
+from kubernetes import client, watch
 from kubernetes.client.exceptions import ApiException
 from kubernetes.client.models import V1Container, V1DeleteOptions
 from kubernetes.config import load_config
@@ -22,11 +31,18 @@ from ...errors.intermittent import (
     PatchServerError,
 )
 from ...errors.programming import ProgrammingError
-from ...errors.user import MissingResourceError
+from ...errors.user import MissingResourceError, UserInputError
+from ...util.caching import TTLCache
+from ...util.circuit_breaker import CircuitBreaker
+from ...util.concurrency import run_concurrently, run_in_background
+from ...util.http import pooled_session
 from ...util.kubernetes_ import find_env_var
-from ...util.retries import retry_with_exponential_backoff
 from .auth import GitlabToken, RenkuTokens
 
+T = TypeVar("T")
+
+_SERVER_FIELDS = ("apiVersion", "kind", "metadata", "spec", "status")
+
 
 class NamespacedK8sClient:
     def __init__(
@@ -35,11 +51,17 @@ class NamespacedK8sClient:
         amalthea_group: str,
         amalthea_version: str,
         amalthea_plural: str,
+        list_page_size: Optional[int] = 500,
+        list_from_apiserver_cache: bool = False,
+        project_servers: bool = True,
     ):
         self.namespace = namespace
         self.amalthea_group = amalthea_group
         self.amalthea_version = amalthea_version
         self.amalthea_plural = amalthea_plural
+        self.list_page_size = list_page_size
+        self.list_from_apiserver_cache = list_from_apiserver_cache
+        self.project_servers = project_servers
         # NOTE: Try to load in-cluster config first, if that fails try to load kube config
         try:
             InClusterConfigLoader(
@@ -55,7 +77,12 @@ class NamespacedK8sClient:
         self._apps_v1 = client.AppsV1Api()
 
     def _get_container_logs(
-        self, pod_name: str, container_name: str, max_log_lines: Optional[int] = None
+        self,
+        pod_name: str,
+        container_name: str,
+        max_log_lines: Optional[int] = None,
+        since_seconds: Optional[int] = None,
+        limit_bytes: Optional[int] = None,
     ) -> Optional[str]:
         try:
             logs = self._core_v1.read_namespaced_pod_log(
@@ -63,6 +90,8 @@ class NamespacedK8sClient:
                 self.namespace,
                 container=container_name,
                 tail_lines=max_log_lines,
+                since_seconds=since_seconds,
+                limit_bytes=limit_bytes,
                 timestamps=True,
             )
         except ApiException as err:
@@ -73,13 +102,64 @@ class NamespacedK8sClient:
         else:
             return logs
 
-    def get_pod_logs(self, name: str, containers: list[str], max_log_lines: Optional[int] = None) -> dict[str, str]:
-        output = {}
-        for container in containers:
-            logs = self._get_container_logs(pod_name=name, container_name=container, max_log_lines=max_log_lines)
-            if logs:
-                output[container] = logs
-        return output
+    def get_pod_logs(
+        self,
+        name: str,
+        containers: list[str],
+        max_log_lines: Optional[int] = None,
+        since_seconds: Optional[int] = None,
+        limit_bytes: Optional[int] = None,
+    ) -> dict[str, str]:
+        # NOTE: The containers are read concurrently so that the request takes as long as the slowest container
+        results = run_concurrently(
+            *[
+                partial(
+                    self._get_container_logs,
+                    pod_name=name,
+                    container_name=container,
+                    max_log_lines=max_log_lines,
+                    since_seconds=since_seconds,
+                    limit_bytes=limit_bytes,
+                )
+                for container in containers
+            ]
+        )
+        return {container: logs for container, logs in zip(containers, results) if logs}
+
+    def stream_container_logs(
+        self,
+        pod_name: str,
+        container_name: str,
+        max_log_lines: Optional[int] = None,
+        since_seconds: Optional[int] = None,
+        limit_bytes: Optional[int] = None,
+        follow: bool = False,
+    ) -> Iterator[str]:
+        """Yield the log lines of a container as they are received from the k8s API.
+
+        The logs are never fully loaded in memory. If follow is true then this keeps yielding
+        new lines until the container stops or the caller stops iterating.
+        """
+        try:
+            response = self._core_v1.read_namespaced_pod_log(
+                pod_name,
+                self.namespace,
+                container=container_name,
+                tail_lines=max_log_lines,
+                since_seconds=since_seconds,
+                limit_bytes=limit_bytes,
+                follow=follow,
+                timestamps=True,
+                _preload_content=False,
+            )
+        except ApiException as err:
+            if err.status in [400, 404]:
+                return  # container does not exist or is not ready yet
+            raise IntermittentError(f"Logs cannot be read for pod {pod_name}, container {container_name}.")
+        try:
+            yield from _iter_lines(response.stream(decode_content=True))
+        finally:
+            response.release_conn()
 
     def get_secret(self, name: str) -> Optional[dict[str, Any]]:
         try:
@@ -91,7 +171,7 @@ class NamespacedK8sClient:
     def create_server(self, manifest: dict[str, Any]) -> dict[str, Any]:
         server_name = manifest.get("metadata", {}).get("name")
         try:
-            self._custom_objects.create_namespaced_custom_object(
+            server = self._custom_objects.create_namespaced_custom_object(
                 group=self.amalthea_group,
                 version=self.amalthea_version,
                 namespace=self.namespace,
@@ -103,13 +183,6 @@ class NamespacedK8sClient:
             raise CannotStartServerError(
                 message=f"Cannot start the session {server_name}",
             )
-        # NOTE: We wait for the cache to sync with the newly created server
-        # If not then the user will get a non-null response from the POST request but
-        # then immediately after a null response because the newly created server has
-        # not made it into the cache. With this we wait for the cache to catch up
-        # before we send the response from the POST request out. Exponential backoff
-        # is used to avoid overwhelming the cache.
-        server = retry_with_exponential_backoff(lambda x: x is None)(self.get_server)(server_name)
         return server
 
     def patch_server(self, server_name: str, patch: dict[str, Any] | list[dict[str, Any]]):
@@ -174,7 +247,8 @@ class NamespacedK8sClient:
     def get_server(self, name: str) -> Optional[dict[str, Any]]:
         """Get a specific JupyterServer object."""
         try:
-            js = self._custom_objects.get_namespaced_custom_object(
+            js = self._read_json(
+                self._custom_objects.get_namespaced_custom_object,
                 name=name,
                 group=self.amalthea_group,
                 version=self.amalthea_version,
@@ -186,24 +260,106 @@ class NamespacedK8sClient:
                 logging.exception(f"Cannot get server {name} because of {err}")
                 raise IntermittentError(f"Cannot get server {name} from the k8s API.")
             return
-        return js
+        return self._project_server(js)
 
-    def list_servers(self, label_selector: Optional[str] = None) -> list[dict[str, Any]]:
-        """Get a list of k8s jupyterserver objects for a specific user."""
+    @staticmethod
+    def _read_json(func: Callable[..., Any], **kwargs) -> Any:
+        """Call the k8s API and decode the JSON response directly.
+
+        This skips the generic deserialization of the k8s client into models.
+        """
+        response = func(**kwargs, _preload_content=False)
         try:
-            jss = self._custom_objects.list_namespaced_custom_object(
+            return json.loads(response.data)
+        finally:
+            response.release_conn()
+
+    def _project_server(self, server: dict[str, Any]) -> dict[str, Any]:
+        """Keep only the fields of a JupyterServer that are used by the notebook service."""
+        if not self.project_servers:
+            return server
+        projected = {key: server[key] for key in _SERVER_FIELDS if key in server}
+        if "managedFields" in projected.get("metadata", {}):
+            projected["metadata"] = {k: v for k, v in projected["metadata"].items() if k != "managedFields"}
+        return projected
+
+    def _list_server_pages(self, label_selector: Optional[str] = None) -> Iterator[dict[str, Any]]:
+        """List the k8s jupyterserver objects in chunks of at most list_page_size items.
+
+        If list_from_apiserver_cache is set the first chunk is served from the watch cache of
+        the k8s API server instead of a quorum read from etcd. The following chunks are always
+        consistent with the first one. Raises an ApiException if any of the requests fails.
+        """
+        continue_token = None
+        while True:
+            kwargs: dict[str, Any] = {}
+            if continue_token is not None:
+                kwargs["_continue"] = continue_token
+            elif self.list_from_apiserver_cache:
+                kwargs["resource_version"] = "0"
+                kwargs["resource_version_match"] = "NotOlderThan"
+            if self.list_page_size:
+                kwargs["limit"] = self.list_page_size
+            jss = self._read_json(
+                self._custom_objects.list_namespaced_custom_object,
                 group=self.amalthea_group,
                 version=self.amalthea_version,
                 namespace=self.namespace,
                 plural=self.amalthea_plural,
                 label_selector=label_selector,
+                **kwargs,
             )
+            jss["items"] = [self._project_server(js) for js in jss.get("items", [])]
+            yield jss
+            continue_token = jss.get("metadata", {}).get("continue")
+            if not continue_token:
+                return
+
+    def iter_servers(self, label_selector: Optional[str] = None) -> Iterator[dict[str, Any]]:
+        """Iterate over the k8s jupyterserver objects that match a label selector, one chunk at a time."""
+        try:
+            for jss in self._list_server_pages(label_selector):
+                yield from jss.get("items", [])
         except ApiException as err:
             if err.status not in [400, 404]:
                 logging.exception(f"Cannot list servers because of {err}")
                 raise IntermittentError(f"Cannot list servers from the k8s API with selector {label_selector}.")
-            return []
-        return jss.get("items", [])
+
+    def list_servers(self, label_selector: Optional[str] = None) -> list[dict[str, Any]]:
+        """Get a list of k8s jupyterserver objects for a specific user."""
+        return list(self.iter_servers(label_selector))
+
+    def list_servers_with_resource_version(self) -> tuple[list[dict[str, Any]], str]:
+        """Get all k8s jupyterserver objects in the namespace and the resource version of the list."""
+        items: list[dict[str, Any]] = []
+        resource_version = None
+        for jss in self._list_server_pages():
+            items.extend(jss.get("items", []))
+            # NOTE: All the chunks are a consistent snapshot at the resource version of the first one
+            resource_version = resource_version or jss.get("metadata", {}).get("resourceVersion")
+        return items, resource_version
+
+    def watch_servers(self, resource_version: str, timeout_seconds: int) -> Iterator[dict[str, Any]]:
+        """Stream the changes to the k8s jupyterserver objects that happen after a specific resource version.
+
+        Bookmark events are requested so that the resource version can be kept up to date even
+        when nothing changes. An ApiException with status 410 is raised when the resource version
+        is too old to resume from. The servers in the events are projected like the listed ones.
+        """
+        for event in watch.Watch().stream(
+            self._custom_objects.list_namespaced_custom_object,
+            group=self.amalthea_group,
+            version=self.amalthea_version,
+            namespace=self.namespace,
+            plural=self.amalthea_plural,
+            resource_version=resource_version,
+            allow_watch_bookmarks=True,
+            timeout_seconds=timeout_seconds,
+        ):
+            if event["type"] != "BOOKMARK":
+                server = self._project_server(event["raw_object"])
+                event = {**event, "object": server, "raw_object": server}
+            yield event
 
     def patch_image_pull_secret(self, server_name: str, gitlab_token: GitlabToken):
         """Patch the image pull secret used in a Renku session."""
@@ -355,14 +511,68 @@ class NamespacedK8sClient:
         )
 
 
+class ServerCacheProto(Protocol):
+    def list_servers(self, safe_username: str) -> list[dict[str, Any]]: ...
+
+    def get_server(self, name: str) -> Optional[dict[str, Any]]: ...
+
+    def wait_for_server(
+        self, name: str, resource_version: Optional[str], timeout_seconds: float
+    ) -> Optional[dict[str, Any]]: ...
+
+
 class JsServerCache:
-    def __init__(self, url: str):
+    def __init__(
+        self,
+        url: str,
+        pool_size: int = 10,
+        connect_timeout: float = 1.0,
+        read_timeout: float = 5.0,
+        retries: int = 2,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+    ):
         self.url = url
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.circuit_breaker = circuit_breaker
+        # NOTE: The session is shared by all requests handled by this process so that connections
+        # to the cache are kept alive and reused instead of being opened for every request.
+        self.session = pooled_session(
+            pool_size=pool_size,
+            connect_timeout=connect_timeout,
+            read_timeout=read_timeout,
+            retries=retries,
+        )
+
+    def _guarded(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """Call the cache unless the circuit breaker is open, in which case fail right away."""
+        if self.circuit_breaker is None:
+            return func(*args, **kwargs)
+        if not self.circuit_breaker.allow_request():
+            raise JSCacheError("The jupyter server cache is not available, its circuit breaker is open.")
+        try:
+            result = func(*args, **kwargs)
+        except JSCacheError:
+            self.circuit_breaker.record_failure()
+            raise
+        except Exception:
+            # NOTE: The cache responded so the failure is not a reason to stop calling it
+            self.circuit_breaker.record_success()
+            raise
+        except BaseException:
+            # NOTE: The call was interrupted, e.g. by a gevent timeout, so its outcome is unknown
+            self.circuit_breaker.cancel_request()
+            raise
+        self.circuit_breaker.record_success()
+        return result
 
     def list_servers(self, safe_username: str) -> list[dict[str, Any]]:
+        return self._guarded(self._list_servers, safe_username)
+
+    def _list_servers(self, safe_username: str) -> list[dict[str, Any]]:
         url = urljoin(self.url, f"/users/{safe_username}/servers")
         try:
-            res = requests.get(url)
+            res = self.session.get(url)
             res.raise_for_status()
         except requests.HTTPError as err:
             logging.warning(
@@ -377,9 +587,30 @@ class JsServerCache:
         return res.json()
 
     def get_server(self, name: str) -> Optional[dict[str, Any]]:
+        return self._guarded(self._get_server, name)
+
+    def wait_for_server(
+        self, name: str, resource_version: Optional[str], timeout_seconds: float
+    ) -> Optional[dict[str, Any]]:
+        """Get a specific server from the cache as soon as the cache has caught up with a resource version.
+
+        The cache holds the request until the server is present with at least the requested
+        resource version or until the timeout expires, whatever comes first.
+        """
+        params = {"waitSeconds": timeout_seconds}
+        if resource_version:
+            params["minResourceVersion"] = resource_version
+        return self._guarded(
+            self._get_server,
+            name,
+            params=params,
+            timeout=(self.connect_timeout, self.read_timeout + timeout_seconds),
+        )
+
+    def _get_server(self, name: str, **kwargs) -> Optional[dict[str, Any]]:
         url = urljoin(self.url, f"/servers/{name}")
         try:
-            res = requests.get(url)
+            res = self.session.get(url, **kwargs)
         except requests.exceptions.RequestException as err:
             logging.warning(f"Jupyter server cache at {url} cannot be reached: {err}")
             raise JSCacheError("The jupyter server cache is not available")
@@ -399,15 +630,31 @@ class JsServerCache:
 
 
 class K8sClient:
+    tokens_refreshed_at_annotation = "renku.io/tokensRefreshedAt"
+    git_token_expires_at_annotation = "renku.io/gitTokenExpiresAt"
+    access_token_expires_at_annotation = "renku.io/accessTokenExpiresAt"
+    # NOTE: The init containers of a resumed session use the Renku access token right away
+    access_token_min_validity_seconds = 120
+
     def __init__(
         self,
-        js_cache: JsServerCache,
+        js_cache: ServerCacheProto,
         renku_ns_client: NamespacedK8sClient,
         username_label: str,
         session_ns_client: Optional[NamespacedK8sClient] = None,
         bypass_cache_on_failure: bool = True,
+        cache_wait_timeout_seconds: float = 10,
+        token_refresh_interval_seconds: float = 600,
+        fallback_cache_seconds: float = 2,
     ):
         self.js_cache = js_cache
+        # NOTE: When the cache is not available identical concurrent reads from the k8s API are
+        # coalesced and their results are kept for a short time to avoid a thundering herd.
+        self._fallback_cache: TTLCache[tuple[str, str], Any] = TTLCache(ttl_seconds=fallback_cache_seconds)
+        self.cache_wait_timeout_seconds = cache_wait_timeout_seconds
+        self.token_refresh_interval_seconds = token_refresh_interval_seconds
+        self._token_refresh_attempts: dict[str, float] = {}
+        self._token_refresh_attempts_lock = threading.Lock()
         self.renku_ns_client = renku_ns_client
         self.username_label = username_label
         self.session_ns_client = session_ns_client
@@ -415,57 +662,104 @@ class K8sClient:
         if not self.username_label:
             raise ProgrammingError("username_label has to be provided to K8sClient")
 
+    @property
+    def namespaced_clients(self) -> list[NamespacedK8sClient]:
+        """The clients for all namespaces where sessions can be found."""
+        if self.session_ns_client is None:
+            return [self.renku_ns_client]
+        return [self.renku_ns_client, self.session_ns_client]
+
+    def _namespaced_client(self, namespace: Optional[str]) -> NamespacedK8sClient:
+        """Get the client for a specific namespace, the preferred namespace is used if there is no match."""
+        return next(
+            (c for c in self.namespaced_clients if c.namespace == namespace),
+            self.session_ns_client if self.session_ns_client is not None else self.renku_ns_client,
+        )
+
+    @staticmethod
+    def _identity_map() -> Optional[dict[str, Optional[dict[str, Any]]]]:
+        """The servers that were already fetched while handling the current request, keyed by name.
+
+        A missing server is stored as None. Outside of a flask application context there is no
+        identity map and every read goes to the cache or the k8s API.
+        """
+        if not has_app_context():
+            return None
+        return g.setdefault("k8s_servers", {})
+
+    def _remember(self, name: str, server: Optional[dict[str, Any]]):
+        servers = self._identity_map()
+        if servers is not None:
+            servers[name] = server
+
+    def _forget(self, name: str):
+        self._fallback_cache.clear()
+        servers = self._identity_map()
+        if servers is not None:
+            servers.pop(name, None)
+
     def list_servers(self, safe_username: str) -> list[dict[str, Any]]:
         """Get a list of servers that belong to a user.
 
         Attempt to use the cache first but if the cache fails then use the k8s API.
         """
         try:
-            return self.js_cache.list_servers(safe_username)
+            servers = self.js_cache.list_servers(safe_username)
         except JSCacheError:
             if not self.bypass_cache_on_failure:
                 raise
             logging.warning(f"Skipping the cache to list servers for user: {safe_username}")
             label_selector = f"{self.username_label}={safe_username}"
-            return self.renku_ns_client.list_servers(label_selector) + (
-                self.session_ns_client.list_servers(label_selector) if self.session_ns_client is not None else []
+            servers = list(
+                self._fallback_cache.get_or_load(("list", label_selector), partial(self._list_all, label_selector))
             )
+        for server in servers:
+            self._remember(server.get("metadata", {}).get("name"), server)
+        return servers
+
+    def _list_all(self, label_selector: str) -> list[dict[str, Any]]:
+        # NOTE: The namespaces are queried concurrently so that the fallback takes as long as one request
+        results = run_concurrently(*[partial(c.list_servers, label_selector) for c in self.namespaced_clients])
+        return list(chain.from_iterable(results))
 
     def get_server(self, name: str, safe_username: str) -> Optional[dict[str, Any]]:
         """Attempt to get a specific server by name from the cache.
 
-        If the request to the cache fails, fallback to the k8s API.
+        If the request to the cache fails, fallback to the k8s API. A server that was already
+        fetched or modified while handling the current request is not fetched again.
         """
-        server = None
+        servers = self._identity_map()
+        if servers is not None and name in servers:
+            server = servers[name]
+        else:
+            server = self._fetch_server(name)
+            self._remember(name, server)
+
+        if server and server.get("metadata", {}).get("labels", {}).get(self.username_label) != safe_username:
+            return
+        return server
+
+    def _fetch_server(self, name: str) -> Optional[dict[str, Any]]:
         try:
-            server = self.js_cache.get_server(name)
+            return self.js_cache.get_server(name)
         except JSCacheError:
             if not self.bypass_cache_on_failure:
                 raise
-            output = []
-            res = None
-            if self.session_ns_client is not None:
-                res = self.session_ns_client.get_server(name)
-                if res:
-                    output.append(res)
-            res = self.renku_ns_client.get_server(name)
-            if res:
-                output.append(res)
-            if len(output) > 1:
-                raise ProgrammingError(
-                    "Expected less than two results for searching for " f"server {name}, but got {len(output)}"
-                )
-            if len(output) == 0:
-                return
-            server = output[0]
+            return self._fallback_cache.get_or_load(("get", name), partial(self._get_from_all, name))
 
-        if server and server.get("metadata", {}).get("labels", {}).get(self.username_label) != safe_username:
+    def _get_from_all(self, name: str) -> Optional[dict[str, Any]]:
+        results = run_concurrently(*[partial(c.get_server, name) for c in self.namespaced_clients])
+        output = [res for res in results if res]
+        if len(output) > 1:
+            raise ProgrammingError(
+                "Expected less than two results for searching for " f"server {name}, but got {len(output)}"
+            )
+        if len(output) == 0:
             return
-        return server
+        return output[0]
 
-    def get_server_logs(
-        self, server_name: str, safe_username: str, max_log_lines: Optional[int] = None
-    ) -> dict[str, str]:
+    def _server_containers(self, server_name: str, safe_username: str) -> tuple[NamespacedK8sClient, list[str]]:
+        """Get the client for the namespace of a server and the names of the containers of its pod."""
         server = self.get_server(server_name, safe_username)
         if server is None:
             raise MissingResourceError(
@@ -475,10 +769,53 @@ class K8sClient:
             server.get("status", {}).get("containerStates", {}).get("regular", {}).keys()
         )
         namespace = server.get("metadata", {}).get("namespace")
+        return self._namespaced_client(namespace), containers
+
+    def get_server_logs(
+        self,
+        server_name: str,
+        safe_username: str,
+        max_log_lines: Optional[int] = None,
+        since_seconds: Optional[int] = None,
+        limit_bytes: Optional[int] = None,
+    ) -> dict[str, str]:
+        ns_client, containers = self._server_containers(server_name, safe_username)
+        pod_name = f"{server_name}-0"
+        return ns_client.get_pod_logs(pod_name, containers, max_log_lines, since_seconds, limit_bytes)
+
+    def stream_server_logs(
+        self,
+        server_name: str,
+        safe_username: str,
+        container_name: Optional[str] = None,
+        max_log_lines: Optional[int] = None,
+        since_seconds: Optional[int] = None,
+        limit_bytes: Optional[int] = None,
+        follow: bool = False,
+    ) -> Iterator[tuple[str, str]]:
+        """Get an iterator over the container name and log line of every line in the logs of a server.
+
+        The containers are read one after the other, unless a single container is requested.
+        The server is looked up right away so that a missing server raises before iterating starts.
+        """
+        ns_client, containers = self._server_containers(server_name, safe_username)
+        if container_name is not None:
+            if container_name not in containers:
+                raise MissingResourceError(f"Cannot find container {container_name} in server {server_name}.")
+            containers = [container_name]
+        elif follow and len(containers) > 1:
+            raise UserInputError("A container has to be specified in order to follow the logs.")
         pod_name = f"{server_name}-0"
-        if namespace == self.renku_ns_client.namespace:
-            return self.renku_ns_client.get_pod_logs(pod_name, containers, max_log_lines)
-        return self.session_ns_client.get_pod_logs(pod_name, containers, max_log_lines)
+
+        def _stream() -> Iterator[tuple[str, str]]:
+            for container in containers:
+                lines = ns_client.stream_container_logs(
+                    pod_name, container, max_log_lines, since_seconds, limit_bytes, follow
+                )
+                for line in lines:
+                    yield container, line
+
+        return _stream()
 
     def get_secret(self, name: str) -> Optional[dict[str, Any]]:
         if self.session_ns_client is not None:
@@ -494,8 +831,37 @@ class K8sClient:
             # NOTE: server already exists
             return server
         if not self.session_ns_client:
-            return self.renku_ns_client.create_server(manifest)
-        return self.session_ns_client.create_server(manifest)
+            server = self.renku_ns_client.create_server(manifest)
+        else:
+            server = self.session_ns_client.create_server(manifest)
+        server = self._wait_for_cache(server)
+        self._fallback_cache.clear()
+        self._remember(server_name, server)
+        return server
+
+    def _wait_for_cache(self, server: dict[str, Any]) -> dict[str, Any]:
+        """Wait until a newly created server is visible in the cache.
+
+        If not then the user will get a non-null response from the POST request but
+        then immediately after a null response because the newly created server has
+        not made it into the cache. The cache answers as soon as it has caught up with
+        the resource version of the created server, so there is no polling involved.
+        """
+        server_name = server.get("metadata", {}).get("name")
+        resource_version = server.get("metadata", {}).get("resourceVersion")
+        try:
+            cached_server = self.js_cache.wait_for_server(
+                server_name, resource_version, self.cache_wait_timeout_seconds
+            )
+        except JSCacheError:
+            # NOTE: If the cache is not available reads will go to the k8s API which already has the server
+            return server
+        if cached_server is None:
+            logging.warning(
+                f"Server {server_name} did not appear in the cache within {self.cache_wait_timeout_seconds} seconds."
+            )
+            return server
+        return cached_server
 
     def patch_server(self, server_name: str, safe_username: str, patch: dict[str, Any]):
         server = self.get_server(server_name, safe_username)
@@ -505,11 +871,10 @@ class K8sClient:
             )
 
         namespace = server.get("metadata", {}).get("namespace")
-
-        if namespace == self.renku_ns_client.namespace:
-            return self.renku_ns_client.patch_server(server_name=server_name, patch=patch)
-        else:
-            return self.session_ns_client.patch_server(server_name=server_name, patch=patch)
+        patched_server = self._namespaced_client(namespace).patch_server(server_name=server_name, patch=patch)
+        self._fallback_cache.clear()
+        self._remember(server_name, patched_server)
+        return patched_server
 
     def patch_statefulset(self, server_name: str, patch: dict[str, Any]) -> client.V1StatefulSet | None:
         client = self.session_ns_client if self.session_ns_client else self.renku_ns_client
@@ -522,19 +887,119 @@ class K8sClient:
                 f"Cannot find server {server_name} for user " f"{safe_username} in order to delete it."
             )
         namespace = server.get("metadata", {}).get("namespace")
-        if namespace == self.renku_ns_client.namespace:
-            self.renku_ns_client.delete_server(server_name, forced)
-        else:
-            self.session_ns_client.delete_server(server_name, forced)
+        self._namespaced_client(namespace).delete_server(server_name, forced)
+        self._forget(server_name)
 
-    def patch_tokens(self, server_name, renku_tokens: RenkuTokens, gitlab_token: GitlabToken):
+    def patch_tokens(
+        self,
+        server_name,
+        renku_tokens: RenkuTokens,
+        gitlab_token: GitlabToken,
+        namespace: Optional[str] = None,
+    ):
         """Patch the Renku and Gitlab access tokens used in a session."""
-        client = self.session_ns_client if self.session_ns_client else self.renku_ns_client
-        client.patch_statefulset_tokens(server_name, renku_tokens)
-        client.patch_image_pull_secret(server_name, gitlab_token)
+        client = self._namespaced_client(namespace)
+        run_concurrently(
+            partial(client.patch_statefulset_tokens, server_name, renku_tokens),
+            partial(client.patch_image_pull_secret, server_name, gitlab_token),
+        )
+
+    def tokens_refreshed_annotations(self, renku_tokens: RenkuTokens, gitlab_token: GitlabToken) -> dict[str, str]:
+        """The annotations that record when the tokens of a session were last refreshed."""
+        annotations = {self.tokens_refreshed_at_annotation: datetime.now(UTC).isoformat(timespec="seconds")}
+        if gitlab_token.expires_at and gitlab_token.expires_at > 0:
+            annotations[self.git_token_expires_at_annotation] = str(gitlab_token.expires_at)
+        access_token_expires_at = _jwt_expires_at(renku_tokens.access_token)
+        if access_token_expires_at is not None:
+            annotations[self.access_token_expires_at_annotation] = str(access_token_expires_at)
+        return annotations
+
+    def tokens_are_fresh(self, server: dict[str, Any]) -> bool:
+        """Whether the tokens of a session were refreshed recently and will stay valid for a while."""
+        annotations = server.get("metadata", {}).get("annotations", {})
+        try:
+            refreshed_at = datetime.fromisoformat(annotations[self.tokens_refreshed_at_annotation])
+            access_token_expires_at = int(annotations[self.access_token_expires_at_annotation])
+            git_token_expires_at = int(annotations.get(self.git_token_expires_at_annotation, 0))
+        except (KeyError, TypeError, ValueError):
+            return False
+        now = datetime.now(UTC)
+        if (now - refreshed_at).total_seconds() > self.token_refresh_interval_seconds:
+            return False
+        if access_token_expires_at - now.timestamp() < self.access_token_min_validity_seconds:
+            return False
+        # NOTE: The Gitlab token is used to pull the image when the session is resumed
+        return git_token_expires_at <= 0 or git_token_expires_at - now.timestamp() > self.token_refresh_interval_seconds
+
+    def refresh_tokens(self, servers: list[dict[str, Any]], renku_tokens: RenkuTokens, gitlab_token: GitlabToken):
+        """Patch the tokens of several sessions concurrently and record when this was done."""
+        run_concurrently(
+            *[partial(self._refresh_server_tokens, server, renku_tokens, gitlab_token) for server in servers]
+        )
+
+    def _refresh_server_tokens(self, server: dict[str, Any], renku_tokens: RenkuTokens, gitlab_token: GitlabToken):
+        server_name = server.get("metadata", {}).get("name")
+        namespace = server.get("metadata", {}).get("namespace")
+        self.patch_tokens(server_name, renku_tokens, gitlab_token, namespace)
+        patch = {"metadata": {"annotations": self.tokens_refreshed_annotations(renku_tokens, gitlab_token)}}
+        self._namespaced_client(namespace).patch_server(server_name=server_name, patch=patch)
+
+    def refresh_hibernated_tokens_in_background(
+        self, servers: list[dict[str, Any]], renku_tokens: RenkuTokens, gitlab_token: GitlabToken
+    ) -> Optional[Future]:
+        """Refresh the tokens of the hibernated sessions whose tokens are not fresh in a background worker.
+
+        This way resuming a session does not have to patch the tokens. The tokens of a session are
+        refreshed at most once per refresh interval, also when the refresh fails or is still running.
+        """
+        if self.token_refresh_interval_seconds <= 0:
+            return None
+        now = monotonic()
+        with self._token_refresh_attempts_lock:
+            self._token_refresh_attempts = {
+                name: attempted_at
+                for name, attempted_at in self._token_refresh_attempts.items()
+                if now - attempted_at < self.token_refresh_interval_seconds
+            }
+            stale_servers = [
+                server
+                for server in servers
+                if server.get("spec", {}).get("jupyterServer", {}).get("hibernated", False)
+                and server.get("metadata", {}).get("name") not in self._token_refresh_attempts
+                and not self.tokens_are_fresh(server)
+            ]
+            for server in stale_servers:
+                self._token_refresh_attempts[server.get("metadata", {}).get("name")] = now
+        if not stale_servers:
+            return None
+        return run_in_background(self.refresh_tokens, stale_servers, renku_tokens, gitlab_token)
 
     @property
     def preferred_namespace(self) -> str:
         if self.session_ns_client is not None:
             return self.session_ns_client.namespace
         return self.renku_ns_client.namespace
+
+
+def _jwt_expires_at(token: Optional[str]) -> Optional[int]:
+    """The expiry of a JWT as a unix timestamp, None if the token has no readable expiry."""
+    if not token:
+        return None
+    try:
+        # NOTE: The signature is not verified because the expiry is only used to decide when to refresh
+        exp = jwt.decode(token, options={"verify_signature": False}).get("exp")
+    except jwt.PyJWTError:
+        return None
+    return int(exp) if isinstance(exp, int | float) else None
+
+
+def _iter_lines(chunks: Iterable[bytes]) -> Iterator[str]:
+    """Split a stream of byte chunks into lines, without the line endings."""
+    pending = b""
+    for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8", errors="replace")
+    if pending:
+        yield pending.decode("utf-8", errors="replace")
@@ -0,0 +1,200 @@
+"""An in-process informer that keeps a local copy of the JupyterServer resources."""
+
+import logging
+import threading
+from time import monotonic, sleep
+from typing import Any, Optional
+
+from kubernetes.client.exceptions import ApiException
+
+from ...errors.intermittent import JSCacheError
+from ...errors.programming import ProgrammingError
+from .k8s_client import NamespacedK8sClient
+
+_Key = tuple[str, str]
+
+
+class JupyterServerInformer:
+    """Watches the k8s API and answers reads about JupyterServers from memory.
+
+    It can be used instead of the k8s-watcher cache. There is one watch per namespace which
+    is resumed from the last seen resource version (kept up to date by bookmark events), and
+    a full list is only done on startup or when the resource version has expired. Until every
+    namespace has been listed, or while a namespace cannot be watched, reads raise a JSCacheError
+    so that the K8sClient falls back to the k8s API.
+
+    The returned manifests are shared with the store and must not be modified.
+    """
+
+    def __init__(
+        self,
+        namespaced_clients: list[NamespacedK8sClient],
+        username_label: str,
+        watch_timeout_seconds: int = 300,
+        retry_wait_seconds: float = 5,
+    ):
+        self._clients = namespaced_clients
+        self.username_label = username_label
+        self.watch_timeout_seconds = watch_timeout_seconds
+        self.retry_wait_seconds = retry_wait_seconds
+        self._lock = threading.RLock()
+        self._changed = threading.Condition(self._lock)
+        self._servers: dict[_Key, dict[str, Any]] = {}
+        self._keys_by_name: dict[str, set[_Key]] = {}
+        self._keys_by_username: dict[str, set[_Key]] = {}
+        self._synced: dict[str, bool] = {c.namespace: False for c in namespaced_clients}
+        self._started = False
+
+    def start(self):
+        """Start watching all namespaces in background threads, does nothing if already started."""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        for ns_client in self._clients:
+            threading.Thread(
+                target=self._run,
+                args=(ns_client,),
+                name=f"jupyterserver-informer-{ns_client.namespace}",
+                daemon=True,
+            ).start()
+
+    @property
+    def synced(self) -> bool:
+        return all(self._synced.values())
+
+    def list_servers(self, safe_username: str) -> list[dict[str, Any]]:
+        self._check_synced()
+        with self._lock:
+            return [self._servers[key] for key in self._keys_by_username.get(safe_username, ())]
+
+    def get_server(self, name: str) -> Optional[dict[str, Any]]:
+        self._check_synced()
+        return self._find_server(name)
+
+    def wait_for_server(
+        self, name: str, resource_version: Optional[str], timeout_seconds: float
+    ) -> Optional[dict[str, Any]]:
+        """Get a specific server as soon as the store has caught up with a resource version.
+
+        Waiting threads are woken up by every change to the store so no polling is involved.
+        """
+        self._check_synced()
+        min_resource_version = _parse_resource_version(resource_version)
+        deadline = monotonic() + timeout_seconds
+        with self._changed:
+            while True:
+                server = self._find_server(name)
+                if (
+                    server is not None
+                    and _parse_resource_version(server.get("metadata", {}).get("resourceVersion"))
+                    >= min_resource_version
+                ):
+                    return server
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    return server
+                self._changed.wait(remaining)
+
+    def _find_server(self, name: str) -> Optional[dict[str, Any]]:
+        with self._lock:
+            output = [self._servers[key] for key in self._keys_by_name.get(name, ())]
+        if len(output) == 0:
+            return
+        if len(output) > 1:
+            raise ProgrammingError(f"Expected to find 1 server when getting server {name}, found {len(output)}.")
+        return output[0]
+
+    def _check_synced(self):
+        self.start()
+        if not self.synced:
+            raise JSCacheError("The jupyter server informer has not synchronized with the k8s API.")
+
+    def _run(self, ns_client: NamespacedK8sClient):
+        namespace = ns_client.namespace
+        resource_version = None
+        while True:
+            try:
+                if resource_version is None:
+                    servers, resource_version = ns_client.list_servers_with_resource_version()
+                    self._replace_namespace(namespace, servers)
+                    self._synced[namespace] = True
+                resource_version = self._watch(ns_client, resource_version)
+            except ApiException as err:
+                if err.status == 410:
+                    # NOTE: The resource version is too old to resume from, a new list is needed
+                    logging.info(f"Watching servers in {namespace} expired, listing all servers again.")
+                else:
+                    logging.warning(f"Watching servers in {namespace} failed, retrying: {err}")
+                    self._synced[namespace] = False
+                    sleep(self.retry_wait_seconds)
+                resource_version = None
+            except Exception as err:
+                logging.exception(f"Watching servers in {namespace} failed unexpectedly, retrying: {err}")
+                self._synced[namespace] = False
+                resource_version = None
+                sleep(self.retry_wait_seconds)
+
+    def _watch(self, ns_client: NamespacedK8sClient, resource_version: str) -> str:
+        """Apply the watch events to the store until the watch times out and return the last resource version."""
+        for event in ns_client.watch_servers(resource_version, self.watch_timeout_seconds):
+            event_type = event["type"]
+            server = event["raw_object"]
+            resource_version = server.get("metadata", {}).get("resourceVersion", resource_version)
+            if event_type == "BOOKMARK":
+                continue
+            if event_type == "DELETED":
+                self._remove(self._key(server))
+            else:
+                self._add(server)
+        return resource_version
+
+    @staticmethod
+    def _key(server: dict[str, Any]) -> _Key:
+        metadata = server.get("metadata", {})
+        return metadata.get("namespace"), metadata.get("name")
+
+    def _replace_namespace(self, namespace: str, servers: list[dict[str, Any]]):
+        with self._lock:
+            for key in [key for key in self._servers if key[0] == namespace]:
+                self._remove(key)
+            for server in servers:
+                self._add(server)
+
+    def _add(self, server: dict[str, Any]):
+        key = self._key(server)
+        with self._lock:
+            self._remove(key)
+            self._servers[key] = server
+            self._keys_by_name.setdefault(key[1], set()).add(key)
+            username = server.get("metadata", {}).get("labels", {}).get(self.username_label)
+            if username is not None:
+                self._keys_by_username.setdefault(username, set()).add(key)
+            self._changed.notify_all()
+
+    def _remove(self, key: _Key):
+        with self._lock:
+            server = self._servers.pop(key, None)
+            if server is None:
+                return
+            self._discard_from_index(self._keys_by_name, key[1], key)
+            username = server.get("metadata", {}).get("labels", {}).get(self.username_label)
+            if username is not None:
+                self._discard_from_index(self._keys_by_username, username, key)
+
+    @staticmethod
+    def _discard_from_index(index: dict[str, set[_Key]], value: str, key: _Key):
+        keys = index.get(value)
+        if keys is None:
+            return
+        keys.discard(key)
+        if not keys:
+            index.pop(value)
+
+
+def _parse_resource_version(resource_version: Optional[str]) -> int:
+    """Parse a resource version so that it can be compared, the k8s API generates them as integers."""
+    try:
+        return int(resource_version)
+    except (TypeError, ValueError):
+        return 0
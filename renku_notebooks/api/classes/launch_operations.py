@@ -0,0 +1,117 @@
+"""Session launches that run in a bounded pool of background workers."""
+
+import logging
+import threading
+import uuid
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from enum import Enum
+from typing import Any, Optional
+
+from flask import Flask, current_app
+
+from ...errors.common import GenericError
+from ...errors.intermittent import LaunchQueueFullError
+from ...util.caching import TTLCache
+from ..schemas.errors import ErrorResponseFromGenericError
+
+
+class LaunchOperationStatus(Enum):
+    pending = "pending"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
+
+
+@dataclass
+class LaunchOperation:
+    """The launch of a session that runs in the background."""
+
+    id: str
+    server_name: str
+    safe_username: str
+    status: LaunchOperationStatus = LaunchOperationStatus.pending
+    created_at: datetime = field(default_factory=lambda: datetime.now(UTC))
+    updated_at: datetime = field(default_factory=lambda: datetime.now(UTC))
+    error: Optional[dict[str, Any]] = None
+
+    @property
+    def is_done(self) -> bool:
+        return self.status in [LaunchOperationStatus.succeeded, LaunchOperationStatus.failed]
+
+
+class LaunchOperations:
+    """Runs session launches in the background and keeps track of them.
+
+    At most `workers` launches run at the same time and at most `max_pending` launches can be
+    waiting or running, further launches are rejected. Waiting and running operations are always
+    kept. Finished operations are kept in memory for `retention_seconds` after they are done, up
+    to the `max_finished` most recent ones. The operations can only be found by the replica of the
+    service that started them.
+    """
+
+    def __init__(
+        self, workers: int = 4, max_pending: int = 50, retention_seconds: float = 3600, max_finished: int = 1024
+    ):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._finished: TTLCache[str, LaunchOperation] = TTLCache(maxsize=max_finished, ttl_seconds=retention_seconds)
+        self._active: dict[str, LaunchOperation] = {}
+
+    def submit(self, server_name: str, safe_username: str, launch: Callable[[], Any]) -> LaunchOperation:
+        """Start launching a session in the background.
+
+        If the same session is already being launched the existing operation is returned.
+        """
+        with self._lock:
+            active_operation = self._active.get(server_name)
+            if active_operation is not None:
+                return active_operation
+            if len(self._active) >= self.max_pending:
+                raise LaunchQueueFullError()
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="launch-worker")
+            operation = LaunchOperation(id=uuid.uuid4().hex, server_name=server_name, safe_username=safe_username)
+            self._active[server_name] = operation
+            # NOTE: The launch outlives the request, it runs in its own application context
+            self._executor.submit(self._run, operation, current_app._get_current_object(), launch)
+        return operation
+
+    def get(self, operation_id: str, safe_username: str) -> Optional[LaunchOperation]:
+        """Get an operation, users can only see their own operations."""
+        with self._lock:
+            operation = next((o for o in self._active.values() if o.id == operation_id), None)
+        if operation is None:
+            operation = self._finished.get(operation_id)
+        if operation is None or operation.safe_username != safe_username:
+            return None
+        return operation
+
+    def _run(self, operation: LaunchOperation, app: Flask, launch: Callable[[], Any]):
+        self._update(operation, LaunchOperationStatus.running)
+        try:
+            with app.app_context():
+                launch()
+        except GenericError as err:
+            self._update(operation, LaunchOperationStatus.failed, ErrorResponseFromGenericError().dump(err)["error"])
+        except Exception:
+            logging.exception(f"Launching the session {operation.server_name} in the background failed.")
+            error = ErrorResponseFromGenericError().dump(GenericError())["error"]
+            self._update(operation, LaunchOperationStatus.failed, error)
+        else:
+            self._update(operation, LaunchOperationStatus.succeeded)
+
+    def _update(
+        self, operation: LaunchOperation, status: LaunchOperationStatus, error: Optional[dict[str, Any]] = None
+    ):
+        with self._lock:
+            operation.status = status
+            operation.error = error
+            operation.updated_at = datetime.now(UTC)
+            if operation.is_done:
+                self._active.pop(operation.server_name, None)
+                self._finished.set(operation.id, operation)
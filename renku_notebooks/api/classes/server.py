@@ -9,6 +9,7 @@ from flask import current_app
 from ...config import config
 from ...errors.programming import ConfigurationError, DuplicateEnvironmentVariableError
 from ...errors.user import MissingResourceError
+from ...util.concurrency import run_concurrently
 from ..amalthea_patches import cloudstorage as cloudstorage_patches
 from ..amalthea_patches import general as general_patches
 from ..amalthea_patches import git_proxy as git_proxy_patches
@@ -439,9 +440,12 @@ class Renku1UserServer(UserServer):
         errors = super()._get_start_errors()
         if self.gitlab_project is None:
             errors.append(f"project {self.project} does not exist")
-        if not self._branch_exists():
+        branch_exists, commit_sha_exists = run_concurrently(
+            self._branch_exists, self._commit_sha_exists
+        )
+        if not branch_exists:
             errors.append(f"branch {self.branch} does not exist")
-        if not self._commit_sha_exists():
+        if not commit_sha_exists:
             errors.append(f"commit {self.commit_sha} does not exist")
         return errors
 
@@ -451,28 +455,40 @@ class Renku1UserServer(UserServer):
         The branch name is not required by the API and therefore
         passing None to this function will return True.
         """
-        if self.branch is not None and self.gitlab_project is not None:
+
+        def _get_branch() -> bool:
             try:
                 self.gitlab_project.branches.get(self.branch)
             except Exception as err:
                 current_app.logger.warning(
                     f"Branch {self.branch} cannot be verified or does not exist. {err}"
                 )
-            else:
-                return True
+                return False
+            return True
+
+        if self.branch is not None and self.gitlab_project is not None:
+            return self._user.cached_gitlab_lookup(
+                "branch", self.gitlab_project_name, self.branch, _get_branch
+            )
         return False
 
     def _commit_sha_exists(self):
         """Check if a specific commit sha exists in the user's gitlab project."""
-        if self.commit_sha is not None and self.gitlab_project is not None:
+
+        def _get_commit() -> bool:
             try:
                 self.gitlab_project.commits.get(self.commit_sha)
             except Exception as err:
                 current_app.logger.warning(
                     f"Commit {self.commit_sha} cannot be verified or does not exist. {err}"
                 )
-            else:
-                return True
+                return False
+            return True
+
+        if self.commit_sha is not None and self.gitlab_project is not None:
+            return self._user.cached_gitlab_lookup(
+                "commit", self.gitlab_project_name, self.commit_sha, _get_commit
+            )
         return False
 
     def get_labels(self) -> dict[str, str | None]:
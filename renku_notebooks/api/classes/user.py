@@ -1,10 +1,11 @@
 import base64
+import hashlib
 import json
 import re
 from abc import ABC
-from functools import lru_cache
+from collections.abc import Callable
 from math import floor
-from typing import Optional
+from typing import Any, Optional
 
 import escapism
 import jwt
@@ -15,19 +16,60 @@ from gitlab.v4.objects.projects import Project
 from ...config import config
 from ...errors.programming import ConfigurationError
 from ...errors.user import AuthenticationError
+from ...util.caching import TTLCache
+from ...util.http import pooled_session
+
+GITLAB_CACHE_SIZE = 1024
+GITLAB_CACHE_TTL_SECONDS = 60
+GITLAB_USER_CACHE_TTL_SECONDS = 300
+GITLAB_POOL_SIZE = 20
+
+# NOTE: The GitLab clients of all users share the connection pool, python-gitlab adds the
+# authentication of the user to each request
+_gitlab_session = pooled_session(pool_size=GITLAB_POOL_SIZE, connect_timeout=None, read_timeout=None)
+
+# NOTE: Shared by all requests, the entries are keyed by a hash of the GitLab token of the user
+_gitlab_cache: TTLCache[tuple[Optional[str], ...], Any] = TTLCache(
+    maxsize=GITLAB_CACHE_SIZE, ttl_seconds=GITLAB_CACHE_TTL_SECONDS
+)
 
 
 class User(ABC):
     access_token = None
     git_token = None
 
-    @lru_cache(maxsize=8)
     def get_renku_project(self, namespace_project) -> Optional[Project]:
-        """Retrieve the GitLab project."""
-        try:
-            return self.gitlab_client.projects.get(f"{namespace_project}")
-        except Exception as e:
-            current_app.logger.warning(f"Cannot get project: {namespace_project} for user: {self.username}, error: {e}")
+        """Retrieve the GitLab project.
+
+        Projects that are found are cached, projects that cannot be retrieved are not.
+        """
+
+        def _get_project() -> Optional[Project]:
+            try:
+                return self.gitlab_client.projects.get(f"{namespace_project}")
+            except Exception as e:
+                current_app.logger.warning(
+                    f"Cannot get project: {namespace_project} for user: {self.username}, error: {e}"
+                )
+
+        return self.cached_gitlab_lookup("project", namespace_project, None, _get_project)
+
+    def cached_gitlab_lookup(
+        self, kind: str, namespace_project: str, ref: Optional[str], lookup: Callable[[], Any]
+    ) -> Any:
+        """Look up a GitLab resource of a project, results that are not None or False are cached.
+
+        The cache is shared by all the requests made with the same GitLab token.
+        """
+        return _gitlab_cache.get_or_load(
+            self._gitlab_cache_key(kind, namespace_project, ref),
+            lookup,
+            ttl_seconds=lambda value: GITLAB_CACHE_TTL_SECONDS if value else 0,
+        )
+
+    def _gitlab_cache_key(self, *key: Optional[str]) -> tuple[Optional[str], ...]:
+        token_hash = hashlib.sha256(self.git_token.encode()).hexdigest() if self.git_token else None
+        return (getattr(self, "git_url", None), token_hash, *key)
 
     @property
     def anonymous(self) -> bool:
@@ -49,7 +91,7 @@ class AnonymousUser(User):
         if not self.authenticated:
             return
         self.git_url = config.git.url
-        self.gitlab_client = Gitlab(self.git_url, api_version=4, per_page=50)
+        self.gitlab_client = Gitlab(self.git_url, api_version=4, per_page=50, session=_gitlab_session)
         self.username = headers[self.auth_header]
         self.safe_username = escapism.escape(self.username, escape_char="-").lower()
         self.full_name = None
@@ -107,13 +149,22 @@ class RegisteredUser(User):
             api_version=4,
             oauth_token=self.git_token,
             per_page=50,
+            session=_gitlab_session,
         )
 
     @property
     def gitlab_user(self):
-        if not getattr(self.gitlab_client, "user", None):
+        """The GitLab user of the token, it is cached for all the requests made with the same token."""
+        if getattr(self.gitlab_client, "user", None):
+            return self.gitlab_client.user
+
+        def _get_gitlab_user():
             self.gitlab_client.auth()
-        return self.gitlab_client.user
+            return self.gitlab_client.user
+
+        return _gitlab_cache.get_or_load(
+            self._gitlab_cache_key("user"), _get_gitlab_user, ttl_seconds=GITLAB_USER_CACHE_TTL_SECONDS
+        )
 
     @staticmethod
     def parse_jwt_from_headers(headers):
@@ -1,6 +1,7 @@
-from flask import Blueprint, Response
+from flask import Blueprint, Response, jsonify
 
 from ..config import config
+from ..util.circuit_breaker import circuit_breakers_metrics
 
 bp = Blueprint("health_blueprint", __name__)
 
@@ -9,3 +10,9 @@ bp = Blueprint("health_blueprint", __name__)
 def health():
     """Just a health check path."""
     return Response(f"service running under {config.service_prefix}")
+
+
+@bp.route("/health/circuit-breakers")
+def circuit_breakers():
+    """The state of the circuit breakers that protect the calls to other services."""
+    return jsonify(circuit_breakers_metrics())
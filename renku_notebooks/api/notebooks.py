@@ -18,12 +18,16 @@
 
 import json
 import logging
+from collections.abc import Callable
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 from datetime import UTC, datetime
+from functools import partial
 from pathlib import Path
-from typing import TYPE_CHECKING, Optional
+from time import monotonic
+from typing import TYPE_CHECKING, Any, Optional
 
 import requests
-from flask import Blueprint, current_app, jsonify
+from flask import Blueprint, Response, current_app, jsonify, stream_with_context, url_for
 from gitlab.const import Visibility as GitlabVisibility
 from marshmallow import ValidationError, fields, validate
 from webargs.flaskparser import use_args
@@ -33,10 +37,12 @@ from renku_notebooks.api.schemas.cloud_storage import RCloneStorage
 from renku_notebooks.util.repository import get_status
 
 from ..config import config
-from ..errors.intermittent import AnonymousUserPatchError, PVDisabledError
+from ..errors.intermittent import AnonymousUserPatchError, LaunchPreflightTimeoutError, PVDisabledError
 from ..errors.programming import ProgrammingError
 from ..errors.user import MissingResourceError, UserInputError
+from ..util.concurrency import run_concurrently, run_stages
 from ..util.cryptography import get_user_key
+from ..util.http import pooled_session
 from ..util.kubernetes_ import (
     find_container,
     renku_1_make_server_name,
@@ -44,11 +50,14 @@ from ..util.kubernetes_ import (
 )
 from .auth import authenticated
 from .classes.auth import GitlabToken, RenkuTokens
-from .classes.image import Image
+from .classes.data_service import CloudStorageConfig
+from .classes.image import Image, ImageInspection, inspect_image
+from .classes.launch_operations import LaunchOperations
 from .classes.repository import Repository
 from .classes.server import Renku1UserServer, Renku2UserServer, UserServer
 from .classes.server_manifest import UserServerManifest
 from .schemas.config_server_options import ServerOptionsEndpointResponse
+from .schemas.launch_operations import LaunchOperationResponse
 from .schemas.logs import ServerLogs
 from .schemas.secrets import K8sUserSecrets
 from .schemas.server_options import ServerOptions
@@ -62,6 +71,16 @@ if TYPE_CHECKING:
 
 bp = Blueprint("notebooks_blueprint", __name__, url_prefix=config.service_prefix)
 
+_secrets_storage_session = pooled_session()
+_launch_operations = LaunchOperations(
+    workers=config.sessions.async_launch_workers,
+    max_pending=config.sessions.async_launch_max_pending,
+    retention_seconds=config.sessions.async_launch_retention_seconds,
+)
+# NOTE: With async=true the session is launched in the background and the response only has
+# the ID of the launch operation which can be polled
+_ASYNC_LAUNCH_ARGS = {"async_launch": fields.Bool(load_default=False, data_key="async")}
+
 
 @bp.route("/version")
 def version():
@@ -127,7 +146,15 @@ def user_servers(user, **query_params):
         - servers
 
     """
-    servers = [UserServerManifest(s) for s in config.k8s.client.list_servers(user.safe_username)]
+    manifests = config.k8s.client.list_servers(user.safe_username)
+    if isinstance(user, RegisteredUser):
+        # NOTE: Refreshing the tokens of hibernated sessions ahead of time makes resuming them faster
+        config.k8s.client.refresh_hibernated_tokens_in_background(
+            manifests,
+            RenkuTokens(access_token=user.access_token, refresh_token=user.refresh_token),
+            GitlabToken(access_token=user.git_token, expires_at=user.git_token_expires_at),
+        )
+    servers = [UserServerManifest(s) for s in manifests]
     filter_attrs = list(filter(lambda x: x[1] is not None, query_params.items()))
     filtered_servers = {}
     ann_prefix = config.session_get_endpoint_annotations.renku_annotation_prefix
@@ -177,6 +204,7 @@ def user_server(user, server_name):
 
 @bp.route("servers", methods=["POST"])
 @use_args(LaunchNotebookRequest(), location="json", as_kwargs=True)
+@use_args(_ASYNC_LAUNCH_ARGS, location="query", as_kwargs=True)
 @authenticated
 def launch_notebook(
     user: AnonymousUser | RegisteredUser,
@@ -194,13 +222,15 @@ def launch_notebook(
     cloudstorage=None,
     server_options=None,
     user_secrets=None,
+    async_launch=False,
 ):
     server_name = renku_1_make_server_name(user.safe_username, namespace, project, branch, commit_sha)
     gl_project = user.get_renku_project(f"{namespace}/{project}")
     gl_project_path = gl_project.path
     server_class = Renku1UserServer
 
-    return launch_notebook_helper(
+    launch = partial(
+        launch_notebook_helper,
         server_name=server_name,
         gl_project=gl_project,
         gl_project_path=gl_project_path,
@@ -225,10 +255,12 @@ def launch_notebook(
         launcher_id=None,
         repositories=None,
     )
+    return _launch_or_submit(launch, server_name, user, async_launch)
 
 
 @bp.route("/v2/servers", methods=["POST"])
 @use_args(Renku2LaunchNotebookRequest(), location="json", as_kwargs=True)
+@use_args(_ASYNC_LAUNCH_ARGS, location="query", as_kwargs=True)
 @authenticated
 def renku_2_launch_notebook_helper(
     user: AnonymousUser | RegisteredUser,
@@ -245,13 +277,15 @@ def renku_2_launch_notebook_helper(
     project_id: str | None = None,  # Renku 2
     launcher_id: str | None = None,  # Renku 2
     repositories: list[dict[str, str]] | None = None,  # Renku 2
+    async_launch=False,
 ):
     server_name = renku_2_make_server_name(
         safe_username=user.safe_username, project_id=project_id, launcher_id=launcher_id
     )
     server_class = Renku2UserServer
 
-    return launch_notebook_helper(
+    launch = partial(
+        launch_notebook_helper,
         server_name=server_name,
         gl_project=None,
         gl_project_path=None,
@@ -276,6 +310,61 @@ def renku_2_launch_notebook_helper(
         launcher_id=launcher_id,
         repositories=repositories,
     )
+    return _launch_or_submit(launch, server_name, user, async_launch)
+
+
+def _launch_or_submit(
+    launch: Callable[[], Any],
+    server_name: str,
+    user: AnonymousUser | RegisteredUser,
+    async_launch: bool,
+):
+    """Launch a session in the request or, if requested, in the background and return the operation."""
+    if not async_launch:
+        return launch()
+    server = config.k8s.client.get_server(server_name, user.safe_username)
+    if server:
+        return NotebookResponse().dump(UserServerManifest(server)), 200
+    operation = _launch_operations.submit(server_name, user.safe_username, launch)
+    location = url_for(".launch_operation", operation_id=operation.id)
+    return LaunchOperationResponse().dump(operation), 202, {"Location": location}
+
+
+@bp.route("operations/<operation_id>", methods=["GET"])
+@use_args({"operation_id": fields.Str(required=True)}, location="view_args", as_kwargs=True)
+@authenticated
+def launch_operation(user, operation_id):
+    """Returns the status of a session launched in the background.
+
+    ---
+    get:
+      description: The status of a session launched with the async query parameter.
+      parameters:
+        - in: path
+          schema:
+            type: string
+          required: true
+          name: operation_id
+          description: The ID of the operation returned when the launch was requested.
+      responses:
+        200:
+          description: The status of the launch.
+          content:
+            application/json:
+              schema: LaunchOperationResponse
+        404:
+          description: The operation does not exist, it has expired or it was started by another replica.
+          content:
+            application/json:
+              schema: ErrorResponse
+      tags:
+        - servers
+
+    """
+    operation = _launch_operations.get(operation_id, user.safe_username)
+    if operation is None:
+        raise MissingResourceError(message=f"The launch operation {operation_id} does not exist.")
+    return jsonify(LaunchOperationResponse().dump(operation))
 
 
 def launch_notebook_helper(
@@ -311,92 +400,139 @@ def launch_notebook_helper(
 
     gl_project_path = gl_project_path if gl_project_path is not None else ""
 
-    # Add annotation for old and new notebooks
-    is_image_private = False
-    using_default_image = False
-    if image:
-        # A specific image was requested
-        parsed_image = Image.from_path(image)
-        image_repo = parsed_image.repo_api()
-        image_exists_publicly = image_repo.image_exists(parsed_image)
-        image_exists_privately = False
-        if not image_exists_publicly and parsed_image.hostname == config.git.registry and user.git_token:
-            image_repo = image_repo.with_oauth2_token(user.git_token)
-            image_exists_privately = image_repo.image_exists(parsed_image)
-        if not image_exists_privately and not image_exists_publicly:
-            using_default_image = True
-            image = config.sessions.default_image
-            parsed_image = Image.from_path(image)
-        if image_exists_privately:
-            is_image_private = True
-    elif gl_project is not None:
-        # An image was not requested specifically, use the one automatically built for the commit
-        image = f"{config.git.registry}/{gl_project.path_with_namespace.lower()}:{commit_sha[:7]}"
-        parsed_image = Image(
-            config.git.registry,
-            gl_project.path_with_namespace.lower(),
-            commit_sha[:7],
-        )
-        # NOTE: a project pulled from the Gitlab API without credentials has no visibility attribute
-        # and by default it can only be public since only public projects are visible to
-        # non-authenticated users. Also, a nice footgun from the Gitlab API Python library.
-        is_image_private = getattr(gl_project, "visibility", GitlabVisibility.PUBLIC) != GitlabVisibility.PUBLIC
-        image_repo = parsed_image.repo_api()
-        if is_image_private and user.git_token:
-            image_repo = image_repo.with_oauth2_token(user.git_token)
-        if not image_repo.image_exists(parsed_image):
-            raise MissingResourceError(
-                message=(
-                    f"Cannot start the session because the following the image {image} does not "
-                    "exist or the user does not have the permissions to access it."
-                )
+    def _find_image() -> tuple[str, ImageInspection, bool, bool]:
+        """Find the image to use and check that it exists.
+
+        Returns the image, its inspection, whether the default image is used and whether the image is private.
+        """
+        is_image_private = False
+        using_default_image = False
+        if image:
+            # A specific image was requested
+            session_image = image
+            parsed_image = Image.from_path(session_image)
+            oauth2_token = user.git_token if parsed_image.hostname == config.git.registry else None
+            image_inspection = inspect_image(parsed_image, oauth2_token)
+            if not image_inspection.exists:
+                using_default_image = True
+                session_image = config.sessions.default_image
+                parsed_image = Image.from_path(session_image)
+                image_inspection = parsed_image.repo_api().inspect(parsed_image)
+            is_image_private = image_inspection.is_private
+        elif gl_project is not None:
+            # An image was not requested specifically, use the one automatically built for the commit
+            session_image = f"{config.git.registry}/{gl_project.path_with_namespace.lower()}:{commit_sha[:7]}"
+            parsed_image = Image(
+                config.git.registry,
+                gl_project.path_with_namespace.lower(),
+                commit_sha[:7],
             )
-    else:
-        raise UserInputError(message="Cannot determine which Docker image to use.")
-
-    if resource_class_id is not None:
-        # A resource class ID was passed in, validate with CRC service
-        parsed_server_options = config.crc_validator.validate_class_storage(user, resource_class_id, storage)
-    elif server_options is not None:
-        if isinstance(server_options, dict):
-            requested_server_options = ServerOptions(
-                memory=server_options["mem_request"],
-                storage=server_options["disk_request"],
-                cpu=server_options["cpu_request"],
-                gpu=server_options["gpu_request"],
-                lfs_auto_fetch=server_options["lfs_auto_fetch"],
-                default_url=server_options["defaultUrl"],
-            )
-        elif isinstance(server_options, ServerOptions):
-            requested_server_options = server_options
+            # NOTE: a project pulled from the Gitlab API without credentials has no visibility attribute
+            # and by default it can only be public since only public projects are visible to
+            # non-authenticated users. Also, a nice footgun from the Gitlab API Python library.
+            is_image_private = getattr(gl_project, "visibility", GitlabVisibility.PUBLIC) != GitlabVisibility.PUBLIC
+            image_repo = parsed_image.repo_api()
+            if is_image_private and user.git_token:
+                image_repo = image_repo.with_oauth2_token(user.git_token)
+            image_inspection = image_repo.inspect(parsed_image)
+            if not image_inspection.exists:
+                raise MissingResourceError(
+                    message=(
+                        f"Cannot start the session because the following the image {session_image} does not "
+                        "exist or the user does not have the permissions to access it."
+                    )
+                )
         else:
-            raise ProgrammingError(
-                message="Got an unexpected type of server options when " f"launching sessions: {type(server_options)}"
-            )
-        # The old style API was used, try to find a matching class from the CRC service
-        parsed_server_options = config.crc_validator.find_acceptable_class(user, requested_server_options)
-        if parsed_server_options is None:
-            raise UserInputError(
-                message="Cannot find suitable server options based on your request and "
-                "the available resource classes.",
-                detail="You are receiving this error because you are using the old API for "
-                "selecting resources. Updating to the new API which includes specifying only "
-                "a specific resource class ID and storage is preferred and more convenient.",
-            )
-    else:
+            raise UserInputError(message="Cannot determine which Docker image to use.")
+        return session_image, image_inspection, using_default_image, is_image_private
+
+    def _get_server_options() -> ServerOptions:
+        requested_storage = storage
+        if resource_class_id is not None:
+            # A resource class ID was passed in, validate with CRC service
+            return config.crc_validator.validate_class_storage(user, resource_class_id, requested_storage)
+        if server_options is not None:
+            if isinstance(server_options, dict):
+                requested_server_options = ServerOptions(
+                    memory=server_options["mem_request"],
+                    storage=server_options["disk_request"],
+                    cpu=server_options["cpu_request"],
+                    gpu=server_options["gpu_request"],
+                    lfs_auto_fetch=server_options["lfs_auto_fetch"],
+                    default_url=server_options["defaultUrl"],
+                )
+            elif isinstance(server_options, ServerOptions):
+                requested_server_options = server_options
+            else:
+                raise ProgrammingError(
+                    message="Got an unexpected type of server options when "
+                    f"launching sessions: {type(server_options)}"
+                )
+            # The old style API was used, try to find a matching class from the CRC service
+            parsed_server_options = config.crc_validator.find_acceptable_class(user, requested_server_options)
+            if parsed_server_options is None:
+                raise UserInputError(
+                    message="Cannot find suitable server options based on your request and "
+                    "the available resource classes.",
+                    detail="You are receiving this error because you are using the old API for "
+                    "selecting resources. Updating to the new API which includes specifying only "
+                    "a specific resource class ID and storage is preferred and more convenient.",
+                )
+            return parsed_server_options
         # No resource class ID specified or old-style server options, use defaults from CRC
         default_resource_class = config.crc_validator.get_default_class()
         max_storage_gb = default_resource_class.get("max_storage", 0)
-        if storage is not None and storage > max_storage_gb:
+        if requested_storage is not None and requested_storage > max_storage_gb:
             raise UserInputError(
                 "The requested storage amount is higher than the "
                 f"allowable maximum for the default resource class of {max_storage_gb}GB."
             )
-        if storage is None:
-            storage = default_resource_class.get("default_storage")
+        if requested_storage is None:
+            requested_storage = default_resource_class.get("default_storage")
         parsed_server_options = ServerOptions.from_resource_class(default_resource_class)
         # Storage in request is in GB
-        parsed_server_options.set_storage(storage, gigabytes=True)
+        parsed_server_options.set_storage(requested_storage, gigabytes=True)
+        return parsed_server_options
+
+    def _get_user_secret_key() -> str:
+        return get_user_key(data_svc_url=config.data_service_url, access_token=user.access_token) or ""
+
+    def _get_storage_configs() -> list[CloudStorageConfig]:
+        try:
+            return RCloneStorage.configs_from_schema(cloudstorage, user=user, endpoint=cloudstorage_endpoint)
+        except ValidationError as e:
+            raise UserInputError(f"Couldn't load cloud storage config: {str(e)}")
+
+    # NOTE: None of the checks with other services depends on the result of another one so they
+    # all run concurrently and the first one that fails stops the launch.
+    preflight_stages: dict[str, Callable[[], Any]] = {
+        "image": _find_image,
+        "server_options": _get_server_options,
+    }
+    if cloudstorage:
+        preflight_stages["user_secret_key"] = _get_user_secret_key
+        preflight_stages["cloud_storage"] = _get_storage_configs
+    preflight_timings: dict[str, float] = {}
+    preflight_started_at = monotonic()
+    try:
+        preflight = run_stages(
+            preflight_stages,
+            timeout=config.sessions.launch_preflight_timeout_seconds,
+            timings=preflight_timings,
+        )
+    except FuturesTimeoutError:
+        raise LaunchPreflightTimeoutError()
+    finally:
+        stage_timings = ", ".join(
+            f"{name} {preflight_timings[name]:.3f}s" if name in preflight_timings else f"{name} unfinished"
+            for name in preflight_stages
+        )
+        current_app.logger.info(
+            f"Launch preflight for {server_name} took {monotonic() - preflight_started_at:.3f}s ({stage_timings})"
+        )
+
+    image, image_inspection, using_default_image, is_image_private = preflight["image"]
+    parsed_server_options = preflight["server_options"]
 
     if default_url is not None:
         parsed_server_options.default_url = default_url
@@ -404,25 +540,23 @@ def launch_notebook_helper(
     if lfs_auto_fetch is not None:
         parsed_server_options.lfs_auto_fetch = lfs_auto_fetch
 
-    image_work_dir = image_repo.image_workdir(parsed_image) or Path("/")
+    image_work_dir = image_inspection.workdir or Path("/")
     mount_path = image_work_dir / "work"
 
     server_work_dir = mount_path / gl_project_path
 
-    storages = []
+    storages: list[RCloneStorage] = []
     if cloudstorage:
-        user_secret_key = get_user_key(data_svc_url=config.data_service_url, access_token=user.access_token) or ""
+        # NOTE: The configurations were validated in the preflight so they are not validated again
         try:
-            for storage in cloudstorage:
-                storages.append(
-                    RCloneStorage.storage_from_schema(
-                        storage,
-                        user=user,
-                        endpoint=cloudstorage_endpoint,
-                        work_dir=server_work_dir.absolute(),
-                        user_secret_key=user_secret_key,
-                    )
+            storages = [
+                RCloneStorage.storage_from_config(
+                    storage_config,
+                    work_dir=server_work_dir.absolute(),
+                    user_secret_key=preflight["user_secret_key"],
                 )
+                for storage_config in preflight["cloud_storage"]
+            ]
         except ValidationError as e:
             raise UserInputError(f"Couldn't load cloud storage config: {str(e)}")
         mount_points = set(s.mount_folder for s in storages if s.mount_folder and s.mount_folder != "/")
@@ -480,23 +614,7 @@ def launch_notebook_helper(
         "uid": manifest["metadata"]["uid"],
     }
 
-    def create_secret(payload, type_message):
-        def _on_error(error_msg):
-            config.k8s.client.delete_server(server.server_name, forced=True, safe_username=user.safe_username)
-            raise RuntimeError(error_msg)
-
-        try:
-            response = requests.post(
-                config.user_secrets.secrets_storage_service_url + "/api/secrets/kubernetes",
-                json=payload,
-                headers={"Authorization": f"bearer {user.access_token}"},
-            )
-        except requests.exceptions.ConnectionError as exc:
-            _on_error(f"{type_message} storage service could not be contacted {exc}")
-        else:
-            if response.status_code != 201:
-                _on_error(f"{type_message} could not be created {response.json()}")
-
+    secret_requests: list[tuple[dict[str, Any], str]] = []
     if k8s_user_secret is not None:
         request_data = {
             "name": k8s_user_secret.name,
@@ -504,8 +622,7 @@ def launch_notebook_helper(
             "secret_ids": [str(id_) for id_ in k8s_user_secret.user_secret_ids],
             "owner_references": [owner_reference],
         }
-
-        create_secret(payload=request_data, type_message="User secrets")
+        secret_requests.append((request_data, "User secrets"))
 
     # NOTE: Create a secret for each storage that has saved secrets
     for cloud_storage in storages:
@@ -517,8 +634,27 @@ def launch_notebook_helper(
                 "owner_references": [owner_reference],
                 "key_mapping": cloud_storage.secrets,
             }
+            secret_requests.append((request_data, "Saved storage secrets"))
 
-            create_secret(payload=request_data, type_message="Saved storage secrets")
+    def create_secret(payload, type_message):
+        try:
+            response = _secrets_storage_session.post(
+                config.user_secrets.secrets_storage_service_url + "/api/secrets/kubernetes",
+                json=payload,
+                headers={"Authorization": f"bearer {user.access_token}"},
+            )
+        except requests.exceptions.RequestException as exc:
+            raise RuntimeError(f"{type_message} storage service could not be contacted {exc}")
+        if response.status_code != 201:
+            raise RuntimeError(f"{type_message} could not be created {response.json()}")
+
+    # NOTE: The session waits for all of its secrets so they are created concurrently. If any of them
+    # cannot be created the session is deleted, its owner references also delete the created secrets.
+    try:
+        run_concurrently(*[partial(create_secret, payload, type_message) for payload, type_message in secret_requests])
+    except Exception:
+        config.k8s.client.delete_server(server.server_name, forced=True, safe_username=user.safe_username)
+        raise
 
     return NotebookResponse().dump(UserServerManifest(manifest)), 201
 
@@ -688,9 +824,16 @@ def patch_server(user, server_name, patch_body):
         }
         # NOTE: The tokens in the session could expire if the session is hibernated long enough,
         # here we inject new ones to make sure everything is valid when the session starts back up.
-        renku_tokens = RenkuTokens(access_token=user.access_token, refresh_token=user.refresh_token)
-        gitlab_token = GitlabToken(access_token=user.git_token, expires_at=user.git_token_expires_at)
-        config.k8s.client.patch_tokens(server_name, renku_tokens, gitlab_token)
+        # This is skipped if the tokens were recently refreshed in the background and the Renku
+        # access token stays valid long enough for the init containers that use it.
+        if not config.k8s.client.tokens_are_fresh(server):
+            renku_tokens = RenkuTokens(access_token=user.access_token, refresh_token=user.refresh_token)
+            gitlab_token = GitlabToken(access_token=user.git_token, expires_at=user.git_token_expires_at)
+            config.k8s.client.patch_tokens(
+                server_name, renku_tokens, gitlab_token, server.get("metadata", {}).get("namespace")
+            )
+            annotations = config.k8s.client.tokens_refreshed_annotations(renku_tokens, gitlab_token)
+            patch["metadata"] = {"annotations": annotations}
         new_server = config.k8s.client.patch_server(
             server_name=server_name, safe_username=user.safe_username, patch=patch
         )
@@ -779,7 +922,12 @@ def server_options(_):
         "max_lines": fields.Integer(
             load_default=250,
             validate=validate.Range(min=0, max=None, min_inclusive=True),
-        )
+        ),
+        "since_seconds": fields.Integer(load_default=None, validate=validate.Range(min=1)),
+        "limit_bytes": fields.Integer(load_default=None, validate=validate.Range(min=1)),
+        "stream": fields.Boolean(load_default=False),
+        "follow": fields.Boolean(load_default=False),
+        "container": fields.String(load_default=None),
     },
     as_kwargs=True,
     location="query",
@@ -792,7 +940,7 @@ def server_options(_):
     as_kwargs=True,
 )
 @authenticated
-def server_logs(user, max_lines, server_name):
+def server_logs(user, max_lines, since_seconds, limit_bytes, stream, follow, container, server_name):
     """Return the logs of the running server.
 
     ---
@@ -814,12 +962,58 @@ def server_logs(user, max_lines, server_name):
           required: false
           description: |
             The maximum number of (most recent) lines to return from the logs.
+        - in: query
+          schema:
+            type: integer
+            minimum: 1
+          name: since_seconds
+          required: false
+          description: Only return the logs of the last number of seconds.
+        - in: query
+          schema:
+            type: integer
+            minimum: 1
+          name: limit_bytes
+          required: false
+          description: The maximum number of bytes to return from the logs of each container.
+        - in: query
+          schema:
+            type: boolean
+            default: false
+          name: stream
+          required: false
+          description: |
+            Stream the logs as newline delimited JSON, one object with the container
+            name and the log line per line of the logs.
+        - in: query
+          schema:
+            type: boolean
+            default: false
+          name: follow
+          required: false
+          description: |
+            Keep streaming new log lines until the container stops, only used when streaming
+            and requires the container to be specified if the session has more than one container.
+        - in: query
+          schema:
+            type: string
+          name: container
+          required: false
+          description: Only stream the logs of this container.
       responses:
         200:
           description: Server logs. An array of strings where each element is a line of the logs.
           content:
             application/json:
               schema: ServerLogs
+            application/x-ndjson:
+              schema:
+                type: object
+                properties:
+                  container:
+                    type: string
+                  log:
+                    type: string
         404:
           description: The specified server does not exist.
           content:
@@ -829,10 +1023,24 @@ def server_logs(user, max_lines, server_name):
         - logs
 
     """
+    if stream:
+        lines = config.k8s.client.stream_server_logs(
+            server_name=server_name,
+            safe_username=user.safe_username,
+            container_name=container,
+            max_log_lines=max_lines,
+            since_seconds=since_seconds,
+            limit_bytes=limit_bytes,
+            follow=follow,
+        )
+        ndjson = (json.dumps({"container": name, "log": line}) + "\n" for name, line in lines)
+        return Response(stream_with_context(ndjson), mimetype="application/x-ndjson")
     logs = config.k8s.client.get_server_logs(
         server_name=server_name,
         max_log_lines=max_lines,
         safe_username=user.safe_username,
+        since_seconds=since_seconds,
+        limit_bytes=limit_bytes,
     )
     return jsonify(ServerLogs().dump(logs))
 
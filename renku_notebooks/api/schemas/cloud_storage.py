@@ -1,6 +1,7 @@
 """Schema for cloudstorage config."""
 
 from configparser import ConfigParser
+from functools import partial
 from io import StringIO
 from pathlib import Path
 from typing import Any, Optional
@@ -8,6 +9,8 @@ from typing import Any, Optional
 from marshmallow import EXCLUDE, Schema, ValidationError, fields, validates_schema
 
 from ...config import config
+from ...util.concurrency import run_concurrently
+from ..classes.data_service import CloudStorageConfig
 from ..classes.user import User
 
 
@@ -45,7 +48,6 @@ class RCloneStorage:
         secrets: dict[str, str],
         user_secret_key: str,
     ) -> None:
-        config.storage_validator.validate_storage_configuration(configuration, source_path)
         self.configuration = configuration
         self.source_path = source_path
         self.mount_folder = mount_folder
@@ -58,30 +60,57 @@ class RCloneStorage:
     @classmethod
     def storage_from_schema(cls, data: dict[str, Any], user: User, endpoint: str, work_dir: Path, user_secret_key: str):
         """Create storage object from request."""
-        name = None
+        storage_config = cls.valid_config_from_schema(data, user, endpoint)
+        return cls.storage_from_config(storage_config, work_dir, user_secret_key)
+
+    @staticmethod
+    def config_from_schema(data: dict[str, Any], user: User, endpoint: str) -> CloudStorageConfig:
+        """Get the storage configuration for a request, loading it from the storage service if needed."""
         if data.get("storage_id"):
             # Load from storage service
             if user.access_token is None:
                 raise ValidationError("Storage mounting is only supported for logged-in users.")
-            (
-                configuration,
-                source_path,
-                target_path,
-                readonly,
-                name,
-                secrets,
-            ) = config.storage_validator.get_storage_by_id(user, endpoint, data["storage_id"])
-            configuration = {**configuration, **(data.get("configuration", {}))}
-            readonly = readonly
-        else:
-            source_path = data["source_path"]
-            target_path = data["target_path"]
-            configuration = data["configuration"]
-            readonly = data.get("readonly", True)
-            secrets = {}
-        mount_folder = str(work_dir / target_path)
-
-        return cls(source_path, configuration, readonly, mount_folder, name, secrets, user_secret_key)
+            storage_config = config.storage_validator.get_storage_by_id(user, endpoint, data["storage_id"])
+            return storage_config._replace(config={**storage_config.config, **(data.get("configuration") or {})})
+        return CloudStorageConfig(
+            config=data["configuration"],
+            source_path=data["source_path"],
+            target_path=data["target_path"],
+            readonly=data.get("readonly", True),
+            name=None,
+            secrets={},
+        )
+
+    @classmethod
+    def valid_config_from_schema(cls, data: dict[str, Any], user: User, endpoint: str) -> CloudStorageConfig:
+        """Get the storage configuration for a request and validate it."""
+        storage_config = cls.config_from_schema(data, user, endpoint)
+        config.storage_validator.validate_storage_configuration(storage_config.config, storage_config.source_path)
+        return storage_config
+
+    @classmethod
+    def configs_from_schema(cls, data: list[dict[str, Any]], user: User, endpoint: str) -> list[CloudStorageConfig]:
+        """Get and validate the storage configurations for all the storages of a request concurrently."""
+        return run_concurrently(
+            *[partial(cls.valid_config_from_schema, storage_request, user, endpoint) for storage_request in data]
+        )
+
+    @classmethod
+    def storage_from_config(cls, storage_config: CloudStorageConfig, work_dir: Path, user_secret_key: str):
+        """Create storage object from a storage configuration mounted relative to the working directory.
+
+        The configuration is not validated again, it has to come from valid_config_from_schema.
+        """
+        mount_folder = str(work_dir / storage_config.target_path)
+        return cls(
+            storage_config.source_path,
+            storage_config.config,
+            storage_config.readonly,
+            mount_folder,
+            storage_config.name,
+            storage_config.secrets,
+            user_secret_key,
+        )
 
     def get_manifest_patch(self, base_name: str, namespace: str, labels={}, annotations={}) -> list[dict[str, Any]]:
         """Get server manifest patch."""
@@ -0,0 +1,17 @@
+"""Schema for the status of sessions launched in the background."""
+
+from marshmallow import Schema, fields
+
+from ..classes.launch_operations import LaunchOperationStatus
+from .errors import ErrorResponseNested
+
+
+class LaunchOperationResponse(Schema):
+    """The status of a session launched in the background."""
+
+    id = fields.Str(required=True)
+    server_name = fields.Str(required=True)
+    status = fields.Enum(LaunchOperationStatus, by_value=True, required=True)
+    created_at = fields.DateTime(format="iso", required=True)
+    updated_at = fields.DateTime(format="iso", required=True)
+    error = fields.Nested(ErrorResponseNested(), allow_none=True)
@@ -6,13 +6,16 @@ from typing import TYPE_CHECKING, Any, Optional, Protocol, Union
 
 import dataconf
 
-from ..api.classes.k8s_client import JsServerCache, K8sClient, NamespacedK8sClient
+from ..api.classes.k8s_client import JsServerCache, K8sClient, NamespacedK8sClient, ServerCacheProto
+from ..api.classes.k8s_informer import JupyterServerInformer
+from ..util.circuit_breaker import CircuitBreaker
 from .dynamic import (
     _AmaltheaConfig,
     _CloudStorage,
     _GitConfig,
     _K8sConfig,
     _parse_str_as_bool,
+    _parse_value_as_float,
     _SentryConfig,
     _ServerOptionsConfig,
     _SessionConfig,
@@ -72,11 +75,19 @@ class _NotebooksConfig:
     keycloak_realm: str = "Renku"
     data_service_url: str = "http://renku-data-service"
     dummy_stores: Union[str, bool] = False
+    resource_pools_cache_seconds: Union[str, float] = 30
+    git_providers_cache_seconds: Union[str, float] = 300
+    git_connections_cache_seconds: Union[str, float] = 10
+    storage_validation_cache_seconds: Union[str, float] = 600
 
     def __post_init__(self):
         self.anonymous_sessions_enabled = _parse_str_as_bool(self.anonymous_sessions_enabled)
         self.ssh_enabled = _parse_str_as_bool(self.ssh_enabled)
         self.dummy_stores = _parse_str_as_bool(self.dummy_stores)
+        self.resource_pools_cache_seconds = _parse_value_as_float(self.resource_pools_cache_seconds)
+        self.git_providers_cache_seconds = _parse_value_as_float(self.git_providers_cache_seconds)
+        self.git_connections_cache_seconds = _parse_value_as_float(self.git_connections_cache_seconds)
+        self.storage_validation_cache_seconds = _parse_value_as_float(self.storage_validation_cache_seconds)
         self.session_get_endpoint_annotations = _ServersGetEndpointAnnotations()
         if not self.k8s.enabled:
             return
@@ -86,6 +97,9 @@ class _NotebooksConfig:
             self.amalthea.group,
             self.amalthea.version,
             self.amalthea.plural,
+            list_page_size=self.k8s.list_page_size,
+            list_from_apiserver_cache=self.k8s.list_from_apiserver_cache,
+            project_servers=self.k8s.project_server_fields,
         )
         session_ns_client = None
         if self.k8s.sessions_namespace:
@@ -94,14 +108,40 @@ class _NotebooksConfig:
                 self.amalthea.group,
                 self.amalthea.version,
                 self.amalthea.plural,
+                list_page_size=self.k8s.list_page_size,
+                list_from_apiserver_cache=self.k8s.list_from_apiserver_cache,
+                project_servers=self.k8s.project_server_fields,
+            )
+        js_cache: ServerCacheProto
+        if self.k8s.informer_enabled:
+            # NOTE: The servers are watched directly from the k8s API so the k8s-watcher is not needed
+            js_cache = JupyterServerInformer(
+                [c for c in [renku_ns_client, session_ns_client] if c is not None],
+                username_label=username_label,
+                watch_timeout_seconds=self.k8s.informer_watch_timeout_seconds,
+            )
+        else:
+            js_cache = JsServerCache(
+                self.amalthea.cache_url,
+                pool_size=self.amalthea.cache_pool_size,
+                connect_timeout=self.amalthea.cache_connect_timeout_seconds,
+                read_timeout=self.amalthea.cache_read_timeout_seconds,
+                retries=self.amalthea.cache_retries,
+                circuit_breaker=CircuitBreaker(
+                    "jupyter-server-cache",
+                    failure_threshold=self.amalthea.cache_breaker_failure_threshold,
+                    open_seconds=self.amalthea.cache_breaker_open_seconds,
+                ),
             )
-        js_cache = JsServerCache(self.amalthea.cache_url)
         self.k8s.client = K8sClient(
             js_cache=js_cache,
             renku_ns_client=renku_ns_client,
             session_ns_client=session_ns_client,
             username_label=username_label,
             bypass_cache_on_failure=self.k8s.bypass_cache_on_failure,
+            cache_wait_timeout_seconds=self.k8s.cache_wait_timeout_seconds,
+            token_refresh_interval_seconds=self.k8s.token_refresh_interval_seconds,
+            fallback_cache_seconds=self.k8s.fallback_cache_seconds,
         )
         self._crc_validator = None
         self._storage_validator = None
@@ -115,7 +155,9 @@ class _NotebooksConfig:
             if self.dummy_stores:
                 self._crc_validator = DummyCRCValidator()
             else:
-                self._crc_validator = CRCValidator(self.data_service_url)
+                self._crc_validator = CRCValidator(
+                    self.data_service_url, pools_cache_seconds=self.resource_pools_cache_seconds
+                )
 
         return self._crc_validator
 
@@ -127,7 +169,9 @@ class _NotebooksConfig:
             if self.dummy_stores:
                 self._storage_validator = DummyStorageValidator()
             else:
-                self._storage_validator = StorageValidator(self.data_service_url)
+                self._storage_validator = StorageValidator(
+                    self.data_service_url, validation_cache_seconds=self.storage_validation_cache_seconds
+                )
 
         return self._storage_validator
 
@@ -143,6 +187,8 @@ class _NotebooksConfig:
                     service_url=self.data_service_url,
                     renku_url="https://" + self.sessions.ingress.host,
                     internal_gitlab_url=config.git.url,
+                    providers_cache_seconds=self.git_providers_cache_seconds,
+                    connections_cache_seconds=self.git_connections_cache_seconds,
                 )
 
         return self._git_provider_helper
@@ -136,6 +136,20 @@ class _AmaltheaConfig:
     group: str = "amalthea.dev"
     version: str = "v1alpha1"
     plural: str = "jupyterservers"
+    cache_pool_size: Union[str, int] = 10
+    cache_connect_timeout_seconds: Union[str, float] = 1
+    cache_read_timeout_seconds: Union[str, float] = 5
+    cache_retries: Union[str, int] = 2
+    cache_breaker_failure_threshold: Union[str, int] = 5
+    cache_breaker_open_seconds: Union[str, float] = 30
+
+    def __post_init__(self):
+        self.cache_pool_size = _parse_value_as_int(self.cache_pool_size)
+        self.cache_connect_timeout_seconds = _parse_value_as_float(self.cache_connect_timeout_seconds)
+        self.cache_read_timeout_seconds = _parse_value_as_float(self.cache_read_timeout_seconds)
+        self.cache_retries = _parse_value_as_int(self.cache_retries)
+        self.cache_breaker_failure_threshold = _parse_value_as_int(self.cache_breaker_failure_threshold)
+        self.cache_breaker_open_seconds = _parse_value_as_float(self.cache_breaker_open_seconds)
 
 
 @dataclass
@@ -210,6 +224,10 @@ class _SessionConfig:
     node_selector: str = "{}"
     affinity: str = "{}"
     tolerations: str = "[]"
+    launch_preflight_timeout_seconds: Union[str, float] = 60
+    async_launch_workers: Union[str, int] = 4
+    async_launch_max_pending: Union[str, int] = 50
+    async_launch_retention_seconds: Union[str, float] = 3600
     init_containers: list[str] = field(
         default_factory=lambda: [
             "init-certificates",
@@ -222,6 +240,10 @@ class _SessionConfig:
         self.node_selector = yaml.safe_load(self.node_selector)
         self.affinity = yaml.safe_load(self.affinity)
         self.tolerations = yaml.safe_load(self.tolerations)
+        self.launch_preflight_timeout_seconds = _parse_value_as_float(self.launch_preflight_timeout_seconds)
+        self.async_launch_workers = _parse_value_as_int(self.async_launch_workers)
+        self.async_launch_max_pending = _parse_value_as_int(self.async_launch_max_pending)
+        self.async_launch_retention_seconds = _parse_value_as_float(self.async_launch_retention_seconds)
 
 
 @dataclass
@@ -232,10 +254,26 @@ class _K8sConfig:
     sessions_namespace: Optional[str] = None
     enabled: Union[str, bool] = True
     bypass_cache_on_failure: Union[str, bool] = True
+    informer_enabled: Union[str, bool] = False
+    informer_watch_timeout_seconds: Union[str, int] = 300
+    cache_wait_timeout_seconds: Union[str, float] = 10
+    list_page_size: Union[str, int] = 500
+    list_from_apiserver_cache: Union[str, bool] = False
+    token_refresh_interval_seconds: Union[str, float] = 600
+    fallback_cache_seconds: Union[str, float] = 2
+    project_server_fields: Union[str, bool] = True
 
     def __post_init__(self):
         self.enabled = _parse_str_as_bool(self.enabled)
         self.bypass_cache_on_failure = _parse_str_as_bool(self.bypass_cache_on_failure)
+        self.informer_enabled = _parse_str_as_bool(self.informer_enabled)
+        self.informer_watch_timeout_seconds = _parse_value_as_int(self.informer_watch_timeout_seconds)
+        self.cache_wait_timeout_seconds = _parse_value_as_float(self.cache_wait_timeout_seconds)
+        self.list_page_size = _parse_value_as_int(self.list_page_size)
+        self.list_from_apiserver_cache = _parse_str_as_bool(self.list_from_apiserver_cache)
+        self.token_refresh_interval_seconds = _parse_value_as_float(self.token_refresh_interval_seconds)
+        self.fallback_cache_seconds = _parse_value_as_float(self.fallback_cache_seconds)
+        self.project_server_fields = _parse_str_as_bool(self.project_server_fields)
 
 
 @dataclass
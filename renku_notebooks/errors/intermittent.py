@@ -91,3 +91,21 @@ class AnonymousUserPatchError(IntermittentError):
     message: str = "Cannot patch sessions of anonymous users."
     code: int = IntermittentError.code + 7
     status_code: int = 422
+
+
+@dataclass
+class LaunchPreflightTimeoutError(IntermittentError):
+    """Raised when the checks with other services before launching a session do not finish in time."""
+
+    message: str = "Checking the session launch request with other services took too long, please try again later."
+    code: int = IntermittentError.code + 8
+    status_code: int = 504
+
+
+@dataclass
+class LaunchQueueFullError(IntermittentError):
+    """Raised when too many sessions are already being launched in the background."""
+
+    message: str = "Too many sessions are being launched at the moment, please try again later."
+    code: int = IntermittentError.code + 9
+    status_code: int = 503
@@ -0,0 +1,108 @@
+"""A small thread safe in-memory cache with expiring entries."""
+
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from concurrent.futures import Future
+from time import monotonic
+from typing import Any, Generic, Optional, TypeVar, Union
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+_MISSING = object()
+
+
+class TTLCache(Generic[K, V]):
+    """A least recently used cache whose entries expire after a time to live.
+
+    The cache is safe to share between threads and greenlets. When the cache is full the
+    least recently used entry is evicted. None is a valid value that can be cached.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl_seconds: float = 60.0, timer: Callable[[], float] = monotonic):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._timer = timer
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._loading: dict[K, Future] = {}
+
+    def get(self, key: K, default: Any = None) -> Any:
+        with self._lock:
+            return self._get(key, default)
+
+    def _get(self, key: K, default: Any) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at <= self._timer():
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: K, value: V, ttl_seconds: Optional[float] = None):
+        """Store a value, the default time to live of the cache is used if ttl_seconds is not specified."""
+        ttl_seconds = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        if ttl_seconds <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self._timer() + ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: K, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __contains__(self, key: K) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def get_or_load(
+        self,
+        key: K,
+        loader: Callable[[], V],
+        ttl_seconds: Union[float, Callable[[V], Optional[float]], None] = None,
+    ) -> V:
+        """Get a value from the cache or load and store it if it is missing or expired.
+
+        Concurrent calls for the same missing key are coalesced, only the first one calls the
+        loader and the others wait for its result. Exceptions raised by the loader are passed
+        to all the waiting callers and are not cached. The time to live can be a function of
+        the loaded value, for example to cache missing values for a shorter time.
+        """
+        with self._lock:
+            value = self._get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+            future = self._loading.get(key)
+            is_loader = future is None
+            if is_loader:
+                future = Future()
+                self._loading[key] = future
+        if not is_loader:
+            return future.result()
+        try:
+            value = loader()
+        except BaseException as err:
+            future.set_exception(err)
+            raise
+        else:
+            self.set(key, value, ttl_seconds(value) if callable(ttl_seconds) else ttl_seconds)
+            future.set_result(value)
+            return value
+        finally:
+            with self._lock:
+                self._loading.pop(key, None)
@@ -0,0 +1,119 @@
+"""A circuit breaker that stops calling a dependency that keeps failing."""
+
+import logging
+import threading
+from collections.abc import Callable
+from enum import Enum
+from time import monotonic
+from typing import Any
+from weakref import WeakSet
+
+_circuit_breakers: "WeakSet[CircuitBreaker]" = WeakSet()
+_circuit_breakers_lock = threading.Lock()
+
+
+class CircuitState(Enum):
+    closed = "closed"
+    open = "open"
+    half_open = "half_open"
+
+
+class CircuitBreaker:
+    """Keeps track of the failures of calls to a dependency.
+
+    The circuit opens after failure_threshold consecutive failures. While it is open no calls
+    are allowed. After open_seconds a single probe call is allowed (half open), if it succeeds
+    the circuit closes again, otherwise it stays open for another open_seconds.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        open_seconds: float = 30,
+        timer: Callable[[], float] = monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self._timer = timer
+        self._lock = threading.Lock()
+        self._state = CircuitState.closed
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self.opened_total = 0
+        self.rejected_total = 0
+        with _circuit_breakers_lock:
+            _circuit_breakers.add(self)
+
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            if self._state == CircuitState.open and self._timer() - self._opened_at >= self.open_seconds:
+                return CircuitState.half_open
+            return self._state
+
+    def allow_request(self) -> bool:
+        """Whether a call can be made now, a caller that is allowed has to record the outcome of the call."""
+        with self._lock:
+            if self._state == CircuitState.closed:
+                return True
+            if self._state == CircuitState.open and self._timer() - self._opened_at >= self.open_seconds:
+                self._set_state(CircuitState.half_open)
+            if self._state == CircuitState.half_open and not self._probing:
+                self._probing = True
+                return True
+            self.rejected_total += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._consecutive_failures = 0
+            self._probing = False
+            if self._state != CircuitState.closed:
+                self._set_state(CircuitState.closed)
+
+    def record_failure(self):
+        with self._lock:
+            self._consecutive_failures += 1
+            self._probing = False
+            if self._state == CircuitState.half_open or (
+                self._state == CircuitState.closed and self._consecutive_failures >= self.failure_threshold
+            ):
+                self._opened_at = self._timer()
+                self.opened_total += 1
+                self._set_state(CircuitState.open)
+
+    def cancel_request(self):
+        """Forget an allowed call whose outcome is unknown, for example because it was interrupted.
+
+        This makes sure that an interrupted probe call does not keep a half open circuit from
+        allowing another probe.
+        """
+        with self._lock:
+            self._probing = False
+
+    def metrics(self) -> dict[str, Any]:
+        """The current state of the circuit and its counters."""
+        return {
+            "name": self.name,
+            "state": self.state.value,
+            "consecutive_failures": self._consecutive_failures,
+            "opened_total": self.opened_total,
+            "rejected_total": self.rejected_total,
+        }
+
+    def _set_state(self, state: CircuitState):
+        if state == self._state:
+            return
+        log = logging.info if state == CircuitState.closed else logging.warning
+        log(f"Circuit breaker {self.name} changed from {self._state.value} to {state.value}.")
+        self._state = state
+
+
+def circuit_breakers_metrics() -> list[dict[str, Any]]:
+    """The state and the counters of all the circuit breakers."""
+    with _circuit_breakers_lock:
+        circuit_breakers = list(_circuit_breakers)
+    return sorted((circuit_breaker.metrics() for circuit_breaker in circuit_breakers), key=lambda m: m["name"])
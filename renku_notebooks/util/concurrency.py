@@ -0,0 +1,90 @@
+"""Helpers to run blocking calls concurrently."""
+
+import contextvars
+import logging
+import threading
+from collections.abc import Callable
+from concurrent.futures import FIRST_EXCEPTION, Future, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from time import monotonic
+from typing import Any, Optional
+
+
+def run_concurrently(*funcs: Callable[[], Any], timeout: Optional[float] = None) -> list[Any]:
+    """Call the functions concurrently and return their results in the same order.
+
+    When gevent has monkey patched the standard library the functions run in greenlets. Each
+    function runs in a copy of the caller's context so that the flask application and request
+    contexts are available in it. As soon as one function raises, its exception is re-raised
+    without waiting for the others. If not all functions are done when the timeout expires a
+    concurrent.futures.TimeoutError is raised.
+    """
+    if len(funcs) == 0:
+        return []
+    if len(funcs) == 1 and timeout is None:
+        return [funcs[0]()]
+    executor = ThreadPoolExecutor(max_workers=len(funcs))
+    try:
+        futures = [executor.submit(contextvars.copy_context().run, func) for func in funcs]
+        done, not_done = wait(futures, timeout=timeout, return_when=FIRST_EXCEPTION)
+        for future in futures:
+            if future in done and future.exception() is not None:
+                raise future.exception()
+        if not_done:
+            raise FuturesTimeoutError(f"{len(not_done)} of {len(futures)} calls did not finish in {timeout} seconds.")
+        return [future.result() for future in futures]
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def run_stages(
+    stages: dict[str, Callable[[], Any]],
+    timeout: Optional[float] = None,
+    timings: Optional[dict[str, float]] = None,
+) -> dict[str, Any]:
+    """Run named functions concurrently like run_concurrently and return their results by name.
+
+    The time each function took in seconds is stored in timings as soon as it finishes, so
+    that the caller can report it also when one of the functions failed or timed out.
+    """
+    timings = timings if timings is not None else {}
+
+    def _timed(name: str, func: Callable[[], Any]) -> Callable[[], Any]:
+        def _run():
+            started_at = monotonic()
+            try:
+                return func()
+            finally:
+                timings[name] = monotonic() - started_at
+
+        return _run
+
+    results = run_concurrently(*[_timed(name, func) for name, func in stages.items()], timeout=timeout)
+    return dict(zip(stages.keys(), results))
+
+
+_background_executor: Optional[ThreadPoolExecutor] = None
+_background_executor_lock = threading.Lock()
+BACKGROUND_WORKERS = 4
+
+
+def run_in_background(func: Callable[..., Any], *args, **kwargs) -> Future:
+    """Call a function in a shared pool of background workers without waiting for the result.
+
+    Unlike run_concurrently, the function does not run in the caller's context because it
+    can outlive the request that submitted it. Exceptions are logged and kept in the future.
+    """
+    global _background_executor
+    with _background_executor_lock:
+        if _background_executor is None:
+            _background_executor = ThreadPoolExecutor(
+                max_workers=BACKGROUND_WORKERS, thread_name_prefix="background-worker"
+            )
+    future = _background_executor.submit(func, *args, **kwargs)
+    future.add_done_callback(_log_background_exception)
+    return future
+
+
+def _log_background_exception(future: Future):
+    if not future.cancelled() and future.exception() is not None:
+        logging.error("A background task failed", exc_info=future.exception())
@@ -1,27 +1,58 @@
 """Utility functions to get users' secret key."""
 
 import base64
+import hashlib
 import logging
+from collections.abc import Callable
+from time import monotonic, time
+from typing import Any, Optional
 
+import jwt
 import requests
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from gevent import get_hub, monkey
+
+from .caching import TTLCache
+
+PBKDF2_ITERATIONS = 480000
+USER_KEY_CACHE_SIZE = 1024
+# NOTE: Used for access tokens whose expiry cannot be read
+USER_KEY_DEFAULT_TTL_SECONDS = 60
+USER_KEY_EXPIRY_MARGIN_SECONDS = 10
+
+_user_key_cache: TTLCache[tuple[str, str], Optional[str]] = TTLCache(
+    maxsize=USER_KEY_CACHE_SIZE, ttl_seconds=USER_KEY_DEFAULT_TTL_SECONDS
+)
 
 
 def get_encryption_key(password: bytes, salt: bytes) -> bytes:
-    """Derive an encryption key."""
-    kdf = PBKDF2HMAC(
-        algorithm=hashes.SHA256(),
-        length=32,
-        salt=salt,
-        iterations=480000,
-    )
-    return base64.urlsafe_b64encode(kdf.derive(password))
+    """Derive an encryption key.
+
+    The key derivation is CPU bound and takes a few hundred milliseconds. When gevent has monkey
+    patched the standard library it runs in a native thread so that other greenlets are not blocked.
+    """
+    started_at = monotonic()
+    key = _run_in_native_thread(hashlib.pbkdf2_hmac, "sha256", password, salt, PBKDF2_ITERATIONS, 32)
+    logging.info(f"Deriving an encryption key took {monotonic() - started_at:.3f}s")
+    return base64.urlsafe_b64encode(key)
+
 
+def get_user_key(data_svc_url: str, access_token: Optional[str]) -> str | None:
+    """Get the users decryption key.
+
+    The key is cached until the access token expires. Failures to get the key are not cached.
+    Anonymous users have no access token and no key.
+    """
+    if access_token is None:
+        return None
+    cache_key = (data_svc_url, hashlib.sha256(access_token.encode()).hexdigest())
+    return _user_key_cache.get_or_load(
+        cache_key,
+        lambda: _get_user_key(data_svc_url, access_token),
+        ttl_seconds=lambda user_key: _access_token_ttl_seconds(access_token) if user_key is not None else 0,
+    )
 
-def get_user_key(data_svc_url: str, access_token: str) -> str | None:
-    """Get the users decryption key."""
 
+def _get_user_key(data_svc_url: str, access_token: str) -> str | None:
     response = requests.get(f"{data_svc_url}/user", headers={"Authorization": f"Bearer {access_token}"})
     if response.status_code != 200:
         logging.error(f"Couldn't get user info: {response.json()}")
@@ -40,3 +71,21 @@ def get_user_key(data_svc_url: str, access_token: str) -> str | None:
     user_key = response.json()
 
     return get_encryption_key(user_key["secret_key"].encode(), user_id.encode()).decode("utf-8")
+
+
+def _access_token_ttl_seconds(access_token: str) -> float:
+    """How long a value derived from the access token can be cached."""
+    try:
+        # No need to verify the signature because the token is only used to bound the cache lifetime
+        exp = jwt.decode(access_token, options={"verify_signature": False}).get("exp")
+    except jwt.PyJWTError:
+        return USER_KEY_DEFAULT_TTL_SECONDS
+    if not isinstance(exp, int | float):
+        return USER_KEY_DEFAULT_TTL_SECONDS
+    return exp - time() - USER_KEY_EXPIRY_MARGIN_SECONDS
+
+
+def _run_in_native_thread(func: Callable[..., Any], *args) -> Any:
+    if monkey.is_module_patched("threading"):
+        return get_hub().threadpool.apply(func, args)
+    return func(*args)
@@ -0,0 +1,59 @@
+"""Shared HTTP client helpers."""
+
+from http.cookiejar import DefaultCookiePolicy
+from typing import Optional, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+Timeout = Union[float, tuple[Optional[float], Optional[float]], None]
+
+
+class TimeoutSession(requests.Session):
+    """A requests session that applies a default timeout to every request it sends.
+
+    A timeout passed explicitly to a single request takes precedence over the default.
+    """
+
+    def __init__(self, timeout: Timeout = None):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+def pooled_session(
+    pool_size: int = 10,
+    connect_timeout: Optional[float] = 5.0,
+    read_timeout: Optional[float] = 30.0,
+    retries: int = 0,
+    backoff_factor: float = 0.1,
+) -> TimeoutSession:
+    """Create a session that keeps a pool of keep-alive connections per host.
+
+    The connection pool is safe to share between greenlets when gevent has monkey patched
+    the standard library. Only idempotent requests (GET and HEAD) are retried, on connection
+    errors, read errors and on 502, 503 and 504 responses. The session is shared between the
+    requests of different users, so it does not store cookies that one response sets and that
+    would otherwise be sent along with the requests of other users.
+    """
+    session = TimeoutSession(timeout=(connect_timeout, read_timeout))
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        other=0,
+        backoff_factor=backoff_factor,
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        status_forcelist=(502, 503, 504),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
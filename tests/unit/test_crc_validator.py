@@ -0,0 +1,170 @@
+import os
+import random
+import time
+
+import pytest
+import responses
+
+from renku_notebooks.api.classes.data_service import CRCValidator
+from renku_notebooks.api.schemas.server_options import ServerOptions
+from renku_notebooks.errors.programming import ConfigurationError
+from renku_notebooks.errors.user import InvalidComputeResourceError
+
+
+def _resource_class(id, cpu=1, memory=2, gpu=0, default_storage=1, max_storage=10, default=False, matching=True):
+    return {
+        "id": id,
+        "name": f"class {id}",
+        "cpu": cpu,
+        "memory": memory,
+        "gpu": gpu,
+        "default_storage": default_storage,
+        "max_storage": max_storage,
+        "default": default,
+        "matching": matching,
+    }
+
+
+def _pools(*classes):
+    return [
+        {"id": 1, "name": "default", "default": True, "classes": [_resource_class(1, default=True)], "quota": None},
+        {"id": 2, "name": "other", "default": False, "classes": list(classes), "quota": {"id": "quota"}},
+    ]
+
+
+@pytest.fixture
+def user(mocker):
+    user = mocker.MagicMock()
+    user.access_token = "token"
+    return user
+
+
+@responses.activate
+def test_resource_pools_are_cached(user):
+    responses.get("http://crc/resource_pools", json=_pools(_resource_class(2, cpu=2)))
+    crc_validator = CRCValidator("http://crc/", pools_cache_seconds=30)
+
+    options = crc_validator.validate_class_storage(user, 2, storage=5)
+    assert options.cpu == 2
+    assert options.priority_class == "quota"
+    assert crc_validator.validate_class_storage(user, 1).resource_class_id == 1
+    assert crc_validator.get_default_class()["id"] == 1
+    assert crc_validator.get_default_class()["id"] == 1
+    # NOTE: One request for the user and one for the default class without a user
+    assert len(responses.calls) == 2
+
+
+@responses.activate
+def test_resource_pools_cache_is_invalidated_for_unknown_class(user):
+    responses.get("http://crc/resource_pools", json=_pools())
+    crc_validator = CRCValidator("http://crc", pools_cache_seconds=30)
+    crc_validator.validate_class_storage(user, 1)
+
+    responses.replace(responses.GET, "http://crc/resource_pools", json=_pools(_resource_class(3)))
+    assert crc_validator.validate_class_storage(user, 3).resource_class_id == 3
+    with pytest.raises(InvalidComputeResourceError):
+        crc_validator.validate_class_storage(user, 4)
+    assert len(responses.calls) == 3
+
+
+@responses.activate
+def test_resource_pools_cache_is_reloaded_for_missing_default_class():
+    stale_pools = _pools()
+    stale_pools[0]["classes"][0]["default"] = False
+    responses.get("http://crc/resource_pools", json=stale_pools)
+    crc_validator = CRCValidator("http://crc", pools_cache_seconds=30)
+    with pytest.raises(ConfigurationError):
+        crc_validator.get_default_class()
+    assert len(responses.calls) == 2
+
+    responses.replace(responses.GET, "http://crc/resource_pools", json=stale_pools)
+    responses.add(responses.GET, "http://crc/resource_pools", json=_pools())
+    crc_validator = CRCValidator("http://crc", pools_cache_seconds=30)
+    assert crc_validator.get_default_class()["id"] == 1
+    assert crc_validator.get_default_class()["id"] == 1
+    assert len(responses.calls) == 4
+
+
+def _reference_find_acceptable_class(resource_pools, requested_server_options):
+    """The search over all classes with server options models that the indexed search replaced."""
+    best_larger_or_equal_diff = None
+    best_larger_or_equal_class = None
+    zero_diff = ServerOptions(cpu=0, memory=0, gpu=0, storage=0)
+    for resource_pool in resource_pools:
+        quota = resource_pool.get("quota")
+        for resource_class in resource_pool["classes"]:
+            resource_class_mdl = ServerOptions.from_resource_class(resource_class)
+            if quota is not None and isinstance(quota, dict):
+                resource_class_mdl.priority_class = quota.get("id")
+            diff = resource_class_mdl - requested_server_options
+            if (
+                diff >= zero_diff
+                and (best_larger_or_equal_diff is None or diff < best_larger_or_equal_diff)
+                and resource_class["matching"]
+            ):
+                best_larger_or_equal_diff = diff
+                best_larger_or_equal_class = resource_class_mdl
+    return best_larger_or_equal_class
+
+
+def _synthetic_pools():
+    rng = random.Random(42)
+    return [
+        {
+            "id": pool_id,
+            "quota": {"id": f"quota-{pool_id}"} if pool_id % 2 else None,
+            "classes": [
+                _resource_class(
+                    pool_id * 1000 + class_id,
+                    cpu=rng.choice([0.5, 1, 2, 4, 8, 16]),
+                    memory=rng.randint(1, 64),
+                    gpu=rng.choice([0, 0, 0, 1, 2]),
+                    default_storage=rng.randint(1, 100),
+                    matching=rng.random() < 0.8,
+                )
+                for class_id in range(1000)
+            ],
+        }
+        for pool_id in range(5)
+    ]
+
+
+REQUESTED_OPTIONS = [
+    ServerOptions(cpu=cpu, memory=memory * 1_000_000_000, gpu=gpu, storage=storage * 1_000_000_000)
+    for cpu, memory, gpu, storage in [(0.5, 1, 0, 1), (2, 8, 0, 10), (4, 16, 1, 20), (16, 64, 2, 100)]
+]
+
+
+def _crc_validator_with_pools(mocker, pools):
+    crc_validator = CRCValidator("http://crc", pools_cache_seconds=30)
+    mocker.patch("renku_notebooks.api.classes.data_service.requests.get").return_value = mocker.MagicMock(
+        status_code=200, json=mocker.MagicMock(return_value=pools)
+    )
+    return crc_validator
+
+
+def test_find_acceptable_class_matches_reference(mocker, user):
+    pools = _synthetic_pools()
+    crc_validator = _crc_validator_with_pools(mocker, pools)
+
+    for request in REQUESTED_OPTIONS:
+        assert crc_validator.find_acceptable_class(user, request) == _reference_find_acceptable_class(pools, request)
+
+
+@pytest.mark.skipif(not os.environ.get("RUN_BENCHMARKS"), reason="Set RUN_BENCHMARKS to run the benchmarks")
+def test_find_acceptable_class_benchmark(mocker, user, record_property):
+    """Records the time of both searches over 5000 classes, see the properties in the junit report."""
+    pools = _synthetic_pools()
+    crc_validator = _crc_validator_with_pools(mocker, pools)
+    # NOTE: Load the resource pools before timing the searches
+    crc_validator.find_acceptable_class(user, REQUESTED_OPTIONS[0])
+
+    started_at = time.perf_counter()
+    for request in REQUESTED_OPTIONS:
+        crc_validator.find_acceptable_class(user, request)
+    record_property("find_acceptable_class_seconds", time.perf_counter() - started_at)
+
+    started_at = time.perf_counter()
+    for request in REQUESTED_OPTIONS:
+        _reference_find_acceptable_class(pools, request)
+    record_property("reference_find_acceptable_class_seconds", time.perf_counter() - started_at)
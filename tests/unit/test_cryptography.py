@@ -0,0 +1,57 @@
+import base64
+import time
+
+import jwt
+import responses
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
+from renku_notebooks.util import cryptography as cryptography_module
+from renku_notebooks.util.caching import TTLCache
+from renku_notebooks.util.cryptography import get_encryption_key, get_user_key
+
+
+def test_get_encryption_key_matches_cryptography():
+    kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=32, salt=b"salt", iterations=480000)
+    assert get_encryption_key(b"password", b"salt") == base64.urlsafe_b64encode(kdf.derive(b"password"))
+
+
+@responses.activate
+def test_get_user_key_is_cached_per_access_token(mocker):
+    mocker.patch.object(cryptography_module, "_user_key_cache", TTLCache())
+    derive = mocker.patch.object(cryptography_module, "get_encryption_key", return_value=b"key")
+    responses.get("http://data/user", json={"id": "user-id"})
+    responses.get("http://data/user/secret_key", json={"secret_key": "secret"})
+    signing_key = "signing-key-" * 4
+    token = jwt.encode({"exp": int(time.time()) + 300}, signing_key)
+    expired_token = jwt.encode({"exp": int(time.time()) - 10}, signing_key)
+
+    assert get_user_key("http://data", token) == "key"
+    assert get_user_key("http://data", token) == "key"
+    assert len(responses.calls) == 2
+    derive.assert_called_once_with(b"secret", b"user-id")
+
+    assert get_user_key("http://data", expired_token) == "key"
+    assert get_user_key("http://data", expired_token) == "key"
+    assert len(responses.calls) == 6
+
+
+@responses.activate
+def test_get_user_key_failures_are_not_cached(mocker):
+    mocker.patch.object(cryptography_module, "_user_key_cache", TTLCache())
+    mocker.patch.object(cryptography_module, "get_encryption_key", return_value=b"key")
+    responses.get("http://data/user", status=401, json={"error": "unauthorized"})
+
+    assert get_user_key("http://data", "token") is None
+    assert get_user_key("http://data", "token") is None
+    assert len(responses.calls) == 2
+
+
+@responses.activate
+def test_get_user_key_anonymous_user(mocker):
+    cache = TTLCache()
+    mocker.patch.object(cryptography_module, "_user_key_cache", cache)
+
+    assert get_user_key("http://data", None) is None
+    assert len(responses.calls) == 0
+    assert len(cache) == 0
@@ -0,0 +1,39 @@
+import responses
+
+from renku_notebooks.api.classes.data_service import GitProviderHelper
+from renku_notebooks.api.classes.repository import INTERNAL_GITLAB_PROVIDER
+
+
+@responses.activate
+def test_get_providers_caches_providers_and_connections(mocker):
+    user = mocker.MagicMock()
+    user.access_token = "token"
+    other_user = mocker.MagicMock()
+    other_user.access_token = "other-token"
+    responses.get(
+        "http://data/oauth2/connections",
+        json=[
+            {"id": "c1", "provider_id": "github", "status": "connected"},
+            {"id": "c2", "provider_id": "gitlab", "status": "connected"},
+            {"id": "c3", "provider_id": "github", "status": "connected"},
+            {"id": "c4", "provider_id": "bitbucket", "status": "pending"},
+        ],
+    )
+    responses.get("http://data/oauth2/providers/github", json={"id": "github", "url": "https://github.com"})
+    responses.get("http://data/oauth2/providers/gitlab", json={"id": "gitlab", "url": "https://gitlab.com"})
+    helper = GitProviderHelper("http://data/", "https://renku", "https://gitlab.renku")
+
+    providers = helper.get_providers(user)
+    assert [(p.id, p.url, p.connection_id) for p in providers] == [
+        (INTERNAL_GITLAB_PROVIDER, "https://gitlab.renku", ""),
+        ("github", "https://github.com", "c1"),
+        ("gitlab", "https://gitlab.com", "c2"),
+    ]
+    assert providers[1].access_token_url == "https://renku/oauth2/connections/c1/token"
+    assert len(responses.calls) == 3
+
+    assert helper.get_providers(user) == providers
+    assert len(responses.calls) == 3
+    # NOTE: The connections are cached per user but the providers are shared
+    assert helper.get_providers(other_user) == providers
+    assert len(responses.calls) == 4
@@ -1,4 +1,13 @@
+import json
+import threading
+import time
+from typing import Any
+
+import gevent
+import jwt
 import pytest
+import requests
+import responses
 from kubernetes.client import (
     V1Container,
     V1EnvVar,
@@ -10,13 +19,26 @@ from kubernetes.client import (
     V1StatefulSetSpec,
 )
 
-from renku_notebooks.api.classes.auth import RenkuTokens
-from renku_notebooks.api.classes.k8s_client import JsServerCache, K8sClient, NamespacedK8sClient
+from renku_notebooks.api.classes.auth import GitlabToken, RenkuTokens
+from renku_notebooks.api.classes.k8s_client import JsServerCache, K8sClient, NamespacedK8sClient, _iter_lines
 from renku_notebooks.errors.intermittent import JSCacheError
 from renku_notebooks.errors.programming import ProgrammingError
+from renku_notebooks.errors.user import UserInputError
+from renku_notebooks.util.circuit_breaker import CircuitBreaker
+from renku_notebooks.util.concurrency import run_concurrently
 from renku_notebooks.util.kubernetes_ import find_env_var
 
 
+def _server(name):
+    return {
+        "apiVersion": "amalthea.dev/v1alpha1",
+        "kind": "JupyterServer",
+        "metadata": {"name": name, "managedFields": [{"manager": "kopf"}]},
+        "spec": {},
+        "status": {},
+    }
+
+
 @pytest.fixture
 def mock_server_cache(mocker):
     server_cache = mocker.MagicMock(JsServerCache)
@@ -122,6 +144,259 @@ def test_get_server_no_match(mock_server_cache, mock_namespaced_client):
     assert server is None
 
 
+@responses.activate
+def test_js_cache_reuses_session_with_timeouts():
+    cache = JsServerCache("http://cache", connect_timeout=1, read_timeout=2)
+    server = {"metadata": {"name": "server1"}}
+    responses.get("http://cache/servers/server1", json=[server])
+    responses.get("http://cache/users/username/servers", json=[server])
+    assert cache.get_server("server1") == server
+    assert cache.list_servers("username") == [server]
+    assert all(call.request.req_kwargs["timeout"] == (1, 2) for call in responses.calls)
+
+
+@responses.activate
+def test_js_cache_unavailable_raises_cache_error():
+    cache = JsServerCache("http://cache", retries=0)
+    responses.get("http://cache/servers/server1", body=requests.ConnectionError())
+    responses.get("http://cache/users/username/servers", status=503)
+    with pytest.raises(JSCacheError):
+        cache.get_server("server1")
+    with pytest.raises(JSCacheError):
+        cache.list_servers("username")
+
+
+@responses.activate
+def test_js_cache_wait_for_server():
+    cache = JsServerCache("http://cache", connect_timeout=1, read_timeout=2)
+    server = {"metadata": {"name": "server1", "resourceVersion": "10"}}
+    responses.get(
+        "http://cache/servers/server1",
+        match=[responses.matchers.query_param_matcher({"waitSeconds": "5", "minResourceVersion": "10"})],
+        json=[server],
+    )
+    assert cache.wait_for_server("server1", "10", 5) == server
+    assert responses.calls[0].request.req_kwargs["timeout"] == (1, 7)
+
+
+def test_create_server_waits_for_cache(mock_server_cache, mock_namespaced_client):
+    renku_ns_client = mock_namespaced_client("renku")
+    sessions_ns_client = mock_namespaced_client("renku-sessions")
+    created = {"metadata": {"labels": {"username": "username"}, "name": "server1", "resourceVersion": "10"}}
+    cached = {**created, "status": {}}
+    mock_server_cache.get_server.return_value = None
+    mock_server_cache.wait_for_server.return_value = cached
+    sessions_ns_client.create_server.return_value = created
+    client = K8sClient(mock_server_cache, renku_ns_client, "username", sessions_ns_client)
+    assert client.create_server(created, "username") == cached
+    mock_server_cache.wait_for_server.assert_called_once_with("server1", "10", client.cache_wait_timeout_seconds)
+    renku_ns_client.create_server.assert_not_called()
+
+
+def test_create_server_cache_not_caught_up(mock_server_cache, mock_namespaced_client):
+    renku_ns_client = mock_namespaced_client("renku")
+    created = {"metadata": {"labels": {"username": "username"}, "name": "server1", "resourceVersion": "10"}}
+    mock_server_cache.get_server.return_value = None
+    mock_server_cache.wait_for_server.return_value = None
+    renku_ns_client.create_server.return_value = created
+    client = K8sClient(mock_server_cache, renku_ns_client, "username")
+    assert client.create_server(created, "username") == created
+
+
+def test_list_failed_cache_queries_namespaces_concurrently(mock_server_cache, mock_namespaced_client):
+    renku_ns_client = mock_namespaced_client("renku")
+    sessions_ns_client = mock_namespaced_client("renku-sessions")
+    renku_manifest = {"metadata": {"labels": {"username": "username"}, "name": "server1"}}
+    sessions_manifest = {"metadata": {"labels": {"username": "username"}, "name": "server2"}}
+    mock_server_cache.list_servers.side_effect = JSCacheError()
+    # NOTE: The barrier is only passed when both namespaces are queried at the same time
+    both_queried = threading.Barrier(2, timeout=5)
+
+    def _list_servers(manifest):
+        def _list(*_):
+            both_queried.wait()
+            return [manifest]
+
+        return _list
+
+    renku_ns_client.list_servers.side_effect = _list_servers(renku_manifest)
+    sessions_ns_client.list_servers.side_effect = _list_servers(sessions_manifest)
+    client = K8sClient(mock_server_cache, renku_ns_client, "username", sessions_ns_client)
+    servers = client.list_servers("username")
+    assert servers == [renku_manifest, sessions_manifest]
+
+
+def test_identity_map_reuses_servers_within_request(app, mock_server_cache, mock_namespaced_client):
+    renku_ns_client = mock_namespaced_client("renku")
+    server = {"metadata": {"labels": {"username": "username"}, "name": "server1", "namespace": "renku"}}
+    patched_server = {**server, "spec": {"jupyterServer": {"hibernated": True}}}
+    mock_server_cache.get_server.return_value = server
+    renku_ns_client.patch_server.return_value = patched_server
+    client = K8sClient(mock_server_cache, renku_ns_client, "username")
+    with app.app_context():
+        assert client.get_server("server1", "username") == server
+        assert client.patch_server("server1", "username", {}) == patched_server
+        assert client.get_server("server1", "username") == patched_server
+        assert client.get_server("server1", "other_username") is None
+        client.delete_server("server1", "username")
+        mock_server_cache.get_server.assert_called_once_with("server1")
+        client.get_server("server1", "username")
+        assert mock_server_cache.get_server.call_count == 2
+    with app.app_context():
+        client.get_server("server1", "username")
+        assert mock_server_cache.get_server.call_count == 3
+
+
+def test_iter_lines():
+    chunks = [b"line 1\nli", b"ne 2\n", b"\xc3", b"\xa9\nlast"]
+    assert list(_iter_lines(chunks)) == ["line 1", "line 2", "\u00e9", "last"]
+
+
+def test_stream_server_logs(mock_server_cache, mock_namespaced_client):
+    renku_ns_client = mock_namespaced_client("renku")
+    server = {
+        "metadata": {"labels": {"username": "username"}, "name": "server1", "namespace": "renku"},
+        "status": {"containerStates": {"init": {"init-1": {}}, "regular": {"jupyter-server": {}}}},
+    }
+    mock_server_cache.get_server.return_value = server
+    renku_ns_client.stream_container_logs.side_effect = lambda _, container, *args: iter([f"{container} line"])
+    client = K8sClient(mock_server_cache, renku_ns_client, "username")
+
+    lines = list(client.stream_server_logs("server1", "username"))
+
+    assert lines == [("init-1", "init-1 line"), ("jupyter-server", "jupyter-server line")]
+    with pytest.raises(UserInputError):
+        client.stream_server_logs("server1", "username", follow=True)
+    lines = list(client.stream_server_logs("server1", "username", container_name="jupyter-server", follow=True))
+    assert lines == [("jupyter-server", "jupyter-server line")]
+
+
+def test_list_servers_in_chunks_from_apiserver_cache(mocker):
+    mocker.patch("renku_notebooks.api.classes.k8s_client.InClusterConfigLoader")
+    ns_client = NamespacedK8sClient("renku", "amalthea.dev", "v1alpha1", "jupyterservers", list_page_size=2)
+    ns_client.list_from_apiserver_cache = True
+    ns_client._custom_objects = mocker.MagicMock()
+    pages = [
+        {"items": [_server("server1"), _server("server2")], "metadata": {"continue": "token", "resourceVersion": "10"}},
+        {"items": [_server("server3")], "metadata": {"resourceVersion": "10"}},
+    ]
+    ns_client._custom_objects.list_namespaced_custom_object.side_effect = [
+        mocker.MagicMock(data=json.dumps(page).encode()) for page in pages
+    ]
+
+    servers, resource_version = ns_client.list_servers_with_resource_version()
+
+    assert resource_version == "10"
+    assert [s["metadata"]["name"] for s in servers] == ["server1", "server2", "server3"]
+
+    calls = ns_client._custom_objects.list_namespaced_custom_object.call_args_list
+    assert calls[0].kwargs["resource_version"] == "0"
+    assert calls[0].kwargs["limit"] == 2
+    assert "resource_version" not in calls[1].kwargs
+    assert calls[1].kwargs["_continue"] == "token"
+
+
+def test_refresh_hibernated_tokens_in_background(mock_server_cache, mock_namespaced_client):
+    renku_ns_client = mock_namespaced_client("renku")
+    client = K8sClient(mock_server_cache, renku_ns_client, "username")
+    access_token = jwt.encode({"exp": int(time.time()) + 300}, "signing-key-" * 4)
+    renku_tokens = RenkuTokens(access_token=access_token, refresh_token="refresh")
+    gitlab_token = GitlabToken(access_token="git", expires_at=int(time.time()) + 3600)
+    fresh_annotations = client.tokens_refreshed_annotations(renku_tokens, gitlab_token)
+    running = {"metadata": {"name": "running", "namespace": "renku"}, "spec": {"jupyterServer": {}}}
+    hibernated = {
+        "metadata": {"name": "hibernated", "namespace": "renku"},
+        "spec": {"jupyterServer": {"hibernated": True}},
+    }
+    fresh = {
+        "metadata": {"name": "fresh", "namespace": "renku", "annotations": fresh_annotations},
+        "spec": {"jupyterServer": {"hibernated": True}},
+    }
+    assert client.tokens_are_fresh(fresh)
+    assert not client.tokens_are_fresh(hibernated)
+
+    future = client.refresh_hibernated_tokens_in_background([running, hibernated, fresh], renku_tokens, gitlab_token)
+    future.result(timeout=5)
+
+    renku_ns_client.patch_statefulset_tokens.assert_called_once_with("hibernated", renku_tokens)
+    renku_ns_client.patch_image_pull_secret.assert_called_once_with("hibernated", gitlab_token)
+    patch = renku_ns_client.patch_server.call_args.kwargs["patch"]
+    assert set(patch["metadata"]["annotations"]) == set(fresh_annotations)
+    # NOTE: A session is not refreshed again within the refresh interval
+    assert client.refresh_hibernated_tokens_in_background([hibernated], renku_tokens, gitlab_token) is None
+
+
+@responses.activate
+def test_js_cache_circuit_breaker():
+    cache = JsServerCache("http://cache", retries=0, circuit_breaker=CircuitBreaker("cache", failure_threshold=1))
+    responses.get("http://cache/servers/server1", status=503)
+    with pytest.raises(JSCacheError):
+        cache.get_server("server1")
+    with pytest.raises(JSCacheError):
+        cache.get_server("server1")
+    assert len(responses.calls) == 1
+
+
+def test_js_cache_interrupted_probe_does_not_block_the_circuit_breaker(mocker):
+    timer = mocker.MagicMock(return_value=0)
+    breaker = CircuitBreaker("cache", failure_threshold=1, open_seconds=30, timer=timer)
+    cache = JsServerCache("http://cache", retries=0, circuit_breaker=breaker)
+    breaker.record_failure()
+    timer.return_value = 31
+    mocker.patch.object(cache, "_get_server", side_effect=gevent.Timeout())
+
+    with pytest.raises(gevent.Timeout):
+        cache.get_server("server1")
+
+    assert breaker.allow_request()
+
+
+def test_fallback_reads_are_coalesced(mock_server_cache, mock_namespaced_client):
+    renku_ns_client = mock_namespaced_client("renku")
+    sample_server_manifest = {"metadata": {"labels": {"username": "username"}, "name": "server1"}}
+    mock_server_cache.get_server.side_effect = JSCacheError()
+    renku_ns_client.get_server.side_effect = lambda *_: time.sleep(0.1) or sample_server_manifest
+    client = K8sClient(mock_server_cache, renku_ns_client, "username")
+    results = run_concurrently(*[lambda: client.get_server("server1", "username") for _ in range(5)])
+    assert results == [sample_server_manifest] * 5
+    assert client.get_server("server1", "username") == sample_server_manifest
+    renku_ns_client.get_server.assert_called_once_with("server1")
+
+
+def test_get_server_projects_fields(mocker):
+    mocker.patch("renku_notebooks.api.classes.k8s_client.InClusterConfigLoader")
+    ns_client = NamespacedK8sClient("renku", "amalthea.dev", "v1alpha1", "jupyterservers")
+    ns_client._custom_objects = mocker.MagicMock()
+    server = {**_server("server1"), "extra": "field"}
+    response = mocker.MagicMock(data=json.dumps(server).encode())
+    ns_client._custom_objects.get_namespaced_custom_object.return_value = response
+
+    projected = ns_client.get_server("server1")
+
+    assert projected == {**_server("server1"), "metadata": {"name": "server1"}}
+    assert ns_client._custom_objects.get_namespaced_custom_object.call_args.kwargs["_preload_content"] is False
+    response.release_conn.assert_called_once()
+    ns_client.project_servers = False
+    assert ns_client.get_server("server1") == server
+
+
+def test_watch_servers_projects_fields(mocker):
+    mocker.patch("renku_notebooks.api.classes.k8s_client.InClusterConfigLoader")
+    ns_client = NamespacedK8sClient("renku", "amalthea.dev", "v1alpha1", "jupyterservers")
+    ns_client._custom_objects = mocker.MagicMock()
+    server = {**_server("server1"), "extra": "field"}
+    bookmark = {"metadata": {"resourceVersion": "10"}}
+    mocker.patch("renku_notebooks.api.classes.k8s_client.watch.Watch").return_value.stream.return_value = [
+        {"type": "MODIFIED", "object": server, "raw_object": server},
+        {"type": "BOOKMARK", "object": bookmark, "raw_object": bookmark},
+    ]
+
+    events = list(ns_client.watch_servers("1", 60))
+
+    assert events[0]["raw_object"] == {**_server("server1"), "metadata": {"name": "server1"}}
+    assert events[1]["raw_object"] == bookmark
+
+
 def test_find_env_var():
     container = V1Container(
         name="test", env=[V1EnvVar(name="key1", value="val1"), V1EnvVar(name="key2", value_from=V1EnvVarSource())]
@@ -199,3 +474,18 @@ def test_patch_statefulset_tokens():
     # Secrets init
     assert patches[3]["path"] == "/spec/template/spec/initContainers/2/env/0/value"
     assert patches[3]["value"] == new_renku_tokens.access_token
+
+
+def test_tokens_are_not_fresh_when_access_token_expires_soon(mock_server_cache, mock_namespaced_client):
+    client = K8sClient(mock_server_cache, mock_namespaced_client("renku"), "username")
+    gitlab_token = GitlabToken(access_token="git", expires_at=int(time.time()) + 3600)
+
+    def _server(access_token: str) -> dict[str, Any]:
+        renku_tokens = RenkuTokens(access_token=access_token, refresh_token="refresh")
+        return {"metadata": {"annotations": client.tokens_refreshed_annotations(renku_tokens, gitlab_token)}}
+
+    signing_key = "signing-key-" * 4
+    assert client.tokens_are_fresh(_server(jwt.encode({"exp": int(time.time()) + 300}, signing_key)))
+    assert not client.tokens_are_fresh(_server(jwt.encode({"exp": int(time.time()) + 30}, signing_key)))
+    # NOTE: Without a known expiry the tokens are always patched on resume
+    assert not client.tokens_are_fresh(_server("not-a-jwt"))
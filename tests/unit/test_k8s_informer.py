@@ -0,0 +1,75 @@
+import threading
+
+import pytest
+
+from renku_notebooks.api.classes.k8s_client import NamespacedK8sClient
+from renku_notebooks.api.classes.k8s_informer import JupyterServerInformer
+from renku_notebooks.errors.intermittent import JSCacheError
+
+
+def _server(name, username, namespace="renku", resource_version="1"):
+    return {
+        "metadata": {
+            "name": name,
+            "namespace": namespace,
+            "labels": {"username": username},
+            "resourceVersion": resource_version,
+        }
+    }
+
+
+@pytest.fixture
+def ns_client(mocker):
+    ns_client = mocker.MagicMock(NamespacedK8sClient)
+    ns_client.namespace = "renku"
+    return ns_client
+
+
+@pytest.fixture
+def informer(mocker, ns_client):
+    informer = JupyterServerInformer([ns_client], username_label="username")
+    mocker.patch.object(informer, "start")
+    return informer
+
+
+def test_informer_not_synced_raises(informer):
+    with pytest.raises(JSCacheError):
+        informer.get_server("server1")
+
+
+def test_informer_applies_watch_events(informer, ns_client):
+    informer._replace_namespace("renku", [_server("server1", "user1"), _server("server2", "user2")])
+    informer._synced["renku"] = True
+    ns_client.watch_servers.return_value = [
+        {"type": "ADDED", "raw_object": _server("server3", "user1", resource_version="2")},
+        {"type": "MODIFIED", "raw_object": _server("server2", "user1", resource_version="3")},
+        {"type": "DELETED", "raw_object": _server("server1", "user1", resource_version="4")},
+        {"type": "BOOKMARK", "raw_object": {"metadata": {"resourceVersion": "5"}}},
+    ]
+
+    resource_version = informer._watch(ns_client, "1")
+
+    assert resource_version == "5"
+    assert informer.get_server("server1") is None
+    assert informer.get_server("server2")["metadata"]["resourceVersion"] == "3"
+    assert sorted(s["metadata"]["name"] for s in informer.list_servers("user1")) == ["server2", "server3"]
+    assert informer.list_servers("user2") == []
+
+
+def test_informer_relist_replaces_namespace(informer):
+    informer._replace_namespace("renku", [_server("server1", "user1")])
+    informer._replace_namespace("renku", [_server("server2", "user1")])
+    informer._synced["renku"] = True
+    assert informer.get_server("server1") is None
+    assert [s["metadata"]["name"] for s in informer.list_servers("user1")] == ["server2"]
+
+
+def test_informer_wait_for_server(informer):
+    informer._synced["renku"] = True
+    informer._add(_server("server1", "user1", resource_version="1"))
+    timer = threading.Timer(0.05, informer._add, args=(_server("server1", "user1", resource_version="2"),))
+    timer.start()
+    server = informer.wait_for_server("server1", "2", timeout_seconds=5)
+    timer.join()
+    assert server["metadata"]["resourceVersion"] == "2"
+    assert informer.wait_for_server("missing", None, timeout_seconds=0.01) is None
@@ -0,0 +1,339 @@
+import base64
+import json
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import flask
+import pytest
+import responses
+
+from renku_notebooks.api import notebooks
+from renku_notebooks.api.classes.data_service import CRCValidator
+from renku_notebooks.api.classes.image import ImageInspection
+from renku_notebooks.api.classes.launch_operations import LaunchOperations
+from renku_notebooks.api.classes.server import UserServer
+from renku_notebooks.api.classes.user import AnonymousUser, RegisteredUser
+from renku_notebooks.api.schemas.server_options import ServerOptions
+from renku_notebooks.config import config
+from renku_notebooks.errors.user import InvalidComputeResourceError, MissingResourceError, UserInputError
+
+SECRETS_URL = "http://secrets-storage/api/secrets/kubernetes"
+
+LAUNCH_PARAMETERS = {
+    "server_name": "test-server",
+    "image": "renku/singleuser:latest",
+    "resource_class_id": 1,
+    "storage": 1,
+    "environment_variables": {},
+    "user_secrets": None,
+    "default_url": None,
+    "lfs_auto_fetch": None,
+    "cloudstorage": [],
+    "cloudstorage_endpoint": "http://data/storage",
+    "server_options": None,
+    "namespace": None,
+    "project": None,
+    "branch": None,
+    "commit_sha": None,
+    "notebook": None,
+    "gl_project": None,
+    "gl_project_path": None,
+    "project_id": None,
+    "launcher_id": None,
+    "repositories": None,
+}
+
+
+@pytest.fixture
+def k8s_client(mocker):
+    k8s_client = MagicMock()
+    k8s_client.get_server.return_value = None
+    mocker.patch.object(config.k8s, "client", k8s_client, create=True)
+    return k8s_client
+
+
+@pytest.fixture
+def crc_validator(mocker):
+    crc_validator = MagicMock()
+    crc_validator.validate_class_storage.return_value = ServerOptions(cpu=1, memory=1, gpu=0, storage=1)
+    mocker.patch.object(config, "_crc_validator", crc_validator, create=True)
+    return crc_validator
+
+
+@pytest.fixture
+def launch(app, mocker, k8s_client, crc_validator):
+    mocker.patch.object(config.user_secrets, "secrets_storage_service_url", "http://secrets-storage")
+    mocker.patch.object(
+        notebooks,
+        "inspect_image",
+        side_effect=lambda image, token: ImageInspection(image=image, exists=True, workdir=Path("/home/jovyan")),
+    )
+    mocker.patch.object(notebooks, "NotebookResponse")
+    server_class = MagicMock(UserServer)
+    server = server_class.return_value
+    server.server_name = "test-server"
+    server.safe_username = "user"
+    server.k8s_client.preferred_namespace = "test-namespace"
+    server.start.return_value = {"metadata": {"name": "test-server", "uid": "test-uid"}}
+
+    def _launch(user=None, **kwargs):
+        if user is None:
+            user = MagicMock(safe_username="user", access_token="access-token")
+        with app.test_request_context():
+            return notebooks.launch_notebook_helper(
+                server_class=server_class, user=user, **{**LAUNCH_PARAMETERS, **kwargs}
+            )
+
+    _launch.server_class = server_class
+    return _launch
+
+
+def _storages_with_secrets(mocker):
+    mocker.patch.object(notebooks, "get_user_key", return_value="user-key")
+    mocker.patch.object(notebooks.RCloneStorage, "configs_from_schema", return_value=[MagicMock()])
+    mocker.patch.object(
+        notebooks.RCloneStorage,
+        "storage_from_config",
+        return_value=SimpleNamespace(
+            mount_folder="/home/jovyan/work/storage", secrets={"secret-id": "key"}, base_name="storage"
+        ),
+    )
+
+
+@responses.activate
+def test_launch_creates_secrets_concurrently(launch, mocker, k8s_client):
+    _storages_with_secrets(mocker)
+    responses.post(SECRETS_URL, status=201, json={})
+
+    _, status_code = launch(
+        user_secrets={"user_secret_ids": ["01HYJE5FR1JV4CWFMBFJQFQ4RM"], "mount_path": "/secrets"},
+        cloudstorage=[{"storage_id": "storage-id"}],
+    )
+
+    assert status_code == 201
+    payloads = [json.loads(call.request.body) for call in responses.calls]
+    assert sorted(payload["name"] for payload in payloads) == ["storage-secrets", "test-server-secret"]
+    assert all(payload["owner_references"][0]["uid"] == "test-uid" for payload in payloads)
+    k8s_client.delete_server.assert_not_called()
+
+
+@responses.activate
+def test_launch_deletes_the_session_once_when_a_secret_fails(launch, mocker, k8s_client):
+    _storages_with_secrets(mocker)
+    responses.post(
+        SECRETS_URL,
+        match=[responses.matchers.json_params_matcher({"name": "storage-secrets"}, strict_match=False)],
+        status=500,
+        json={"error": "failed"},
+    )
+    responses.post(SECRETS_URL, status=201, json={})
+
+    with pytest.raises(RuntimeError, match="Saved storage secrets could not be created"):
+        launch(
+            user_secrets={"user_secret_ids": ["01HYJE5FR1JV4CWFMBFJQFQ4RM"], "mount_path": "/secrets"},
+            cloudstorage=[{"storage_id": "storage-id"}],
+        )
+
+    assert len(responses.calls) == 2
+    k8s_client.delete_server.assert_called_once_with("test-server", forced=True, safe_username="user")
+
+
+@responses.activate
+def test_secrets_storage_session_does_not_keep_cookies():
+    responses.post(SECRETS_URL, status=201, headers={"Set-Cookie": "session=user1; Path=/"})
+
+    notebooks._secrets_storage_session.post(SECRETS_URL)
+    notebooks._secrets_storage_session.post(SECRETS_URL)
+
+    assert "Cookie" not in responses.calls[1].request.headers
+
+
+def test_launch_with_missing_image(launch, mocker):
+    image_repo = MagicMock()
+    image_repo.inspect.side_effect = lambda image: ImageInspection(image=image, exists=False)
+    mocker.patch.object(notebooks.Image, "repo_api", return_value=image_repo)
+    gl_project = MagicMock(path_with_namespace="namespace/project", visibility="public")
+
+    with pytest.raises(MissingResourceError) as err:
+        launch(image=None, gl_project=gl_project, commit_sha="abcdef1234")
+
+    assert err.value.status_code == 404
+    launch.server_class.assert_not_called()
+
+
+@responses.activate
+def test_launch_with_invalid_resource_class(launch, mocker):
+    mocker.patch.object(config, "_crc_validator", CRCValidator("http://crc"))
+    responses.get(
+        "http://crc/resource_pools",
+        json=[{"id": 1, "default": True, "classes": [{"id": 1, "default": True}], "quota": None}],
+    )
+
+    with pytest.raises(InvalidComputeResourceError) as err:
+        launch(resource_class_id=2)
+
+    assert err.value.status_code == 422
+    launch.server_class.assert_not_called()
+
+
+def test_launch_preflight_error_does_not_wait_for_other_stages(launch, mocker, crc_validator):
+    release = threading.Event()
+    crc_validator.validate_class_storage.side_effect = lambda *_: release.wait(5)
+    mocker.patch.object(notebooks, "inspect_image", side_effect=UserInputError("Invalid image"))
+
+    started_at = time.monotonic()
+    try:
+        with pytest.raises(UserInputError, match="Invalid image"):
+            launch()
+        assert time.monotonic() - started_at < 2
+    finally:
+        release.set()
+    launch.server_class.assert_not_called()
+
+
+def test_launch_anonymous_user_with_inline_storage(launch, mocker):
+    storage_validator = MagicMock()
+    mocker.patch.object(config, "_storage_validator", storage_validator, create=True)
+    user = MagicMock(AnonymousUser, safe_username="anonymous", access_token=None)
+
+    _, status_code = launch(
+        user=user,
+        cloudstorage=[{"configuration": {"type": "s3"}, "source_path": "bucket", "target_path": "data"}],
+    )
+
+    assert status_code == 201
+    storages = launch.server_class.call_args.kwargs["cloudstorage"]
+    assert [storage.mount_folder for storage in storages] == ["/home/jovyan/work/data"]
+    assert storages[0].user_secret_key == ""
+    storage_validator.validate_storage_configuration.assert_called_once_with({"type": "s3"}, "bucket")
+
+
+def _auth_headers(username):
+    id_token = {"sub": username, "email": "email", "name": username, "preferred_username": username, "iss": "issuer"}
+    git_credentials = {"https://gitlab-url.com": {"AuthorizationHeader": "Bearer token", "AccessTokenExpiresAt": None}}
+    return {
+        "Renku-Auth-Id-Token": ".".join(
+            base64.b64encode(json.dumps(part).encode()).decode() for part in [{}, id_token, {}]
+        ),
+        "Renku-Auth-Git-Credentials": base64.b64encode(json.dumps(git_credentials).encode()).decode(),
+        "Renku-Auth-Access-Token": "access-token",
+        "Renku-Auth-Refresh-Token": "refresh-token",
+    }
+
+
+@pytest.fixture
+def launch_operations(mocker):
+    launch_operations = LaunchOperations(workers=1, max_pending=2)
+    mocker.patch.object(notebooks, "_launch_operations", launch_operations)
+    return launch_operations
+
+
+@pytest.fixture
+def launch_request(client, mocker, k8s_client, launch_operations):
+    mocker.patch.object(RegisteredUser, "get_renku_project", return_value=MagicMock(path="project"))
+
+    def _launch_request(query_string=None):
+        return client.post(
+            "/notebooks/servers",
+            query_string=query_string,
+            headers=_auth_headers("user"),
+            json={
+                "namespace": "namespace",
+                "project": "project",
+                "commit_sha": "abcdef1234",
+                "image": "image",
+                "resource_class_id": 1,
+            },
+        )
+
+    return _launch_request
+
+
+def _wait_until_done(client, operation_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        operation = client.get(f"/notebooks/operations/{operation_id}", headers=_auth_headers("user")).json
+        if operation["status"] in ["succeeded", "failed"]:
+            return operation
+        time.sleep(0.01)
+    raise TimeoutError(f"The launch operation {operation_id} did not finish")
+
+
+def test_async_launch_returns_the_operation(launch_request, client, mocker):
+    release = threading.Event()
+    mocker.patch.object(notebooks, "launch_notebook_helper", side_effect=lambda **_: release.wait(5))
+
+    try:
+        res = launch_request({"async": "true"})
+        # NOTE: Launching the same session again while it starts returns the same operation
+        res_again = launch_request({"async": "true"})
+        res_other_user = client.get(f"/notebooks/operations/{res.json['id']}", headers=_auth_headers("other"))
+    finally:
+        release.set()
+
+    assert res.status_code == 202
+    assert res.json["server_name"] == notebooks.renku_1_make_server_name(
+        "user", "namespace", "project", "master", "abcdef1234"
+    )
+    assert res.json["status"] in ["pending", "running"]
+    assert res.headers["Location"].endswith(f"/notebooks/operations/{res.json['id']}")
+    assert res_again.status_code == 202
+    assert res_again.json["id"] == res.json["id"]
+    assert res_other_user.status_code == 404
+    assert _wait_until_done(client, res.json["id"])["status"] == "succeeded"
+
+
+def test_async_launch_of_an_existing_session(launch_request, mocker, k8s_client, launch_operations):
+    helper = mocker.patch.object(notebooks, "launch_notebook_helper")
+    k8s_client.get_server.return_value = {"metadata": {"name": "test-server"}}
+    mocker.patch.object(notebooks, "UserServerManifest")
+    mocker.patch.object(notebooks, "NotebookResponse").return_value.dump.return_value = {"name": "test-server"}
+    submit = mocker.spy(launch_operations, "submit")
+
+    res = launch_request({"async": "true"})
+
+    assert res.status_code == 200
+    assert res.json == {"name": "test-server"}
+    helper.assert_not_called()
+    submit.assert_not_called()
+
+
+@pytest.mark.parametrize("query_string", [None, {"async": "false"}])
+def test_launch_without_async_is_synchronous(launch_request, mocker, launch_operations, query_string):
+    helper = mocker.patch.object(notebooks, "launch_notebook_helper", return_value=({"name": "test-server"}, 201))
+    submit = mocker.spy(launch_operations, "submit")
+
+    res = launch_request(query_string)
+
+    assert res.status_code == 201
+    assert res.json == {"name": "test-server"}
+    helper.assert_called_once()
+    submit.assert_not_called()
+
+
+def test_async_launch_runs_without_a_request_context(launch_request, client, mocker, crc_validator):
+    """The launch runs in a worker thread that only has an application context."""
+    mocker.patch.object(
+        notebooks,
+        "inspect_image",
+        side_effect=lambda image, token: ImageInspection(image=image, exists=True, workdir=Path("/home/jovyan")),
+    )
+    mocker.patch.object(notebooks, "NotebookResponse")
+    server_class = mocker.patch.object(notebooks, "Renku1UserServer", MagicMock(UserServer))
+    server = server_class.return_value
+    server.server_name = "test-server"
+    server.safe_username = "user"
+    has_request_context = []
+    server.start.side_effect = lambda: has_request_context.append(flask.has_request_context()) or {
+        "metadata": {"name": "test-server", "uid": "test-uid"}
+    }
+
+    res = launch_request({"async": "true"})
+    operation = _wait_until_done(client, res.json["id"])
+
+    assert operation["status"] == "succeeded", operation["error"]
+    assert has_request_context == [False]
+    server.start.assert_called_once()
@@ -0,0 +1,63 @@
+import threading
+import time
+
+import pytest
+
+from renku_notebooks.api.classes.launch_operations import LaunchOperations, LaunchOperationStatus
+from renku_notebooks.errors.intermittent import LaunchQueueFullError
+from renku_notebooks.errors.user import UserInputError
+
+
+def _wait_until_done(operation, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not operation.is_done and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_launch_operations(app):
+    operations = LaunchOperations(workers=2, max_pending=2)
+    release = threading.Event()
+
+    def _fail():
+        raise UserInputError(message="Invalid launch")
+
+    try:
+        with app.app_context():
+            blocked = operations.submit("server1", "user1", release.wait)
+            assert operations.submit("server1", "user1", release.wait) is blocked
+            failed = operations.submit("server2", "user1", _fail)
+            _wait_until_done(failed)
+            operations.submit("server3", "user1", release.wait)
+            with pytest.raises(LaunchQueueFullError):
+                operations.submit("server4", "user1", release.wait)
+
+        assert failed.status == LaunchOperationStatus.failed
+        assert failed.error["message"] == "Invalid launch"
+        assert failed.error["code"] == UserInputError.code
+        assert blocked.status == LaunchOperationStatus.running
+    finally:
+        release.set()
+    _wait_until_done(blocked)
+    assert blocked.status == LaunchOperationStatus.succeeded
+    assert operations.get(blocked.id, "user1") is blocked
+    assert operations.get(blocked.id, "user2") is None
+
+
+def test_running_launch_operations_are_not_evicted(app):
+    operations = LaunchOperations(workers=2, max_pending=2, max_finished=1)
+    release = threading.Event()
+
+    try:
+        with app.app_context():
+            running = operations.submit("server1", "user1", release.wait)
+            finished = []
+            for i in range(2, 5):
+                finished.append(operations.submit(f"server{i}", "user1", lambda: None))
+                _wait_until_done(finished[-1])
+
+        assert operations.get(running.id, "user1") is running
+        assert operations.get(finished[0].id, "user1") is None
+    finally:
+        release.set()
+    _wait_until_done(running)
+    assert operations.get(running.id, "user1") is running
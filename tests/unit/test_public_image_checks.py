@@ -1,8 +1,11 @@
+import json
 from dataclasses import asdict
 
 import pytest
+import responses
 
-from renku_notebooks.api.classes.image import Image
+from renku_notebooks.api.classes import image as image_module
+from renku_notebooks.api.classes.image import Image, ImageRepoDockerAPI, ManifestTypes, inspect_image
 
 
 @pytest.mark.parametrize(
@@ -201,3 +204,219 @@ def test_image_workdir_check():
     parsed_image = Image.from_path("invalid_image:invalid_tag")
     workdir = parsed_image.repo_api().image_workdir(parsed_image)
     assert workdir is None
+
+
+@responses.activate
+def test_image_manifest_and_config_are_cached(mocker):
+    mocker.patch.object(image_module, "_image_cache", image_module.TTLCache())
+    manifest = {"config": {"digest": "sha256:config"}}
+    manifest_url = "https://registry.example.com/v2/user/image/manifests/1.0"
+    responses.get(manifest_url, json=manifest, headers={"Content-Type": ManifestTypes.docker_v2.value})
+    config_url = "https://registry.example.com/v2/user/image/blobs/sha256:config"
+    responses.get(config_url, json={"config": {"WorkingDir": "/work"}})
+    responses.get("https://registry.example.com/v2/user/missing/manifests/latest", status=404)
+    image = Image.from_path("registry.example.com/user/image:1.0")
+    repo_api = image.repo_api()
+
+    assert repo_api.image_workdir(image).as_posix() == "/work"
+    calls = len(responses.calls)
+    assert repo_api.image_workdir(image).as_posix() == "/work"
+    assert repo_api.get_image_manifest(image) == manifest
+    assert len(responses.calls) == calls
+
+    missing_image = Image.from_path("registry.example.com/user/missing")
+    assert repo_api.get_image_manifest(missing_image) is None
+    calls = len(responses.calls)
+    assert repo_api.get_image_manifest(missing_image) is None
+    assert len(responses.calls) == calls
+
+    # NOTE: Other credentials are not served from the cache
+    assert repo_api.with_oauth2_token("token").get_image_manifest(image) == manifest
+    assert len(responses.calls) > calls
+
+
+@pytest.mark.parametrize("status", [401, 503])
+@responses.activate
+def test_registry_failures_are_not_cached(mocker, status):
+    mocker.patch.object(image_module, "_image_cache", image_module.TTLCache())
+    mocker.patch.object(image_module, "_auth_cache", image_module.TTLCache())
+    manifest_url = "https://registry.example.com/v2/user/image/manifests/1.0"
+    responses.get(manifest_url, status=status)
+    responses.head(manifest_url, status=status)
+    image = Image.from_path("registry.example.com/user/image:1.0")
+    repo_api = image.repo_api()
+
+    assert repo_api.get_image_manifest(image) is None
+    assert not repo_api.image_exists(image)
+
+    responses.replace(
+        responses.GET,
+        manifest_url,
+        json={"config": {"digest": "sha256:config"}},
+        headers={"Content-Type": ManifestTypes.docker_v2.value},
+    )
+    responses.replace(responses.HEAD, manifest_url, headers={"Content-Type": ManifestTypes.docker_v2.value})
+    assert repo_api.get_image_manifest(image) == {"config": {"digest": "sha256:config"}}
+    assert repo_api.image_exists(image)
+
+
+@responses.activate
+def test_manifest_unknown_is_cached(mocker):
+    mocker.patch.object(image_module, "_image_cache", image_module.TTLCache())
+    mocker.patch.object(image_module, "_auth_cache", image_module.TTLCache())
+    manifest_url = "https://registry.example.com/v2/user/image/manifests/1.0"
+    responses.get(manifest_url, status=400, json={"errors": [{"code": "MANIFEST_UNKNOWN"}]})
+    image = Image.from_path("registry.example.com/user/image:1.0")
+
+    assert image.repo_api().get_image_manifest(image) is None
+    calls = len(responses.calls)
+    assert image.repo_api().get_image_manifest(image) is None
+    assert len(responses.calls) == calls
+
+
+@responses.activate
+def test_registry_tokens_are_cached(mocker):
+    mocker.patch.object(image_module, "_image_cache", image_module.TTLCache())
+    mocker.patch.object(image_module, "_auth_cache", image_module.TTLCache())
+    challenge = 'Bearer realm="https://auth.example.com/token",service="registry",scope="repository:user/image:pull"'
+    manifest_headers = {"Content-Type": ManifestTypes.docker_v2.value}
+    for tag in ["1.0", "2.0"]:
+        url = f"https://registry.example.com/v2/user/image/manifests/{tag}"
+        responses.get(
+            url,
+            status=401,
+            headers={"Www-Authenticate": challenge},
+            match=[responses.matchers.header_matcher({"Accept": "*/*"})],
+        )
+        responses.get(url, json={"config": {"digest": "sha256:config"}}, headers=manifest_headers)
+    token_response = responses.get("https://auth.example.com/token", json={"token": "abc", "expires_in": 300})
+
+    image_1 = Image.from_path("registry.example.com/user/image:1.0")
+    image_2 = Image.from_path("registry.example.com/user/image:2.0")
+    assert image_1.repo_api().get_image_manifest(image_1) is not None
+    assert image_2.repo_api().get_image_manifest(image_2) is not None
+
+    assert token_response.call_count == 1
+    assert responses.calls[-1].request.headers["Authorization"] == "Bearer abc"
+    challenge_calls = [c for c in responses.calls if c.response.status_code == 401]
+    assert len(challenge_calls) == 1
+
+
+@responses.activate
+def test_inspect_private_image(mocker):
+    mocker.patch.object(image_module, "_image_cache", image_module.TTLCache())
+    mocker.patch.object(image_module, "_auth_cache", image_module.TTLCache())
+    manifest_url = "https://registry.example.com/v2/user/image/manifests/1.0"
+    authorized = [responses.matchers.header_matcher({"Authorization": "Bearer abc"})]
+    responses.get(
+        manifest_url,
+        status=401,
+        headers={"Www-Authenticate": 'Bearer realm="https://auth.example.com/token",service="registry"'},
+        match=[responses.matchers.header_matcher({"Accept": "*/*"})],
+    )
+    responses.get(
+        manifest_url,
+        json={"config": {"digest": "sha256:config"}},
+        headers={"Content-Type": ManifestTypes.docker_v2.value, "Docker-Content-Digest": "sha256:manifest"},
+        match=authorized,
+    )
+    responses.get(manifest_url, status=404)
+    responses.get(
+        "https://registry.example.com/v2/user/image/blobs/sha256:config",
+        json={"config": {"WorkingDir": "/work"}},
+        match=authorized,
+    )
+
+    def _token(request):
+        # NOTE: Only authenticated users get a token for the private image
+        if "Authorization" not in request.headers:
+            return 401, {}, ""
+        return 200, {}, json.dumps({"token": "abc"})
+
+    responses.add_callback(responses.GET, "https://auth.example.com/token", callback=_token)
+    image = Image.from_path("registry.example.com/user/image:1.0")
+
+    assert not inspect_image(image).exists
+    inspection = inspect_image(image, "token")
+
+    assert inspection.exists
+    assert inspection.is_private
+    assert inspection.digest == "sha256:manifest"
+    assert inspection.manifest == {"config": {"digest": "sha256:config"}}
+    assert inspection.workdir.as_posix() == "/work"
+
+
+@responses.activate
+def test_manifest_negotiation(mocker):
+    mocker.patch.object(image_module, "_image_cache", image_module.TTLCache())
+    mocker.patch.object(image_module, "_auth_cache", image_module.TTLCache())
+    index = {
+        "manifests": [
+            {"digest": "sha256:arm", "platform": {"architecture": "arm64", "os": "linux"}},
+            {
+                "digest": "sha256:amd",
+                "mediaType": ManifestTypes.oci_v1_manifest.value,
+                "platform": {"architecture": "amd64", "os": "linux"},
+            },
+        ]
+    }
+    index_url = "https://registry.example.com/v2/user/multi/manifests/latest"
+    # NOTE: The registry does not require authentication
+    responses.get(index_url, match=[responses.matchers.header_matcher({"Accept": "*/*"})])
+    responses.get(
+        index_url,
+        json=index,
+        headers={"Content-Type": ManifestTypes.oci_v1_index.value},
+        match=[responses.matchers.header_matcher({"Accept": image_module.MANIFEST_OR_INDEX_ACCEPT})],
+    )
+    responses.get(
+        "https://registry.example.com/v2/user/multi/manifests/sha256:amd",
+        json={"config": {}},
+        headers={"Content-Type": ManifestTypes.oci_v1_manifest.value},
+        match=[responses.matchers.header_matcher({"Accept": ManifestTypes.oci_v1_manifest.value})],
+    )
+    responses.head(
+        "https://registry.example.com/v2/user/single/manifests/latest",
+        headers={"Content-Type": f"{ManifestTypes.docker_v2.value}; charset=utf-8"},
+    )
+    repo_api = ImageRepoDockerAPI("registry.example.com")
+
+    assert repo_api.get_image_manifest(Image.from_path("registry.example.com/user/multi")) == {"config": {}}
+    manifest_calls = [c for c in responses.calls if "/manifests/" in c.request.url]
+    assert len(manifest_calls) == 3  # the authentication challenge, the index and the platform manifest
+
+    # NOTE: A missing authentication challenge is not cached so the registry is probed again
+    responses.get("https://registry.example.com/v2/user/single/manifests/latest")
+    responses.calls.reset()
+    assert repo_api.image_exists(Image.from_path("registry.example.com/user/single"))
+    assert [c.request.method for c in responses.calls] == ["GET", "HEAD"]
+
+
+@responses.activate
+def test_missing_auth_challenge_is_not_cached(mocker):
+    mocker.patch.object(image_module, "_image_cache", image_module.TTLCache())
+    mocker.patch.object(image_module, "_auth_cache", image_module.TTLCache())
+    public_url = "https://registry.example.com/v2/user/public/manifests/latest"
+    private_url = "https://registry.example.com/v2/user/private/manifests/latest"
+    # NOTE: The public repository can be pulled anonymously so it does not send a challenge
+    responses.get(public_url)
+    responses.head(public_url, headers={"Content-Type": ManifestTypes.docker_v2.value})
+    responses.get(
+        private_url,
+        status=401,
+        headers={"Www-Authenticate": 'Bearer realm="https://auth.example.com/token",service="registry"'},
+        match=[responses.matchers.header_matcher({"Accept": "*/*"})],
+    )
+    responses.get(
+        "https://auth.example.com/token",
+        json={"token": "token", "expires_in": 300},
+    )
+    responses.head(
+        private_url,
+        headers={"Content-Type": ManifestTypes.docker_v2.value},
+        match=[responses.matchers.header_matcher({"Authorization": "Bearer token"})],
+    )
+    repo_api = ImageRepoDockerAPI("registry.example.com")
+
+    assert repo_api.image_exists(Image.from_path("registry.example.com/user/public"))
+    assert repo_api.image_exists(Image.from_path("registry.example.com/user/private"))
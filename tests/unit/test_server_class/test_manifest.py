@@ -1,8 +1,10 @@
 from pathlib import Path
+from time import perf_counter
 from typing import Any
 
 import pytest
 
+from renku_notebooks.api.amalthea_patches import init_containers as init_containers_patches
 from renku_notebooks.api.classes.k8s_client import K8sClient
 from renku_notebooks.api.classes.server import UserServer
 from renku_notebooks.api.schemas.secrets import K8sUserSecrets
@@ -272,3 +274,42 @@ def test_patches_env_var_override(patch_user_server, user_with_project_path, app
 
         with pytest.raises(DuplicateEnvironmentVariableError):
             server._get_session_manifest()
+
+
+def test_static_patches_are_copies():
+    """Test that changing the returned static patches does not change the next ones."""
+    patches = init_containers_patches.certificates()
+    patches[0]["patch"][0]["value"]["name"] = "changed"
+    patches.append({})
+
+    assert init_containers_patches.certificates()[0]["patch"][0]["value"]["name"] == "init-certificates"
+    assert len(init_containers_patches.certificates()) == len(patches) - 1
+
+
+def test_session_manifest_generation_time(patch_user_server, user_with_project_path, app, mocker):
+    """Test that generating the manifest of a session stays cheap."""
+    with app.app_context():
+        parameters = BASE_PARAMETERS.copy()
+        parameters["user"] = user_with_project_path("namespace/project")
+        parameters["k8s_client"] = mocker.MagicMock(K8sClient)
+        parameters["server_name"] = renku_1_make_server_name(
+            safe_username=parameters["user"].safe_username,
+            namespace=parameters["namespace"],
+            project=parameters["project"],
+            branch=parameters["branch"],
+            commit_sha=parameters["commit_sha"],
+        )
+
+        server = UserServer(**parameters)
+        server._repositories = {}
+        # NOTE: The first call builds the static patches
+        server._get_session_manifest()
+
+        runs = 100
+        started_at = perf_counter()
+        for _ in range(runs):
+            server._get_session_manifest()
+        seconds_per_manifest = (perf_counter() - started_at) / runs
+
+    # NOTE: Takes well below a millisecond, the limit is loose to avoid flaky failures on slow runners
+    assert seconds_per_manifest < 0.01
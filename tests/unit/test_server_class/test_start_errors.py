@@ -0,0 +1,83 @@
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from renku_notebooks.api.classes import user as user_module
+from renku_notebooks.api.classes.k8s_client import K8sClient
+from renku_notebooks.api.classes.server import Renku1UserServer
+from renku_notebooks.api.classes.user import RegisteredUser
+from renku_notebooks.api.schemas.server_options import ServerOptions
+from renku_notebooks.util.caching import TTLCache
+
+
+class _User(RegisteredUser):
+    def __init__(self, gitlab_project):
+        self.git_url = "https://gitlab-url.com"
+        self.git_token = "token"
+        self.username = "user"
+        self.safe_username = "user"
+        self._gitlab_project = gitlab_project
+
+    def get_renku_project(self, namespace_project):
+        return self._gitlab_project
+
+
+@pytest.fixture
+def gitlab_project(mocker):
+    mocker.patch.object(user_module, "_gitlab_cache", TTLCache())
+    return MagicMock(path="project", http_url_to_repo="https://gitlab-url.com/namespace/project.git")
+
+
+@pytest.fixture
+def make_server(patch_user_server, gitlab_project, mocker):
+    def _make_server(branch="master", commit_sha="abcdefg123456789"):
+        return Renku1UserServer(
+            user=_User(gitlab_project),
+            server_name="test-server",
+            namespace="namespace",
+            project="project",
+            branch=branch,
+            commit_sha=commit_sha,
+            notebook=None,
+            image="image",
+            server_options=ServerOptions(cpu=1, memory=1, gpu=0, storage=1),
+            environment_variables={},
+            user_secrets=None,
+            cloudstorage=[],
+            k8s_client=mocker.MagicMock(K8sClient),
+            workspace_mount_path=Path("/workspace"),
+            work_dir=Path("/workspace/work/project"),
+        )
+
+    return _make_server
+
+
+def test_start_errors_missing_branch(app, make_server, gitlab_project):
+    gitlab_project.branches.get.side_effect = Exception("404 Branch Not Found")
+
+    with app.app_context():
+        errors = make_server(branch="missing")._get_start_errors()
+        make_server(branch="missing")._get_start_errors()
+
+    assert errors == ["branch missing does not exist"]
+    # NOTE: Missing branches are not cached since they could be pushed at any time
+    assert gitlab_project.branches.get.call_count == 2
+
+
+def test_start_errors_missing_commit(app, make_server, gitlab_project):
+    gitlab_project.commits.get.side_effect = Exception("404 Commit Not Found")
+
+    with app.app_context():
+        errors = make_server(commit_sha="missing")._get_start_errors()
+
+    assert errors == ["commit missing does not exist"]
+
+
+def test_start_errors_are_cached(app, make_server, gitlab_project):
+    with app.app_context():
+        assert make_server()._get_start_errors() == []
+        assert make_server()._get_start_errors() == []
+
+    gitlab_project.branches.get.assert_called_once_with("master")
+    gitlab_project.commits.get.assert_called_once_with("abcdefg123456789")
@@ -0,0 +1,53 @@
+import pytest
+import responses
+
+from renku_notebooks.api.classes.data_service import StorageValidator
+from renku_notebooks.errors.user import InvalidCloudStorageConfiguration
+
+
+@responses.activate
+def test_get_data_connector_with_secrets(app, mocker):
+    user = mocker.MagicMock()
+    user.access_token = "token"
+    user.git_token = "git-token"
+    responses.get(
+        "http://data/data_connectors/dc1",
+        json={
+            "name": "dc",
+            "storage": {"configuration": {"type": "s3"}, "source_path": "bucket", "target_path": "data"},
+        },
+    )
+    responses.get("http://data/data_connectors/dc1/secrets", json=[{"secret_id": "s1", "name": "secret"}])
+
+    with app.app_context():
+        storage_config = StorageValidator("http://data/").get_storage_by_id(user, "data_connectors", "dc1")
+
+    assert storage_config.name == "dc"
+    assert storage_config.target_path == "data"
+    assert storage_config.secrets == {"s1": "secret"}
+
+
+@responses.activate
+def test_successful_validations_are_cached():
+    storage_validator = StorageValidator("http://data", validation_cache_seconds=60)
+    responses.post("http://data/storage_schema/validate", status=204)
+    storage_validator.validate_storage_configuration({"type": "s3", "provider": "AWS"}, "bucket")
+    storage_validator.validate_storage_configuration({"provider": "AWS", "type": "s3"}, "bucket")
+    assert len(responses.calls) == 1
+
+    responses.replace(responses.POST, "http://data/storage_schema/validate", status=422, json={"error": "invalid"})
+    for _ in range(2):
+        with pytest.raises(InvalidCloudStorageConfiguration):
+            storage_validator.validate_storage_configuration({"type": "invalid"}, "bucket")
+    assert len(responses.calls) == 3
+
+
+@responses.activate
+def test_validations_do_not_share_cookies():
+    storage_validator = StorageValidator("http://data", validation_cache_seconds=0)
+    responses.post("http://data/storage_schema/validate", status=204, headers={"Set-Cookie": "session=user1; Path=/"})
+    storage_validator.validate_storage_configuration({"type": "s3"}, "bucket")
+    storage_validator.validate_storage_configuration({"type": "s3"}, "bucket")
+
+    assert len(responses.calls) == 2
+    assert "Cookie" not in responses.calls[1].request.headers
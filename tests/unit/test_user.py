@@ -0,0 +1,63 @@
+from unittest.mock import MagicMock
+
+import responses
+
+from renku_notebooks.api.classes import user as user_module
+from renku_notebooks.api.classes.user import RegisteredUser
+from renku_notebooks.util.caching import TTLCache
+
+
+class _User(RegisteredUser):
+    def __init__(self, git_token, gitlab_client):
+        self.git_url = "https://gitlab-url.com"
+        self.git_token = git_token
+        self.gitlab_client = gitlab_client
+        self.username = "user"
+
+
+def test_gitlab_projects_are_cached_across_requests(app, mocker):
+    mocker.patch.object(user_module, "_gitlab_cache", TTLCache())
+    gitlab_client = MagicMock()
+    project = MagicMock()
+    gitlab_client.projects.get.side_effect = [project, project, Exception("not found"), project]
+
+    with app.app_context():
+        assert _User("token", gitlab_client).get_renku_project("namespace/project") is project
+        assert _User("token", gitlab_client).get_renku_project("namespace/project") is project
+        assert gitlab_client.projects.get.call_count == 1
+
+        assert _User("other-token", gitlab_client).get_renku_project("namespace/project") is project
+        assert gitlab_client.projects.get.call_count == 2
+
+        assert _User("token", gitlab_client).get_renku_project("namespace/missing") is None
+        assert _User("token", gitlab_client).get_renku_project("namespace/missing") is project
+        assert gitlab_client.projects.get.call_count == 4
+
+
+def test_gitlab_user_is_cached_across_requests(mocker):
+    mocker.patch.object(user_module, "_gitlab_cache", TTLCache())
+    gitlab_user = MagicMock()
+
+    def _gitlab_client():
+        gitlab_client = MagicMock()
+        gitlab_client.user = None
+        gitlab_client.auth.side_effect = lambda: setattr(gitlab_client, "user", gitlab_user)
+        return gitlab_client
+
+    first_client, second_client = _gitlab_client(), _gitlab_client()
+    assert _User("token", first_client).gitlab_user is gitlab_user
+    assert _User("token", second_client).gitlab_user is gitlab_user
+    first_client.auth.assert_called_once()
+    second_client.auth.assert_not_called()
+
+
+@responses.activate
+def test_gitlab_session_does_not_share_cookies_between_requests():
+    responses.get("https://gitlab-url.com/api/v4/user", headers={"Set-Cookie": "_gitlab_session=user1; Path=/"})
+    responses.get("https://gitlab-url.com/api/v4/projects")
+
+    user_module._gitlab_session.get("https://gitlab-url.com/api/v4/user")
+    user_module._gitlab_session.get("https://gitlab-url.com/api/v4/projects")
+
+    assert len(user_module._gitlab_session.cookies) == 0
+    assert "Cookie" not in responses.calls[1].request.headers
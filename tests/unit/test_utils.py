@@ -1,6 +1,16 @@
+import contextvars
+import threading
+import time
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+
 import pytest
 
 from renku_notebooks.api.schemas.utils import flatten_dict
+from renku_notebooks.util.caching import TTLCache
+from renku_notebooks.util.circuit_breaker import CircuitBreaker, CircuitState, circuit_breakers_metrics
+from renku_notebooks.util.concurrency import run_concurrently, run_stages
+
+_context_var = contextvars.ContextVar("test_var")
 
 
 @pytest.mark.parametrize(
@@ -24,3 +34,146 @@ from renku_notebooks.api.schemas.utils import flatten_dict
 )
 def test_flatten_dict(test_input, expected):
     assert list(flatten_dict(test_input.items(), skip_key_concat=["_schema"])) == expected
+
+
+def test_run_concurrently_keeps_order_and_context():
+    _context_var.set("value")
+    # NOTE: The barrier is only passed when all the functions run at the same time
+    all_running = threading.Barrier(3, timeout=5)
+    second_done = threading.Event()
+
+    def _concurrent(value):
+        all_running.wait()
+        if value == 2:
+            second_done.set()
+        else:
+            # NOTE: The results are in order even when the functions finish in another order
+            second_done.wait(5)
+        return value, _context_var.get()
+
+    results = run_concurrently(lambda: _concurrent(1), lambda: _concurrent(2), lambda: _concurrent(3))
+    assert results == [(1, "value"), (2, "value"), (3, "value")]
+
+
+def test_run_concurrently_fails_fast():
+    release = threading.Event()
+    released = threading.Event()
+
+    def _blocked():
+        release.wait(5)
+        released.set()
+
+    def _fail():
+        raise ValueError("failed")
+
+    try:
+        with pytest.raises(ValueError):
+            run_concurrently(_blocked, _fail)
+        # NOTE: The error is raised while the other function is still running
+        assert not released.is_set()
+        with pytest.raises(FuturesTimeoutError):
+            run_concurrently(_blocked, timeout=0.05)
+        assert not released.is_set()
+    finally:
+        release.set()
+
+
+def test_run_stages_reports_timings():
+    timings = {}
+    results = run_stages({"slow": lambda: time.sleep(0.1) or "slow", "fast": lambda: "fast"}, timings=timings)
+    assert results == {"slow": "slow", "fast": "fast"}
+    assert timings["slow"] >= 0.1
+    assert set(timings) == {"slow", "fast"}
+
+    release = threading.Event()
+    timings = {}
+    try:
+        with pytest.raises(FuturesTimeoutError):
+            run_stages({"slow": lambda: release.wait(5), "fast": lambda: "fast"}, timeout=0.5, timings=timings)
+        # NOTE: Only the timings of the functions that finished are reported
+        assert list(timings) == ["fast"]
+    finally:
+        release.set()
+
+
+class _FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache_expires_and_evicts():
+    timer = _FakeTimer()
+    cache = TTLCache(maxsize=2, ttl_seconds=10, timer=timer)
+    cache.set("a", 1)
+    cache.set("b", None)
+    assert "b" in cache
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert "b" not in cache
+    timer.now = 11
+    assert cache.get("a") is None
+    assert len(cache) == 1
+
+
+def test_ttl_cache_coalesces_loads():
+    cache = TTLCache(ttl_seconds=10)
+    calls = []
+
+    def _load():
+        calls.append(1)
+        time.sleep(0.1)
+        return "value"
+
+    results = run_concurrently(*[lambda: cache.get_or_load("key", _load) for _ in range(5)])
+    assert results == ["value"] * 5
+    assert len(calls) == 1
+
+
+def test_circuit_breaker():
+    timer = _FakeTimer()
+    breaker = CircuitBreaker("test", failure_threshold=2, open_seconds=30, timer=timer)
+    breaker.record_failure()
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitState.open
+    assert not breaker.allow_request()
+    timer.now = 31
+    assert breaker.state == CircuitState.half_open
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitState.open
+    timer.now = 62
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CircuitState.closed
+    assert breaker.metrics()["opened_total"] == 2
+    assert breaker.metrics()["rejected_total"] == 2
+
+
+def test_circuit_breaker_interrupted_probe():
+    timer = _FakeTimer()
+    breaker = CircuitBreaker("test", failure_threshold=1, open_seconds=30, timer=timer)
+    breaker.record_failure()
+    timer.now = 31
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    breaker.cancel_request()
+    assert breaker.state == CircuitState.half_open
+    assert breaker.allow_request()
+
+
+def test_circuit_breakers_metrics(client):
+    breaker = CircuitBreaker("test-metrics")
+    breaker.record_failure()
+
+    assert {"name": "test-metrics", "state": "closed", "consecutive_failures": 1} in [
+        {key: metrics[key] for key in ["name", "state", "consecutive_failures"]}
+        for metrics in circuit_breakers_metrics()
+    ]
+    response = client.get("/health/circuit-breakers")
+    assert response.status_code == 200
+    assert "test-metrics" in [metrics["name"] for metrics in response.json]